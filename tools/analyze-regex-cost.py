@@ -0,0 +1,709 @@
+#!/usr/bin/env python3
+# Copyright (c) 2024 Red Hat, Inc.
+# This program and the accompanying materials are made
+# available under the terms of the Eclipse Public License 2.0
+# which is available at https://www.eclipse.org/legal/epl-2.0/
+#
+# SPDX-License-Identifier: EPL-2.0
+"""Rank the regular expressions of the Vale styles by matching cost.
+
+Loads every rule YAML file of the RedHat, AsciiDoc and OpenShiftAsciiDoc
+styles and rebuilds the regexes that Vale compiles for it: one per token
+or swap key, and one combined regex per rule. Each regex is checked
+statically for nested and overlapping quantifiers, then timed against
+the .vale/fixtures corpus and against adversarial inputs built from the
+regex itself, which pump each unbounded quantifier and end with a
+character that makes the match fail.
+
+Vale uses a backtracking regex engine, so Python's re module is a fair
+proxy for relative cost. Constructs that re does not support, such as
+backreferences in lookbehinds, are approximated and the report says so.
+Tengo scripts of 'script' rules are not analyzed.
+
+The report is written as JSON, ranked by cost. The command exits with
+status 1 when a pattern crosses a threshold and is not listed in the
+baseline file, so CI fails on new expensive patterns only.
+
+Usage:
+    tools/analyze-regex-cost.py [--style NAME] [--output FILE]
+                                [--baseline FILE] [--write-baseline FILE]
+"""
+
+import argparse
+import json
+import math
+import multiprocessing
+import os
+import re
+import sys
+import time
+
+try:
+    from re import _constants as sre_constants
+    from re import _parser as sre_parse
+except ImportError:  # Python < 3.11
+    import sre_constants
+    import sre_parse
+
+from vale_patterns import (REPO_ROOT, STYLES, fixture_lines, load_patterns,
+                           python_pattern)
+
+DEFAULT_BASELINE = os.path.join(REPO_ROOT, "tools", "regex-cost-baseline.json")
+
+# Size of the corpus sample each pattern is timed against. Combined
+# rules with hundreds of alternatives take seconds on the full fixtures.
+CORPUS_SAMPLE_BYTES = 32768
+
+# Characters used to approximate the character sets of regex atoms.
+PROBE_CHARS = "".join(chr(c) for c in range(32, 127)) + "\t\né’—"
+
+# Pump lengths of the adversarial inputs. The growth exponent is derived
+# from the time taken at the two lengths.
+ADVERSARIAL_LENGTHS = (512, 2048)
+
+# Maximum number of quantifiers pumped per pattern.
+MAX_ATTACKS = 4
+
+# Below this many nanoseconds, timings are too noisy to derive growth.
+# A linear scan of the longer adversarial input stays well under it,
+# while a quadratic one takes tens of milliseconds.
+NOISE_FLOOR_NS = 2000000
+
+DEFAULT_TIMEOUT = 10.0
+DEFAULT_MAX_NS_PER_BYTE = 2000.0
+DEFAULT_MAX_GROWTH = 1.5
+
+_UNBOUNDED = sre_constants.MAXREPEAT
+_REPEATS = tuple(op for op in (
+    sre_constants.MAX_REPEAT, sre_constants.MIN_REPEAT,
+    getattr(sre_constants, "POSSESSIVE_REPEAT", None)) if op is not None)
+_SINGLE_CHAR = (sre_constants.LITERAL, sre_constants.NOT_LITERAL,
+                sre_constants.ANY, sre_constants.IN)
+_ZERO_WIDTH = (sre_constants.AT, sre_constants.ASSERT,
+               sre_constants.ASSERT_NOT)
+
+_CATEGORIES = {
+    sre_constants.CATEGORY_DIGIT: r"\d",
+    sre_constants.CATEGORY_NOT_DIGIT: r"\D",
+    sre_constants.CATEGORY_SPACE: r"\s",
+    sre_constants.CATEGORY_NOT_SPACE: r"\S",
+    sre_constants.CATEGORY_WORD: r"\w",
+    sre_constants.CATEGORY_NOT_WORD: r"\W",
+}
+
+
+# ---------------------------------------------------------------------------
+# Corpus
+# ---------------------------------------------------------------------------
+
+def load_corpus(sample_bytes=CORPUS_SAMPLE_BYTES):
+    """Return an evenly spaced sample of lines from the fixture files.
+
+    Taking every n-th line rather than the first files keeps every style
+    represented in the sample.
+    """
+    lines = fixture_lines()
+    total = sum(len(line) + 1 for line in lines)
+    step = max(1, -(-total // sample_bytes))
+    return "\n".join(lines[::step]) + "\n"
+
+
+# ---------------------------------------------------------------------------
+# Static analysis
+# ---------------------------------------------------------------------------
+
+def _subpattern_body(av):
+    """Return the body of a SUBPATTERN node across Python versions."""
+    return av[-1]
+
+
+def _children(op, av):
+    """Yield the child sequences of a parse tree node."""
+    if op == sre_constants.SUBPATTERN:
+        yield _subpattern_body(av)
+    elif op in _REPEATS:
+        yield av[2]
+    elif op == sre_constants.BRANCH:
+        yield from av[1]
+    elif op in (sre_constants.ASSERT, sre_constants.ASSERT_NOT):
+        yield av[1]
+    elif op == getattr(sre_constants, "ATOMIC_GROUP", None):
+        yield av
+    elif op == sre_constants.GROUPREF_EXISTS:
+        yield av[1]
+        if av[2] is not None:
+            yield av[2]
+
+
+def _case_fold(chars, ignorecase):
+    if not ignorecase:
+        return frozenset(chars)
+    return frozenset(c for ch in chars for c in (ch.lower(), ch.upper()))
+
+
+def _char_set(op, av, ignorecase):
+    """Return the probe characters a single-character node matches."""
+    if op == sre_constants.LITERAL:
+        return _case_fold(chr(av), ignorecase)
+    if op == sre_constants.NOT_LITERAL:
+        excluded = _case_fold(chr(av), ignorecase)
+        return frozenset(c for c in PROBE_CHARS if c not in excluded)
+    if op == sre_constants.ANY:
+        return frozenset(c for c in PROBE_CHARS if c != "\n")
+    if op == sre_constants.IN:
+        negate = False
+        chars = set()
+        for item_op, item_av in av:
+            if item_op == sre_constants.NEGATE:
+                negate = True
+            elif item_op == sre_constants.LITERAL:
+                chars.add(chr(item_av))
+            elif item_op == sre_constants.RANGE:
+                chars.update(c for c in PROBE_CHARS
+                             if item_av[0] <= ord(c) <= item_av[1])
+            elif item_op == sre_constants.CATEGORY:
+                cls = _CATEGORIES.get(item_av)
+                if cls:
+                    chars.update(c for c in PROBE_CHARS if re.match(cls, c))
+        chars = _case_fold(chars, ignorecase)
+        if negate:
+            return frozenset(c for c in PROBE_CHARS if c not in chars)
+        return chars
+    return frozenset()
+
+
+def _nullable(seq):
+    return all(_item_nullable(op, av) for op, av in seq)
+
+
+def _item_nullable(op, av):
+    if op in _ZERO_WIDTH or op == sre_constants.GROUPREF:
+        return True
+    if op in _REPEATS:
+        return av[0] == 0 or _nullable(av[2])
+    if op == sre_constants.BRANCH:
+        return any(_nullable(b) for b in av[1])
+    if op == sre_constants.SUBPATTERN:
+        return _nullable(_subpattern_body(av))
+    if op == getattr(sre_constants, "ATOMIC_GROUP", None):
+        return _nullable(av)
+    return False
+
+
+def _first_set(seq, ignorecase):
+    """Return the characters a sequence can start with."""
+    chars = set()
+    for op, av in seq:
+        chars |= _item_first(op, av, ignorecase)
+        if not _item_nullable(op, av):
+            break
+    return frozenset(chars)
+
+
+def _item_first(op, av, ignorecase):
+    if op in _SINGLE_CHAR:
+        return _char_set(op, av, ignorecase)
+    if op in _ZERO_WIDTH:
+        return frozenset()
+    if op == sre_constants.GROUPREF:
+        return frozenset(PROBE_CHARS)
+    chars = set()
+    for child in _children(op, av):
+        chars |= _first_set(child, ignorecase)
+    return frozenset(chars)
+
+
+def _is_unbounded(op, av):
+    return op in _REPEATS and av[1] == _UNBOUNDED
+
+
+def _describe(chars):
+    """Short printable description of a character set for reports."""
+    sample = "".join(sorted(chars))[:12]
+    return repr(sample) + ("..." if len(chars) > 12 else "")
+
+
+def _iter_sequences(seq):
+    """Yield every sequence of a parse tree, outermost first."""
+    yield seq
+    for op, av in seq:
+        for child in _children(op, av):
+            yield from _iter_sequences(child)
+
+
+def _contains_unbounded(seq):
+    for sub in _iter_sequences(seq):
+        for op, av in sub:
+            if _is_unbounded(op, av):
+                return True
+    return False
+
+
+def analyze(parsed, ignorecase):
+    """Statically flag quantifier shapes prone to heavy backtracking.
+
+    Returns:
+        (flags, hotspots) where flags is a list of
+        {"check", "severity", "detail"} dicts and hotspots maps the id of
+        a flagged repeat node to the characters that make it ambiguous,
+        used to build the adversarial inputs.
+    """
+    flags = []
+    hotspots = {}
+
+    def flag(check, severity, detail):
+        entry = {"check": check, "severity": severity, "detail": detail}
+        if entry not in flags:
+            flags.append(entry)
+
+    for seq in _iter_sequences(list(parsed)):
+        items = list(seq)
+        for i, (op, av) in enumerate(items):
+            if not _is_unbounded(op, av):
+                continue
+            body = list(av[2])
+            body_chars = _first_set(body, ignorecase)
+
+            # Nested quantifier: an unbounded repeat inside another one,
+            # where one iteration can end in several places.
+            for j, (inner_op, inner_av) in enumerate(body):
+                if _is_unbounded(inner_op, inner_av):
+                    inner_chars = _first_set(inner_av[2], ignorecase)
+                    rest = body[j + 1:]
+                    follow = set(_first_set(rest, ignorecase))
+                    if _nullable(rest):
+                        follow |= body_chars
+                    overlap = inner_chars & follow
+                    if overlap:
+                        flag("nested-quantifier", "high",
+                             "repeat inside a repeat can split %s several ways"
+                             % _describe(overlap))
+                        hotspots[id(av)] = overlap
+                elif any(_contains_unbounded(child)
+                         for child in _children(inner_op, inner_av)):
+                    flag("nested-quantifier", "high",
+                         "unbounded repeat nested inside an unbounded repeat")
+                    hotspots.setdefault(id(av), body_chars)
+
+            # Alternation under a quantifier with branches that start
+            # with the same characters.
+            branches = []
+            for b_op, b_av in body:
+                if b_op == sre_constants.BRANCH:
+                    branches = b_av[1]
+                elif b_op == sre_constants.SUBPATTERN:
+                    inner = list(_subpattern_body(b_av))
+                    if len(inner) == 1 and inner[0][0] == sre_constants.BRANCH:
+                        branches = inner[0][1][1]
+            seen = set()
+            for branch in branches:
+                first = _first_set(branch, ignorecase)
+                overlap = first & seen
+                if overlap:
+                    flag("ambiguous-alternation", "high",
+                         "quantified alternation branches overlap on %s"
+                         % _describe(overlap))
+                    hotspots.setdefault(id(av), overlap)
+                    break
+                seen |= first
+
+            # Adjacent unbounded repeats over overlapping characters.
+            for next_op, next_av in items[i + 1:]:
+                if _is_unbounded(next_op, next_av):
+                    overlap = body_chars & _first_set(next_av[2], ignorecase)
+                    if overlap:
+                        flag("overlapping-quantifiers", "medium",
+                             "adjacent repeats both match %s"
+                             % _describe(overlap))
+                        hotspots.setdefault(id(av), overlap)
+                    break
+                if not _item_nullable(next_op, next_av):
+                    break
+
+            # Unbounded wildcard followed by more pattern: on failure,
+            # every start position rescans to the end of the line.
+            if (len(body) == 1 and body[0][0] in (sre_constants.ANY,
+                                                  sre_constants.NOT_LITERAL)
+                    and not _nullable(items[i + 1:])):
+                flag("unbounded-wildcard", "low",
+                     "'.*' or '.+' followed by more pattern rescans each line")
+                hotspots.setdefault(id(av), body_chars)
+
+        for op, av in items:
+            if op in (sre_constants.ASSERT, sre_constants.ASSERT_NOT):
+                count = sum(len(b_av[1]) for sub in _iter_sequences(av[1])
+                            for b_op, b_av in sub
+                            if b_op == sre_constants.BRANCH)
+                if count > 8:
+                    flag("large-lookaround", "low",
+                         "lookaround with %d alternatives runs at every "
+                         "candidate position" % count)
+
+    return flags, hotspots
+
+
+# ---------------------------------------------------------------------------
+# Adversarial inputs
+# ---------------------------------------------------------------------------
+
+def _pick(chars, preferred="a e1-."):
+    """Pick a representative character, preferring common ones."""
+    for c in preferred:
+        if c in chars:
+            return c
+    return min(chars) if chars else "a"
+
+
+def _sample(seq, ignorecase):
+    """Return a short string matched by a parse tree sequence."""
+    out = []
+    for op, av in seq:
+        out.append(_sample_item(op, av, ignorecase))
+    return "".join(out)
+
+
+def _sample_item(op, av, ignorecase):
+    if op in _SINGLE_CHAR:
+        return _pick(_char_set(op, av, ignorecase))
+    if op in _REPEATS:
+        return _sample(av[2], ignorecase) * av[0]
+    if op == sre_constants.BRANCH:
+        return min((_sample(b, ignorecase) for b in av[1]), key=len)
+    if op == sre_constants.SUBPATTERN:
+        return _sample(_subpattern_body(av), ignorecase)
+    if op == getattr(sre_constants, "ATOMIC_GROUP", None):
+        return _sample(av, ignorecase)
+    if op == sre_constants.GROUPREF_EXISTS:
+        return _sample(av[1], ignorecase)
+    return ""
+
+
+def _prefix_to(seq, target, ignorecase):
+    """Return the text that leads the matcher up to a target repeat.
+
+    Returns None if the target is not in this sequence.
+    """
+    prefix = []
+    for op, av in seq:
+        if av is target:
+            return "".join(prefix)
+        for child in _children(op, av):
+            inner = _prefix_to(child, target, ignorecase)
+            if inner is not None:
+                return "".join(prefix) + inner
+        prefix.append(_sample_item(op, av, ignorecase))
+    return None
+
+
+def adversarial_inputs(parsed, hotspots, ignorecase):
+    """Build (prefix, pump, suffix) attacks for the unbounded repeats.
+
+    Each attack reaches one repeat with a sample of the pattern before
+    it, repeats a character the repeat accepts, and ends with a
+    character the repeat rejects, which forces the matcher to backtrack
+    through every way of splitting the pumped run. Flagged repeats come
+    first and pump one of their ambiguous characters.
+    """
+    repeats = []
+    for seq in _iter_sequences(list(parsed)):
+        for op, av in seq:
+            if _is_unbounded(op, av):
+                repeats.append(av)
+    repeats.sort(key=lambda av: id(av) not in hotspots)
+
+    attacks = []
+    for av in repeats:
+        body_chars = _first_set(av[2], ignorecase)
+        chars = hotspots.get(id(av)) or body_chars
+        if not chars:
+            continue
+        pump = _pick(chars)
+        suffix = next((c for c in "!\n\x00#" if c not in body_chars), "\x00")
+        prefix = _prefix_to(list(parsed), av, ignorecase) or ""
+        attack = (prefix, pump, suffix)
+        if attack not in attacks:
+            attacks.append(attack)
+        if len(attacks) == MAX_ATTACKS:
+            break
+    return attacks
+
+
+# ---------------------------------------------------------------------------
+# Timing
+# ---------------------------------------------------------------------------
+
+def _time_scan(regex, text, repeat=3):
+    """Return the best time in nanoseconds to find all matches in text.
+
+    Runs well above the noise floor are not repeated.
+    """
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter_ns()
+        for _ in regex.finditer(text):
+            pass
+        elapsed = time.perf_counter_ns() - start
+        best = elapsed if best is None else min(best, elapsed)
+        if best > 5 * NOISE_FLOOR_NS:
+            break
+    return best
+
+
+def _timer_main(conn, corpus):
+    """Child process loop: time each (pattern, attacks) job received."""
+    while True:
+        job = conn.recv()
+        if job is None:
+            return
+        pattern, attacks = job
+        regex = re.compile(pattern)
+        result = {"corpus_ns": _time_scan(regex, corpus), "attacks": []}
+        for prefix, pump, suffix in attacks:
+            times = [_time_scan(regex, prefix + pump * n + suffix)
+                     for n in ADVERSARIAL_LENGTHS]
+            result["attacks"].append(times)
+        conn.send(result)
+
+
+class PatternTimer(object):
+    """Time patterns in a child process that is killed on timeout.
+
+    Python cannot interrupt a running regex match, so a pattern with
+    catastrophic backtracking would otherwise hang the analysis.
+    """
+
+    def __init__(self, corpus):
+        self.corpus = corpus
+        self._start()
+
+    def _start(self):
+        self.conn, child = multiprocessing.Pipe()
+        self.process = multiprocessing.Process(
+            target=_timer_main, args=(child, self.corpus), daemon=True)
+        self.process.start()
+
+    def measure(self, pattern, attacks, timeout):
+        """Return the timings of a pattern, or None if it timed out."""
+        self.conn.send((pattern, attacks))
+        if self.conn.poll(timeout):
+            return self.conn.recv()
+        self.process.kill()
+        self.process.join()
+        self._start()
+        return None
+
+    def close(self):
+        self.conn.send(None)
+        self.process.join()
+
+
+def _growth(times):
+    """Estimate the exponent k of time ~ length**k from two timings."""
+    t1, t2 = times
+    if t2 < NOISE_FLOOR_NS or t1 <= 0:
+        return 1.0
+    ratio = ADVERSARIAL_LENGTHS[1] / ADVERSARIAL_LENGTHS[0]
+    return round(math.log(t2 / t1) / math.log(ratio), 2)
+
+
+def evaluate(record, timer, corpus_bytes, args):
+    """Analyze and time one pattern record, filling in its results."""
+    pattern, notes = python_pattern(record["pattern"])
+    record["flags"] = []
+    record["notes"] = notes
+    record["corpus_ns_per_byte"] = None
+    record["adversarial"] = None
+    record["timeout"] = False
+    record["score"] = 0.0
+    if pattern is None:
+        record["error"] = notes[0]
+        record["notes"] = []
+        return record
+    if pattern != record["pattern"]:
+        record["python_pattern"] = pattern
+
+    compiled = re.compile(pattern)
+    ignorecase = bool(compiled.flags & re.IGNORECASE)
+    parsed = sre_parse.parse(pattern, compiled.flags & ~re.UNICODE)
+    flags, hotspots = analyze(parsed, ignorecase)
+    record["flags"] = flags
+    attacks = adversarial_inputs(parsed, hotspots, ignorecase)
+
+    timings = timer.measure(pattern, attacks, args.timeout)
+    if timings is None:
+        record["timeout"] = True
+        record["score"] = None
+        return record
+
+    record["corpus_ns_per_byte"] = round(timings["corpus_ns"] / corpus_bytes, 2)
+    score = record["corpus_ns_per_byte"]
+    worst = None
+    for (prefix, pump, suffix), times in zip(attacks, timings["attacks"]):
+        length = len(prefix) + ADVERSARIAL_LENGTHS[-1] + len(suffix)
+        entry = {
+            "input": "%r + %r * n + %r" % (prefix[:40], pump, suffix),
+            "length": length,
+            "ns_per_byte": round(times[-1] / length, 2),
+            "growth": _growth(times),
+        }
+        if worst is None or (entry["growth"], entry["ns_per_byte"]) > (
+                worst["growth"], worst["ns_per_byte"]):
+            worst = entry
+    if worst:
+        record["adversarial"] = worst
+        score = max(score, worst["ns_per_byte"])
+    record["score"] = score
+    return record
+
+
+def over_threshold(record, args, margin=1.0):
+    """Check whether a pattern crosses one of the cost thresholds.
+
+    A margin below 1 lowers the thresholds proportionally. The baseline
+    is written with a margin of 0.5, so that patterns close to a limit
+    do not fail CI because of timing noise alone.
+    """
+    if record["timeout"]:
+        return True
+    max_score = args.max_ns_per_byte * margin
+    if record["score"] is not None and record["score"] > max_score:
+        return True
+    max_growth = 1.0 + (args.max_growth - 1.0) * margin
+    adversarial = record.get("adversarial")
+    return bool(adversarial and adversarial["growth"] > max_growth)
+
+
+def _rank_key(record):
+    adversarial = record.get("adversarial") or {}
+    return (not record["timeout"], -adversarial.get("growth", 0.0),
+            -(record["score"] or 0.0), record["key"])
+
+
+def load_baseline(path):
+    """Return the set of pattern keys accepted as expensive."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return set(json.load(f).get("patterns", []))
+    except FileNotFoundError:
+        return set()
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--style", action="append", choices=STYLES, metavar="NAME",
+        help="style to analyze (repeatable, default: all)",
+    )
+    parser.add_argument(
+        "--rule", action="append", metavar="NAME",
+        help="only analyze the named rule (repeatable)",
+    )
+    parser.add_argument(
+        "-o", "--output", metavar="FILE",
+        help="write the JSON report to FILE instead of standard output",
+    )
+    parser.add_argument(
+        "--baseline", default=DEFAULT_BASELINE, metavar="FILE",
+        help="patterns accepted as expensive (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--write-baseline", metavar="FILE",
+        help="write the patterns currently over half of a threshold to "
+             "FILE, to accept them as known",
+    )
+    parser.add_argument(
+        "--max-ns-per-byte", type=float, default=DEFAULT_MAX_NS_PER_BYTE,
+        metavar="NS",
+        help="cost threshold in nanoseconds per input byte, on the corpus "
+             "or an adversarial input (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--max-growth", type=float, default=DEFAULT_MAX_GROWTH, metavar="K",
+        help="threshold on the exponent k of time ~ length**k on "
+             "adversarial inputs (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--timeout", type=float, default=DEFAULT_TIMEOUT, metavar="SECONDS",
+        help="time limit per pattern, beyond which it counts as "
+             "catastrophic (default: %(default)s)",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    records = load_patterns(args.style or STYLES)
+    if args.rule:
+        records = [r for r in records if r["rule"] in args.rule]
+    corpus = load_corpus()
+    corpus_bytes = max(1, len(corpus.encode("utf-8")))
+    baseline = load_baseline(args.baseline)
+
+    print("Analyzing %d patterns against %d bytes of fixtures..." % (
+        len(records), corpus_bytes), file=sys.stderr)
+    timer = PatternTimer(corpus)
+    try:
+        for record in records:
+            evaluate(record, timer, corpus_bytes, args)
+            record["over_threshold"] = over_threshold(record, args)
+            record["baseline"] = record["key"] in baseline
+            if record["over_threshold"] and not record["baseline"]:
+                # Time new offenders a second time, so that a single
+                # noisy measurement does not fail the check.
+                evaluate(record, timer, corpus_bytes, args)
+                record["over_threshold"] = over_threshold(record, args)
+    finally:
+        timer.close()
+
+    records.sort(key=_rank_key)
+    new = [r for r in records if r["over_threshold"] and not r["baseline"]]
+    report = {
+        "corpus_bytes": corpus_bytes,
+        "python": sys.version.split()[0],
+        "thresholds": {
+            "max_ns_per_byte": args.max_ns_per_byte,
+            "max_growth": args.max_growth,
+            "timeout": args.timeout,
+        },
+        "summary": {
+            "patterns": len(records),
+            "flagged": sum(1 for r in records if r["flags"]),
+            "errors": sum(1 for r in records if r.get("error")),
+            "timeouts": sum(1 for r in records if r["timeout"]),
+            "over_threshold": sum(1 for r in records if r["over_threshold"]),
+            "new_over_threshold": len(new),
+        },
+        "patterns": records,
+    }
+
+    data = json.dumps(report, indent=2, ensure_ascii=False) + "\n"
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(data)
+    else:
+        sys.stdout.write(data)
+
+    if args.write_baseline:
+        keys = sorted(r["key"] for r in records
+                      if over_threshold(r, args, margin=0.5))
+        with open(args.write_baseline, "w", encoding="utf-8") as f:
+            f.write(json.dumps({"patterns": keys}, indent=2,
+                               ensure_ascii=False) + "\n")
+
+    summary = report["summary"]
+    print("%d patterns: %d flagged, %d over threshold (%d new), "
+          "%d timeouts, %d errors" % (
+              summary["patterns"], summary["flagged"],
+              summary["over_threshold"], summary["new_over_threshold"],
+              summary["timeouts"], summary["errors"]), file=sys.stderr)
+    for record in new:
+        print("  NEW: %s (score %s, %s)" % (
+            record["key"], record["score"],
+            ", ".join(f["check"] for f in record["flags"]) or "no static flags"),
+            file=sys.stderr)
+
+    return 1 if new and not args.write_baseline else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,455 @@
+#!/usr/bin/env python3
+# Copyright (c) 2024 Red Hat, Inc.
+# This program and the accompanying materials are made
+# available under the terms of the Eclipse Public License 2.0
+# which is available at https://www.eclipse.org/legal/epl-2.0/
+#
+# SPDX-License-Identifier: EPL-2.0
+"""Benchmark the throughput of the Vale rules over prose corpora.
+
+Runs the regexes of each rule, as rebuilt by tools/vale_patterns.py,
+over the .vale/fixtures corpus and over larger corpora, and reports the
+cost in nanoseconds per byte and the matches found per second for each
+rule and, with --per-regex, for each token or swap regex. A rule costs
+the combined regex Vale compiles for it, or the sum of its regexes when
+Vale runs them one at a time. Tengo scripts are not benchmarked.
+
+Synthetic corpora are seeded shuffles of the fixture paragraphs,
+generated one chunk at a time, so that a 1G corpus runs in constant
+memory. Existing files and directories can be benchmarked with --corpus.
+
+Each cost is also given relative to a reference regex timed right
+before each scan of the same text, which keeps results comparable
+across machines. Every scan is the best of five. The JSON output serves
+as a baseline: --compare measures the rules whose relative cost grew by
+more than --tolerance again, reports those still slower, and exits with
+status 1 if any are.
+
+Usage:
+    tools/benchmark-rules.py [--style NAME] [--rule NAME] [--size SIZE ...]
+                             [--corpus PATH ...] [--per-regex]
+                             [--output FILE] [--compare FILE]
+"""
+
+import argparse
+import json
+import os
+import random
+import re
+import sys
+import time
+
+from vale_patterns import (REPO_ROOT, STYLES, fixture_lines, load_patterns,
+                           python_pattern)
+
+DEFAULT_BASELINE = os.path.join(REPO_ROOT, "tools", "rule-benchmark-baseline.json")
+
+# Synthetic corpora measured when neither --size nor --corpus is given.
+DEFAULT_SIZES = ("1M",)
+
+SIZE_UNITS = {"K": 1 << 10, "M": 1 << 20, "G": 1 << 30}
+
+# Corpora are scanned in chunks of about this many bytes, cut at
+# paragraph or file boundaries.
+CHUNK_BYTES = 1 << 20
+
+# File types read from directories given with --corpus.
+CORPUS_EXTENSIONS = (".adoc", ".asciidoc", ".md", ".dita", ".xml")
+
+# A plain word search, timed next to every regex to normalize the costs.
+REFERENCE_PATTERN = r"(?im)\b(?:the)\b"
+
+# Every scan is repeated this many times, and the best time is kept.
+REPEAT = 5
+
+# Rules cheaper than the reference regex are not compared, as their
+# relative cost is mostly timing noise.
+MIN_COMPARED_RELATIVE = 1.0
+DEFAULT_TOLERANCE = 0.5
+
+
+# ---------------------------------------------------------------------------
+# Corpora
+# ---------------------------------------------------------------------------
+
+def parse_size(text):
+    """Parse a corpus size such as 512K, 64M or 1G into bytes."""
+    m = re.match(r"^(\d+)([KMG]?)B?$", text.strip().upper())
+    if not m or int(m.group(1)) == 0:
+        raise argparse.ArgumentTypeError("invalid size: %r" % text)
+    return int(m.group(1)) * SIZE_UNITS.get(m.group(2), 1)
+
+
+def size_label(size):
+    """Return the shortest label for a size in bytes, such as 64M."""
+    for unit in ("G", "M", "K"):
+        if size % SIZE_UNITS[unit] == 0:
+            return "%d%s" % (size // SIZE_UNITS[unit], unit)
+    return str(size)
+
+
+def fixture_paragraphs():
+    """Return the fixture text as a list of paragraphs.
+
+    A paragraph is a run of non-blank lines, so listings and tables
+    stay in one piece when paragraphs are recombined.
+    """
+    paragraphs = []
+    current = []
+    for line in fixture_lines():
+        if line.strip():
+            current.append(line)
+        elif current:
+            paragraphs.append("\n".join(current) + "\n\n")
+            current = []
+    if current:
+        paragraphs.append("\n".join(current) + "\n\n")
+    return paragraphs
+
+
+def fixture_chunks():
+    """Yield the whole fixture corpus as a single chunk."""
+    yield "".join(fixture_paragraphs())
+
+
+def synthetic_chunks(size, seed):
+    """Yield chunks of fixture paragraphs drawn at random up to size bytes.
+
+    The same seed always yields the same text.
+    """
+    paragraphs = fixture_paragraphs()
+    lengths = [len(p.encode("utf-8")) for p in paragraphs]
+    rng = random.Random(seed)
+    remaining = size
+    while remaining > 0:
+        parts = []
+        chunk_bytes = 0
+        while chunk_bytes < CHUNK_BYTES and chunk_bytes < remaining:
+            i = rng.randrange(len(paragraphs))
+            parts.append(paragraphs[i])
+            chunk_bytes += lengths[i]
+        remaining -= chunk_bytes
+        yield "".join(parts)
+
+
+def _corpus_files(paths):
+    for path in paths:
+        if os.path.isdir(path):
+            for dirpath, dirnames, filenames in os.walk(path):
+                dirnames.sort()
+                for filename in sorted(filenames):
+                    if filename.lower().endswith(CORPUS_EXTENSIONS):
+                        yield os.path.join(dirpath, filename)
+        else:
+            yield path
+
+
+def file_chunks(paths):
+    """Yield the contents of files and directories in chunks."""
+    parts = []
+    chunk_bytes = 0
+    for path in _corpus_files(paths):
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            text = f.read()
+        parts.append(text if text.endswith("\n") else text + "\n")
+        chunk_bytes += len(text)
+        if chunk_bytes >= CHUNK_BYTES:
+            yield "".join(parts)
+            parts = []
+            chunk_bytes = 0
+    if parts:
+        yield "".join(parts)
+
+
+# ---------------------------------------------------------------------------
+# Measuring
+# ---------------------------------------------------------------------------
+
+def rule_regexes(records, per_regex):
+    """Group pattern records into the regexes to time.
+
+    Returns:
+        (regexes, rules) where regexes maps each key to a compiled
+        regex, and rules maps each Style.Rule name to the keys of the
+        regexes Vale runs for it.
+    """
+    regexes = {}
+    rules = {}
+    by_rule = {}
+    for record in records:
+        name = "%s.%s" % (record["style"], record["rule"])
+        by_rule.setdefault(name, []).append(record)
+
+    for name, rule_records in by_rule.items():
+        combined = [r for r in rule_records if r["kind"] == "rule"]
+        executed = combined or rule_records
+        executed_keys = set(r["key"] for r in executed)
+        timed = rule_records if per_regex else executed
+        keys = []
+        for record in timed:
+            pattern, notes = python_pattern(record["pattern"])
+            if pattern is None:
+                print("Skipping %s: %s" % (record["key"], notes[0]),
+                      file=sys.stderr)
+                continue
+            regexes[record["key"]] = re.compile(pattern)
+            if record["key"] in executed_keys:
+                keys.append(record["key"])
+        if keys:
+            rules[name] = keys
+    return regexes, rules
+
+
+def _scan(regex, text):
+    """Return (nanoseconds, match count) for one scan of text."""
+    count = 0
+    start = time.perf_counter_ns()
+    for _ in regex.finditer(text):
+        count += 1
+    return time.perf_counter_ns() - start, count
+
+
+def _scan_with_reference(regex, reference, text):
+    """Time regex and the reference regex side by side over text.
+
+    Each of the REPEAT rounds times the reference right before the
+    regex, so that a slow spell of the machine affects both, and the
+    best time of each is kept.
+
+    Returns:
+        (regex nanoseconds, reference nanoseconds, match count)
+    """
+    best = best_reference = None
+    for _ in range(REPEAT):
+        reference_ns = _scan(reference, text)[0]
+        ns, matches = _scan(regex, text)
+        best = ns if best is None else min(best, ns)
+        best_reference = (reference_ns if best_reference is None
+                          else min(best_reference, reference_ns))
+    return best, best_reference, matches
+
+
+def measure_corpus(chunks, regexes):
+    """Time every regex, next to the reference regex, over every chunk.
+
+    Returns:
+        (corpus bytes, best reference nanoseconds, dict of key to
+        [nanoseconds, matches, reference nanoseconds])
+    """
+    reference = re.compile(REFERENCE_PATTERN)
+    totals = {key: [0, 0, 0] for key in regexes}
+    corpus_bytes = 0
+    reference_ns = 0
+    for chunk in chunks:
+        corpus_bytes += len(chunk.encode("utf-8"))
+        chunk_reference_ns = None
+        for key, regex in regexes.items():
+            ns, key_reference_ns, matches = _scan_with_reference(
+                regex, reference, chunk)
+            totals[key][0] += ns
+            totals[key][1] += matches
+            totals[key][2] += key_reference_ns
+            chunk_reference_ns = (key_reference_ns if chunk_reference_ns is None
+                                  else min(chunk_reference_ns, key_reference_ns))
+        reference_ns += chunk_reference_ns or 0
+    return corpus_bytes, reference_ns, totals
+
+
+def measure(corpora, regexes, rules, per_regex=False):
+    """Measure the rules over each corpus.
+
+    The cost of a rule is relative to the reference times taken next
+    to its own regexes.
+
+    Args:
+        corpora: List of (corpus name, function returning its chunks).
+        regexes: Dict of key to compiled regex.
+        rules: Dict of rule name to the keys of its regexes.
+        per_regex: If True, also return the result of each regex.
+
+    Returns:
+        (dict of corpus to its size and reference cost, dict of rule to
+        corpus to result, dict of key to corpus to result)
+    """
+    corpus_results = {}
+    rule_results = {name: {} for name in rules}
+    regex_results = {key: {} for key in regexes} if per_regex else {}
+    for corpus, chunks in corpora:
+        start = time.monotonic()
+        corpus_bytes, reference_ns, totals = measure_corpus(chunks(), regexes)
+        corpus_results[corpus] = {
+            "bytes": corpus_bytes,
+            "reference_ns_per_byte": round(
+                reference_ns / max(1, corpus_bytes), 2),
+        }
+        for name, keys in rules.items():
+            ns = sum(totals[key][0] for key in keys)
+            matches = sum(totals[key][1] for key in keys)
+            rule_reference_ns = sum(totals[key][2] for key in keys) / len(keys)
+            rule_results[name][corpus] = _result(
+                ns, matches, corpus_bytes, rule_reference_ns)
+        if per_regex:
+            for key, (ns, matches, key_reference_ns) in totals.items():
+                regex_results[key][corpus] = _result(
+                    ns, matches, corpus_bytes, key_reference_ns)
+        print("Benchmarked %d rules over %s (%d bytes) in %.1fs" % (
+            len(rules), corpus, corpus_bytes, time.monotonic() - start),
+            file=sys.stderr)
+    return corpus_results, rule_results, regex_results
+
+
+def _result(ns, matches, corpus_bytes, reference_ns):
+    return {
+        "ns_per_byte": round(ns / max(1, corpus_bytes), 2),
+        "relative": round(ns / max(1, reference_ns), 3),
+        "matches": matches,
+        "matches_per_s": round(matches * 1e9 / ns, 1) if ns else 0.0,
+    }
+
+
+# ---------------------------------------------------------------------------
+# Baselines
+# ---------------------------------------------------------------------------
+
+def compare(report, baseline, tolerance):
+    """Return the rules whose relative cost grew beyond the tolerance.
+
+    Returns:
+        List of (rule, corpus, old relative cost, new relative cost).
+    """
+    regressions = []
+    for rule, corpora in sorted(report["rules"].items()):
+        old_corpora = baseline.get("rules", {}).get(rule, {})
+        for corpus, result in sorted(corpora.items()):
+            old = old_corpora.get(corpus)
+            if old is None or result["relative"] < MIN_COMPARED_RELATIVE:
+                continue
+            if result["relative"] > old["relative"] * (1 + tolerance):
+                regressions.append(
+                    (rule, corpus, old["relative"], result["relative"]))
+    return regressions
+
+
+def confirm(regressions, baseline, tolerance, corpora, regexes, rules):
+    """Measure the slower rules again and keep those still slower.
+
+    One slow spell of the machine during a long run can make any rule
+    look slower, so a rule is only reported when a second measurement
+    also exceeds the tolerance.
+
+    Returns:
+        List of (rule, corpus, old relative cost, new relative cost),
+        with the costs of the second measurement.
+    """
+    flagged = set((rule, corpus) for rule, corpus, _, _ in regressions)
+    print("Measuring %d slower rules again..." % len(flagged), file=sys.stderr)
+    again = {name: keys for name, keys in rules.items()
+             if any(name == rule for rule, _ in flagged)}
+    _, rule_results, _ = measure(
+        [c for c in corpora if any(c[0] == corpus for _, corpus in flagged)],
+        {key: regexes[key] for keys in again.values() for key in keys},
+        again)
+    return [r for r in compare({"rules": rule_results}, baseline, tolerance)
+            if r[:2] in flagged]
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--style", action="append", choices=STYLES, metavar="NAME",
+        help="style to benchmark (repeatable, default: all)",
+    )
+    parser.add_argument(
+        "--rule", action="append", metavar="NAME",
+        help="only benchmark the named rule (repeatable)",
+    )
+    parser.add_argument(
+        "--size", action="append", type=parse_size, metavar="SIZE",
+        help="also benchmark a synthetic corpus of SIZE bytes, with an "
+             "optional K, M or G suffix (repeatable, default: %s unless "
+             "--corpus is given)" % ", ".join(DEFAULT_SIZES),
+    )
+    parser.add_argument(
+        "--seed", type=int, default=0,
+        help="seed of the synthetic corpora (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--corpus", action="append", metavar="PATH",
+        help="also benchmark the files below PATH as one corpus "
+             "(repeatable)",
+    )
+    parser.add_argument(
+        "--per-regex", action="store_true",
+        help="also report each token and swap regex separately",
+    )
+    parser.add_argument(
+        "-o", "--output", metavar="FILE",
+        help="write the JSON results to FILE instead of standard output",
+    )
+    parser.add_argument(
+        "--compare", nargs="?", const=DEFAULT_BASELINE, metavar="FILE",
+        help="compare the results with a baseline (default: %s)" % (
+            os.path.relpath(DEFAULT_BASELINE, REPO_ROOT)),
+    )
+    parser.add_argument(
+        "--tolerance", type=float, default=DEFAULT_TOLERANCE,
+        metavar="RATIO",
+        help="relative cost increase reported as a regression "
+             "(default: %(default)s)",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    records = load_patterns(args.style or STYLES)
+    if args.rule:
+        records = [r for r in records if r["rule"] in args.rule]
+    regexes, rules = rule_regexes(records, args.per_regex)
+
+    corpora = [("fixtures", fixture_chunks)]
+    sizes = args.size
+    if sizes is None and not args.corpus:
+        sizes = [parse_size(s) for s in DEFAULT_SIZES]
+    for size in sizes or []:
+        corpora.append(("synthetic-%s" % size_label(size),
+                        lambda size=size: synthetic_chunks(size, args.seed)))
+    for path in args.corpus or []:
+        corpora.append((path, lambda path=path: file_chunks([path])))
+
+    report = {
+        "python": sys.version.split()[0],
+        "seed": args.seed,
+        "reference": REFERENCE_PATTERN,
+    }
+    report["corpora"], report["rules"], regex_results = measure(
+        corpora, regexes, rules, args.per_regex)
+    if args.per_regex:
+        report["regexes"] = regex_results
+
+    data = json.dumps(report, indent=2, sort_keys=True,
+                      ensure_ascii=False) + "\n"
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(data)
+    else:
+        sys.stdout.write(data)
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.tolerance)
+        if regressions:
+            regressions = confirm(regressions, baseline, args.tolerance,
+                                  corpora, regexes, rules)
+        for rule, corpus, old, new in regressions:
+            print("  SLOWER: %s on %s: %.3f -> %.3f times the reference" % (
+                rule, corpus, old, new), file=sys.stderr)
+        print("%d rules slower than %s" % (len(regressions), args.compare),
+              file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -9,15 +9,46 @@
 #
 # Builds en_US-RedHat.dic from wordlist.txt.
 #
-# Usage: tools/build-dictionary.py [wordlist] [output.dic]
+# Usage: tools/build-dictionary.py [wordlist ...] [-o output.dic]
 #
 # The wordlist is a plain text file with one word per line.
 # No hunspell flags needed — the script detects plural forms
 # automatically and generates the appropriate /S, /P, /SP flags.
 # Lowercase words automatically get a Title Case counterpart.
-
+#
+# Several wordlists, such as the shared list and per-product lists,
+# are merged into one dictionary. Plural detection uses an index of
+# words by lowercase form, and entries are sorted in bounded runs
+# that are merged from temporary files, so the build stays linear
+# in memory and fast for wordlists of several hundred thousand terms.
+
+import argparse
+import heapq
 import os
+import shutil
 import sys
+import tempfile
+
+from hunspell_dictionary import expand, expand_entry, parse_aff, parse_entry
+
+# Entries sorted in memory before the sort spills to temporary files.
+DEFAULT_RUN_SIZE = 1000000
+
+# Affix classes written by --minimize follow this line in the .aff file.
+MINIMIZE_MARKER = "# Classes below are generated by tools/build-dictionary.py --minimize"
+
+# Flag of the prefix that turns a Title Case entry into its lowercase
+# form, and flags available for the suffix classes found by --minimize.
+CASE_FLAG = "L"
+MINIMIZE_FLAGS = "ABCDEFGHIJKMNOQRTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789"
+
+# Longest ending and longest stripped part of a discovered suffix rule,
+# shortest stem they leave, and the number of words a suffix class must
+# fold to get a flag.
+MAX_AFFIX = 5
+MAX_STRIP = 2
+MIN_STEM = 3
+MIN_CLASS_USES = 3
 
 
 def pluralize(word):
@@ -66,6 +97,9 @@ def title_case(word):
 def detect_base_form(word, all_words_lower):
     """Check if a word is a plural form of another word in the set.
 
+    all_words_lower is any container of lowercase words, such as the
+    index built by index_by_lower().
+
     Returns the base form if found, None otherwise.
     """
     w = word.lower()
@@ -96,46 +130,55 @@ def detect_base_form(word, all_words_lower):
     return None
 
 
-def main():
-    repo_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-    dict_dir = os.path.join(repo_root, ".vale", "styles", "RedHat", "dictionaries")
-
-    wordlist_path = sys.argv[1] if len(sys.argv) > 1 else os.path.join(dict_dir, "wordlist.txt")
-    dic_path = sys.argv[2] if len(sys.argv) > 2 else os.path.join(dict_dir, "en_US-RedHat.dic")
-
-    if not os.path.isfile(wordlist_path):
-        print(f"Error: wordlist not found: {wordlist_path}", file=sys.stderr)
-        sys.exit(1)
+def read_wordlists(paths):
+    """Return the set of words in one or more wordlist files.
 
-    # Read and clean wordlist
+    Blank lines and lines starting with '#' are ignored. Words listed in
+    several files are kept once.
+    """
     words = set()
-    with open(wordlist_path) as f:
-        for line in f:
-            line = line.strip()
-            if not line or line.startswith("#"):
-                continue
-            words.add(line)
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line or line.startswith("#"):
+                    continue
+                words.add(line)
+    return words
+
+
+def index_by_lower(words):
+    """Map each lowercase word to the original-case words it comes from."""
+    index = {}
+    for word in words:
+        index.setdefault(word.lower(), []).append(word)
+    return index
 
-    # Build lowercase lookup for plural detection
-    words_lower = {w.lower() for w in words}
 
-    # Detect plurals: find words that are plural forms of other words
-    plural_bases = {}  # base_lower -> set of original-case base forms
-    plural_forms = set()  # words identified as plurals (to exclude)
+def find_plurals(words, index):
+    """Find the words that are plural forms of other words in the set.
 
-    for word in sorted(words):
-        base = detect_base_form(word, words_lower)
+    Returns:
+        (plural_bases, plural_forms) where plural_bases maps each
+        original-case base form to its plurals, and plural_forms is the
+        set of words covered by a base form with the S flag.
+    """
+    plural_bases = {}
+    plural_forms = set()
+    for word in words:
+        base = detect_base_form(word, index)
         if base:
-            # Find the original-case version of the base
-            base_originals = [w for w in words if w.lower() == base]
-            if base_originals:
-                for bo in base_originals:
-                    plural_bases.setdefault(bo, set()).add(word)
-                plural_forms.add(word)
+            for original in index[base]:
+                plural_bases.setdefault(original, set()).add(word)
+            plural_forms.add(word)
+    return plural_bases, plural_forms
+
 
-    # Build output entries
-    entries = set()
+def iter_entries(words, plural_bases, plural_forms):
+    """Yield the dictionary entries for the words, in no particular order.
 
+    The same entry can be yielded more than once.
+    """
     for word in words:
         if word in plural_forms:
             # Skip — will be covered by base/S
@@ -157,27 +200,362 @@ def main():
         else:
             flag_str = ""
 
-        entries.add(f"{word}{flag_str}")
+        yield f"{word}{flag_str}"
 
         # Auto-generate Title Case for lowercase-starting words
         if word[0].islower():
             titled = title_case(word)
             # Title case version gets P (possessive) since it's capitalized
             if "S" in flags:
-                entries.add(f"{titled}/SP")
+                yield f"{titled}/SP"
             else:
-                entries.add(f"{titled}/P")
+                yield f"{titled}/P"
 
-    # Sort with C locale ordering (uppercase before lowercase)
-    sorted_entries = sorted(entries, key=lambda x: x.encode("utf-8"))
 
-    # Write output
-    with open(dic_path, "w") as f:
-        f.write(f"{len(sorted_entries)}\n")
-        for entry in sorted_entries:
-            f.write(f"{entry}\n")
+def _line_key(line):
+    return line.rstrip(b"\n")
+
+
+def _write_run(entries, tmp_dir):
+    run = tempfile.TemporaryFile(dir=tmp_dir)
+    for entry in sorted(entries):
+        run.write(entry + b"\n")
+    run.seek(0)
+    return run
+
+
+def sorted_unique(entries, run_size=DEFAULT_RUN_SIZE, tmp_dir=None):
+    """Yield unique entries in C locale order (uppercase before lowercase).
+
+    Entries are sorted in memory in runs of up to run_size. When there is
+    more than one run, the runs are written to temporary files and merged,
+    so memory use does not grow with the number of entries.
+    """
+    runs = []
+    buffer = set()
+    try:
+        for entry in entries:
+            buffer.add(entry.encode("utf-8"))
+            if len(buffer) >= run_size:
+                runs.append(_write_run(buffer, tmp_dir))
+                buffer = set()
+
+        if not runs:
+            for entry in sorted(buffer):
+                yield entry.decode("utf-8")
+            return
+
+        if buffer:
+            runs.append(_write_run(buffer, tmp_dir))
+            buffer = set()
+        previous = None
+        for line in heapq.merge(*runs, key=_line_key):
+            entry = _line_key(line)
+            if entry != previous:
+                yield entry.decode("utf-8")
+                previous = entry
+    finally:
+        for run in runs:
+            run.close()
+
+
+def write_dic(dic_path, entries):
+    """Write a Hunspell .dic file from sorted entries and return the count.
+
+    The entries are streamed to a temporary file first, since the count
+    on the first line is only known at the end.
+    """
+    count = 0
+    with tempfile.TemporaryFile("w+", encoding="utf-8",
+                                dir=os.path.dirname(os.path.abspath(dic_path))) as body:
+        for entry in entries:
+            body.write(f"{entry}\n")
+            count += 1
+        body.seek(0)
+        with open(dic_path, "w", encoding="utf-8") as f:
+            f.write(f"{count}\n")
+            shutil.copyfileobj(body, f)
+    return count
+
+
+# ---------------------------------------------------------------------------
+# Affix compression (--minimize)
+# ---------------------------------------------------------------------------
+
+def format_entry(word, flags):
+    order = "SP" + CASE_FLAG
+    flags = sorted(flags, key=lambda f: (order.index(f) if f in order else len(order), f))
+    return word + ("/" + "".join(flags) if flags else "")
+
+
+def _fold_case_twins(flags_by_word):
+    """Replace lowercase words by the case prefix on their Title Case twin.
+
+    Returns:
+        dict of uppercase letter -> lowercase letter for the prefix rules.
+    """
+    letters = {}
+    for word in sorted(flags_by_word):
+        flags = flags_by_word.get(word)
+        if flags is None:
+            continue
+        first = word[0]
+        lower = first.lower()
+        if (lower == first or len(lower) != 1 or lower.upper() != first
+                or "P" not in flags or len(word) < 2):
+            continue
+        twin = lower + word[1:]
+        if flags_by_word.get(twin) != flags & {"S"}:
+            continue
+        del flags_by_word[twin]
+        flags.add(CASE_FLAG)
+        letters[first] = lower
+    return letters
+
+
+def _fold_signatures(word, flags, flags_by_word, by_stem, classes):
+    """Yield (root, signature) for each way a word can be folded into a root.
+
+    A signature is (strip, affix, cross, possessive affix or None).
+    """
+    if not flags <= {"P", CASE_FLAG}:
+        return
+    possessive = None
+    if "P" in flags:
+        forms = expand_entry(word, "P", classes) - {word}
+        if len(forms) != 1:
+            return
+        possessive = forms.pop()
+    cross = CASE_FLAG in flags
+    for affix_len in range(1, MAX_AFFIX + 1):
+        stem = word[:-affix_len]
+        if len(stem) < MIN_STEM:
+            break
+        affix = word[-affix_len:]
+        for strip_len in range(MAX_STRIP + 1):
+            for root in by_stem[strip_len].get(stem, ()):
+                root_flags = flags_by_word.get(root)
+                if root == word or root_flags is None:
+                    continue
+                if cross and CASE_FLAG not in root_flags:
+                    continue
+                yield root, (root[len(stem):], affix, cross,
+                             possessive[len(stem):] if possessive else None)
+
+
+def minimize(entries, classes):
+    """Fold dictionary entries into affix classes.
+
+    Lowercase words become a case prefix on their Title Case twin, and
+    words that are a root plus a frequent ending become suffix classes
+    on the root. Each new suffix class has a single rule, and a word is
+    only folded when its root regenerates exactly the forms it had, so
+    the accepted word set does not change.
+
+    Args:
+        entries: (word, flags) tuples built with the S and P classes.
+        classes: affix classes of the base .aff file.
+
+    Returns:
+        (entries, aff_text) where aff_text defines the new classes.
+    """
+    flags_by_word = {}
+    for word, flags in entries:
+        flags_by_word.setdefault(word, set()).update(flags)
+    letters = _fold_case_twins(flags_by_word)
+
+    by_stem = [dict() for _ in range(MAX_STRIP + 1)]
+    for root in flags_by_word:
+        for strip_len in range(MAX_STRIP + 1):
+            by_stem[strip_len].setdefault(
+                root[:len(root) - strip_len], []).append(root)
+
+    candidates = {}
+    counts = {}
+    for word in sorted(flags_by_word):
+        found = list(_fold_signatures(word, flags_by_word[word],
+                                      flags_by_word, by_stem, classes))
+        if found:
+            candidates[word] = found
+            for _, signature in set(found):
+                counts[signature] = counts.get(signature, 0) + 1
+
+    free = iter(f for f in MINIMIZE_FLAGS if f not in classes and f != CASE_FLAG)
+    suffix_flags = {}
+    ranked = sorted(counts, key=lambda s: (-counts[s], s[:2], s[2], s[3] or ""))
+    for strip, affix, cross, possessive in ranked:
+        if counts[(strip, affix, cross, possessive)] < MIN_CLASS_USES:
+            break
+        needed = [(strip, affix, cross)]
+        if possessive:
+            needed.append((strip, possessive, False))
+        missing = [k for k in needed if k not in suffix_flags]
+        flags = [next(free, None) for _ in missing]
+        if None in flags:
+            break
+        suffix_flags.update(zip(missing, flags))
+
+    roots = set()
+    folded = 0
+    for word in sorted(candidates, key=lambda w: (-len(w), w)):
+        if word in roots:
+            continue
+        best = None
+        for root, (strip, affix, cross, possessive) in candidates[word]:
+            if root not in flags_by_word or (strip, affix, cross) not in suffix_flags:
+                continue
+            if possessive and (strip, possessive, False) not in suffix_flags:
+                continue
+            count = counts[(strip, affix, cross, possessive)]
+            if best is None or count > best[0]:
+                best = (count, root, strip, affix, cross, possessive)
+        if best is None:
+            continue
+        _, root, strip, affix, cross, possessive = best
+        flags_by_word[root].add(suffix_flags[(strip, affix, cross)])
+        if possessive:
+            flags_by_word[root].add(suffix_flags[(strip, possessive, False)])
+        del flags_by_word[word]
+        roots.add(root)
+        folded += 1
+
+    used = set(f for flags in flags_by_word.values() for f in flags)
+    lines = [MINIMIZE_MARKER, ""]
+    if letters:
+        lines.append("# Title case prefix flag: the entry with a lowercase first letter")
+        lines.append(f"PFX {CASE_FLAG} Y {len(letters)}")
+        for upper, lower in sorted(letters.items()):
+            lines.append(f"PFX {CASE_FLAG} {upper} {lower} {upper}")
+        lines.append("")
+    for (strip, affix, cross), flag in sorted(suffix_flags.items(),
+                                              key=lambda item: item[1]):
+        if flag not in used:
+            continue
+        lines.append(f"SFX {flag} {'Y' if cross else 'N'} 1")
+        lines.append(f"SFX {flag} {strip or '0'} {affix} {strip or '.'}")
+    new_entries = [(word, "".join(sorted(flags)))
+                   for word, flags in flags_by_word.items()]
+    return new_entries, "\n".join(lines).rstrip() + "\n"
+
+
+def read_base_aff(path):
+    """Return the text of an .aff file without previously generated classes."""
+    with open(path, encoding="utf-8") as f:
+        text = f.read()
+    return text.split(MINIMIZE_MARKER, 1)[0].rstrip() + "\n"
+
+
+def build_minimized(entries, base_aff_text):
+    """Minimize the entries and prove the result accepts the same words.
+
+    Returns:
+        (entries, aff_text, word count)
+
+    Raises:
+        ValueError if the minimized dictionary accepts a different set
+        of words. This would be a bug in minimize().
+    """
+    base_classes = parse_aff(base_aff_text)
+    new_entries, generated = minimize(entries, base_classes)
+    aff_text = base_aff_text + "\n" + generated
+    original = expand(entries, base_classes)
+    minimized = expand(new_entries, parse_aff(aff_text))
+    if original != minimized:
+        missing = sorted(original - minimized)[:5]
+        extra = sorted(minimized - original)[:5]
+        raise ValueError(f"minimized dictionary differs: missing {missing}, extra {extra}")
+    return new_entries, aff_text, len(original)
+
+
+def parse_args(argv=None):
+    repo_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    dict_dir = os.path.join(repo_root, ".vale", "styles", "RedHat", "dictionaries")
 
-    print(f"Generated {len(sorted_entries)} entries in {dic_path}")
+    parser = argparse.ArgumentParser(
+        description="Build en_US-RedHat.dic from one or more wordlists.")
+    parser.add_argument(
+        "wordlists", nargs="*", metavar="WORDLIST",
+        help="wordlist files to merge, for example the shared wordlist "
+             "and per-product lists (default: wordlist.txt)")
+    parser.add_argument(
+        "-o", "--output", metavar="DIC",
+        help="dictionary file to write (default: en_US-RedHat.dic)")
+    parser.add_argument(
+        "--run-size", type=int, default=DEFAULT_RUN_SIZE, metavar="N",
+        help="entries sorted in memory before spilling to temporary "
+             "files (default: %(default)s)")
+    parser.add_argument(
+        "--tmp-dir", metavar="DIR",
+        help="directory for the temporary sort files")
+    parser.add_argument(
+        "--minimize", action="store_true",
+        help="fold case twins and inflected forms into affix classes, "
+             "and write a matching .aff file")
+    parser.add_argument(
+        "--aff", metavar="AFF",
+        help="affix file written by --minimize (default: the output "
+             "file with an .aff extension)")
+    args = parser.parse_args(argv)
+
+    # Compatibility with the former "wordlist [output.dic]" usage.
+    if not args.output and len(args.wordlists) > 1 and args.wordlists[-1].endswith(".dic"):
+        args.output = args.wordlists.pop()
+    if args.minimize and not args.output:
+        parser.error("--minimize requires -o, to keep the committed dictionary "
+                     "the plain build")
+    if not args.wordlists:
+        args.wordlists = [os.path.join(dict_dir, "wordlist.txt")]
+    if not args.output:
+        args.output = os.path.join(dict_dir, "en_US-RedHat.dic")
+    if not args.aff:
+        args.aff = os.path.splitext(args.output)[0] + ".aff"
+    args.base_aff = os.path.join(dict_dir, "en_US-RedHat.aff")
+    if args.minimize:
+        committed = (os.path.abspath(os.path.join(dict_dir, "en_US-RedHat.dic")),
+                     os.path.abspath(args.base_aff))
+        for path in (args.output, args.aff):
+            if os.path.abspath(path) in committed:
+                parser.error(f"--minimize would overwrite {path}")
+    if args.run_size < 1:
+        parser.error("--run-size must be at least 1")
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    for wordlist_path in args.wordlists:
+        if not os.path.isfile(wordlist_path):
+            print(f"Error: wordlist not found: {wordlist_path}", file=sys.stderr)
+            sys.exit(1)
+
+    words = read_wordlists(args.wordlists)
+
+    # Index original-case words by lowercase form for plural detection
+    index = index_by_lower(words)
+    plural_bases, plural_forms = find_plurals(words, index)
+
+    entries = iter_entries(words, plural_bases, plural_forms)
+    if args.minimize:
+        entries = [parse_entry(e) for e in
+                   sorted_unique(entries, args.run_size, args.tmp_dir)]
+        full_count = len(entries)
+        try:
+            entries, aff_text, word_count = build_minimized(
+                entries, read_base_aff(args.base_aff))
+        except ValueError as e:
+            print(f"Error: {e}", file=sys.stderr)
+            sys.exit(1)
+        with open(args.aff, "w", encoding="utf-8") as f:
+            f.write(aff_text)
+        entries = (format_entry(word, flags) for word, flags in entries)
+
+    count = write_dic(args.output, sorted_unique(entries, args.run_size, args.tmp_dir))
+
+    print(f"Generated {count} entries in {args.output}")
+    if args.minimize:
+        print(f"  Minimized from {full_count} entries with the affix classes in {args.aff}; "
+              f"both accept the same {word_count} words")
     if plural_bases:
         plural_count = sum(len(v) for v in plural_bases.values())
         print(f"  Consolidated {plural_count} plural forms into {len(plural_bases)} base entries with /S flag")
@@ -0,0 +1,359 @@
+#!/usr/bin/env python3
+# Copyright (c) 2024 Red Hat, Inc.
+# This program and the accompanying materials are made
+# available under the terms of the Eclipse Public License 2.0
+# which is available at https://www.eclipse.org/legal/epl-2.0/
+#
+# SPDX-License-Identifier: EPL-2.0
+"""Compare the alerts of a rule before and after changes to the styles.
+
+Runs Vale once per side with JSON output, restricted to the rule under
+test: the baseline side uses the styles of --base-ref, extracted with
+git archive, and the candidate side uses the working tree. Results are
+cached by (styles tree hash, corpus commit and local changes, rule
+name), so re-testing a tweak to a rule only lints the candidate side,
+and re-running without changes lints nothing. Per-match and per-file
+deltas are computed from the parsed results.
+
+Usage:
+    tools/compare-errors.py [--base-ref REF] [--work-dir DIR]
+                            [--cache-dir DIR] [--no-cache]
+                            RULE REPO
+
+REPO is a Git URL, cloned shallow into the work directory, or a local
+checkout. Example:
+    tools/compare-errors.py Spelling https://github.com/openshift/openshift-docs
+"""
+
+import argparse
+import hashlib
+import io
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tarfile
+import tempfile
+
+from vale_cache import VALE_CONFIG, tree_hash
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STYLES_PATH = ".vale/styles"
+DEFAULT_WORK_DIR = "/tmp/vale-comparison"
+DEFAULT_CACHE_DIR = os.path.join(
+    os.path.expanduser("~"), ".cache", "vale-at-red-hat", "compare")
+
+# Bump when the cached result layout changes.
+CACHE_VERSION = 1
+
+# Rows shown for the per-match and per-file deltas.
+DEFAULT_TOP = 20
+
+RED = "\033[0;31m"
+GREEN = "\033[0;32m"
+YELLOW = "\033[1;33m"
+BLUE = "\033[0;34m"
+NC = "\033[0m"
+
+
+def log(color, label, message):
+    print("%s[%s]%s %s" % (color, label, NC, message), file=sys.stderr)
+
+
+class CompareError(Exception):
+    """Raised when a side of the comparison cannot be prepared or run."""
+
+
+def _git(args, cwd):
+    result = subprocess.run(["git"] + args, cwd=cwd, stdout=subprocess.PIPE,
+                            stderr=subprocess.PIPE)
+    if result.returncode != 0:
+        raise CompareError("git %s failed: %s" % (
+            " ".join(args), result.stderr.decode("utf-8", "replace").strip()))
+    return result.stdout
+
+
+def prepare_corpus(repo, work_dir):
+    """Return the directory and state of the corpus to lint.
+
+    URLs are cloned shallow into the work directory once and reused.
+    Symlinks, which make Vale fail with path traversal errors in repos
+    such as openshift-docs, are removed from clones.
+    """
+    if os.path.isdir(repo):
+        corpus_dir = os.path.abspath(repo)
+    else:
+        name = os.path.basename(repo.rstrip("/"))
+        if name.endswith(".git"):
+            name = name[:-len(".git")]
+        corpus_dir = os.path.join(work_dir, name)
+        if os.path.isdir(corpus_dir):
+            log(BLUE, "INFO", "Using cached %s..." % name)
+        else:
+            log(BLUE, "INFO", "Cloning %s (shallow)..." % name)
+            _git(["clone", "--depth", "1", "--quiet", repo, corpus_dir], work_dir)
+        links = []
+        for dirpath, dirnames, filenames in os.walk(corpus_dir):
+            for entry in dirnames + filenames:
+                if os.path.islink(os.path.join(dirpath, entry)):
+                    links.append(os.path.join(dirpath, entry))
+        if links:
+            log(BLUE, "INFO", "Removing %d symlinks to avoid path traversal issues..." % len(links))
+            for link in links:
+                os.unlink(link)
+    return corpus_dir, corpus_state(corpus_dir)
+
+
+def corpus_state(corpus_dir):
+    """Return the commit of the corpus, with a hash of its local changes.
+
+    Uncommitted and untracked files change the result, so the cached
+    alerts of a checkout are not reused once it is edited.
+    """
+    commit = _git(["rev-parse", "HEAD"], corpus_dir).decode().strip()
+    digest = hashlib.sha256(_git(["diff", "HEAD", "--binary", "--", "."], corpus_dir))
+    untracked = _git(["ls-files", "-z", "--others", "--exclude-standard"],
+                     corpus_dir).split(b"\0")
+    for path in sorted(filter(None, untracked)):
+        digest.update(b"\0" + path + b"\0")
+        with open(os.path.join(corpus_dir, os.fsdecode(path)), "rb") as f:
+            digest.update(hashlib.sha256(f.read()).digest())
+    if digest.hexdigest() == hashlib.sha256().hexdigest():
+        return commit
+    return "%s+%s" % (commit, digest.hexdigest()[:16])
+
+
+def base_styles(base_ref, cache_dir):
+    """Extract the styles of base_ref once, keyed by their Git tree hash.
+
+    Returns:
+        (styles directory, tree hash)
+    """
+    try:
+        tree = _git(["rev-parse", "%s:%s" % (base_ref, STYLES_PATH)],
+                    REPO_ROOT).decode().strip()
+    except CompareError:
+        raise CompareError(
+            "Could not find %s in %s. Make sure the upstream remote exists: "
+            "git remote add upstream https://github.com/redhat-documentation/"
+            "vale-at-red-hat.git && git fetch upstream" % (STYLES_PATH, base_ref))
+    styles_dir = os.path.join(cache_dir, "styles", tree)
+    if not os.path.isdir(styles_dir):
+        archive = _git(["archive", "--format=tar", tree], REPO_ROOT)
+        os.makedirs(os.path.dirname(styles_dir), exist_ok=True)
+        partial_dir = tempfile.mkdtemp(dir=os.path.dirname(styles_dir))
+        with tarfile.open(fileobj=io.BytesIO(archive)) as tar:
+            tar.extractall(partial_dir)
+        try:
+            os.rename(partial_dir, styles_dir)
+        except OSError:
+            shutil.rmtree(partial_dir)
+    return styles_dir, tree
+
+
+def run_vale(styles_dir, corpus_dir, rule, work_dir, vale="vale"):
+    """Lint the corpus with one rule and return its alerts.
+
+    Returns:
+        list of [file relative to the corpus, line, match, message]
+    """
+    config = os.path.join(work_dir, "vale-%s.ini" % hashlib.sha256(
+        styles_dir.encode("utf-8")).hexdigest()[:12])
+    with open(config, "w", encoding="utf-8") as f:
+        f.write(VALE_CONFIG.format(styles=styles_dir))
+    command = [vale, "--config=%s" % config, "--filter=.Name==\"%s\"" % rule,
+               "--output=JSON", "--no-exit", corpus_dir]
+    try:
+        result = subprocess.run(command, stdout=subprocess.PIPE,
+                                stderr=subprocess.PIPE)
+    except OSError as e:
+        raise CompareError("Cannot run %s: %s" % (vale, e))
+    try:
+        report = json.loads(result.stdout.decode("utf-8"))
+    except ValueError:
+        report = None
+    if not isinstance(report, dict):
+        raise CompareError("Vale failed: %s" % result.stderr.decode(
+            "utf-8", "replace").strip())
+    alerts = []
+    for path, file_alerts in report.items():
+        relative = os.path.relpath(os.path.abspath(path), corpus_dir)
+        for alert in file_alerts:
+            if alert.get("Check") == rule:
+                alerts.append([relative, alert.get("Line", 0),
+                               alert.get("Match", ""), alert.get("Message", "")])
+    alerts.sort()
+    return alerts
+
+
+def lint(side, styles_dir, styles_hash, corpus_dir, state, rule, args):
+    """Return the alerts of one side, from the cache when possible."""
+    key = hashlib.sha256(json.dumps(
+        [CACHE_VERSION, styles_hash, state, rule]).encode("utf-8")).hexdigest()
+    cache_path = os.path.join(args.cache_dir, "results", key + ".json")
+    if not args.no_cache and os.path.exists(cache_path):
+        log(BLUE, "INFO", "Using cached %s results (%s)" % (side, key[:12]))
+        with open(cache_path, encoding="utf-8") as f:
+            return json.load(f)
+    log(BLUE, "INFO", "Running Vale (%s) with the %s styles..." % (rule, side))
+    alerts = run_vale(styles_dir, corpus_dir, rule, args.work_dir, args.vale)
+    os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+    with open(cache_path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(alerts, f)
+    os.replace(cache_path + ".tmp", cache_path)
+    return alerts
+
+
+def count_by(alerts, field):
+    counts = {}
+    for alert in alerts:
+        counts[alert[field]] = counts.get(alert[field], 0) + 1
+    return counts
+
+
+def deltas(before, after):
+    """Return (key, before, after) for keys whose counts differ.
+
+    Sorted by the size of the change, largest first.
+    """
+    rows = [(key, before.get(key, 0), after.get(key, 0))
+            for key in set(before) | set(after)
+            if before.get(key, 0) != after.get(key, 0)]
+    rows.sort(key=lambda row: (-abs(row[2] - row[1]), row[0]))
+    return rows
+
+
+def format_counts(counts):
+    """Format counts as `sort | uniq -c | sort -rn` prints them."""
+    return "".join("%7d %s\n" % (count, value) for value, count in sorted(
+        counts.items(), key=lambda item: (item[1], item[0]), reverse=True))
+
+
+def format_deltas(rows):
+    return "".join("%+7d %7d %7d  %s\n" % (after - before, before, after, key)
+                   for key, before, after in rows)
+
+
+def write_results(output_dir, baseline, candidate, match_deltas, file_deltas):
+    """Write the count, detailed and delta files of a comparison."""
+    os.makedirs(output_dir, exist_ok=True)
+    for name, alerts in (("upstream", baseline), ("current", candidate)):
+        with open(os.path.join(output_dir, name + ".txt"), "w", encoding="utf-8") as f:
+            f.write(format_counts(count_by(alerts, 2)))
+        with open(os.path.join(output_dir, name + ".txt.detailed"), "w", encoding="utf-8") as f:
+            for path, line, match, message in alerts:
+                f.write("%s:%s: %s - %s\n" % (path, line, match, message))
+    with open(os.path.join(output_dir, "delta-matches.txt"), "w", encoding="utf-8") as f:
+        f.write(format_deltas(match_deltas))
+    with open(os.path.join(output_dir, "delta-files.txt"), "w", encoding="utf-8") as f:
+        f.write(format_deltas(file_deltas))
+
+
+def print_summary(rule, name, base_ref, baseline, candidate, match_deltas,
+                  file_deltas, top):
+    before = len(baseline)
+    after = len(candidate)
+    print("")
+    print("==============================================")
+    print("%sResults for: %s (%s)%s" % (BLUE, name, rule, NC))
+    print("==============================================")
+    print("")
+    print("Errors with %s rule:  %s%d%s" % (base_ref, RED, before, NC))
+    print("Errors with current rule:   %s%d%s" % (GREEN, after, NC))
+    print("")
+    if after < before:
+        if before:
+            log(GREEN, "SUCCESS", "Your changes reduced errors by %d (%.1f%%)" % (
+                before - after, (before - after) * 100.0 / before))
+        else:
+            log(GREEN, "SUCCESS", "Your changes reduced errors by %d" % (before - after))
+    elif after > before:
+        log(YELLOW, "WARN", "Your changes increased errors by %d" % (after - before))
+    else:
+        log(BLUE, "INFO", "No change in error count")
+    for title, rows in (("matches", match_deltas), ("files", file_deltas)):
+        if rows:
+            print("")
+            print("Largest changes by %s (change, before, after):" % title)
+            sys.stdout.write(format_deltas(rows[:top]))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("rule", metavar="RULE",
+                        help="rule name, such as Spelling or RedHat.Spelling")
+    parser.add_argument("repo", metavar="REPO",
+                        help="Git URL or local checkout of the corpus")
+    parser.add_argument(
+        "--base-ref", default=os.environ.get("BASE_REF", "upstream/main"),
+        help="Git ref of the baseline styles (default: $BASE_REF or "
+             "upstream/main)",
+    )
+    parser.add_argument(
+        "--work-dir", default=DEFAULT_WORK_DIR,
+        help="directory for clones, configs and results "
+             "(default: %(default)s)",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        default=os.environ.get("VALE_COMPARE_CACHE_DIR", DEFAULT_CACHE_DIR),
+        help="directory for the baseline styles and cached results "
+             "(default: $VALE_COMPARE_CACHE_DIR or %s)" % DEFAULT_CACHE_DIR,
+    )
+    parser.add_argument("--no-cache", action="store_true",
+                        help="lint both sides even if results are cached")
+    parser.add_argument("--top", type=int, default=DEFAULT_TOP, metavar="N",
+                        help="deltas to print per table (default: %(default)s)")
+    parser.add_argument("--vale", default="vale", help="Vale executable")
+    args = parser.parse_args(argv)
+
+    rule = args.rule if "." in args.rule else "RedHat." + args.rule
+    style, rule_name = rule.split(".", 1)
+    rule_file = os.path.join(REPO_ROOT, STYLES_PATH, style, rule_name + ".yml")
+    if not os.path.isfile(rule_file):
+        log(RED, "ERROR", "Rule file not found: %s" % rule_file)
+        return 1
+    os.makedirs(args.work_dir, exist_ok=True)
+    log(BLUE, "INFO", "Vale repository: %s" % REPO_ROOT)
+    log(BLUE, "INFO", "Rule: %s" % rule)
+    log(BLUE, "INFO", "Base ref: %s" % args.base_ref)
+    log(BLUE, "INFO", "Work directory: %s" % args.work_dir)
+    log(BLUE, "INFO", "Test repo: %s" % args.repo)
+
+    try:
+        corpus_dir, state = prepare_corpus(args.repo, args.work_dir)
+        name = os.path.basename(corpus_dir)
+        log(BLUE, "INFO", "Corpus: %s at %s%s" % (
+            name, state[:12], " with local changes" if "+" in state else ""))
+        base_dir, base_hash = base_styles(args.base_ref, args.cache_dir)
+        baseline = lint(args.base_ref, base_dir, base_hash, corpus_dir,
+                        state, rule, args)
+        current_dir = os.path.join(REPO_ROOT, STYLES_PATH)
+        candidate = lint("current", current_dir, tree_hash(current_dir),
+                         corpus_dir, state, rule, args)
+    except CompareError as e:
+        log(RED, "ERROR", str(e))
+        return 1
+
+    match_deltas = deltas(count_by(baseline, 2), count_by(candidate, 2))
+    file_deltas = deltas(count_by(baseline, 0), count_by(candidate, 0))
+    output_dir = os.path.join(args.work_dir, "results", rule_name, name)
+    write_results(output_dir, baseline, candidate, match_deltas, file_deltas)
+    print_summary(rule, name, args.base_ref, baseline, candidate,
+                  match_deltas, file_deltas, args.top)
+
+    print("")
+    print("==============================================")
+    log(GREEN, "SUCCESS", "Comparison complete!")
+    print("==============================================")
+    print("")
+    print("diff %s %s" % (os.path.join(output_dir, "upstream.txt"),
+                          os.path.join(output_dir, "current.txt")))
+    print("")
+    print("less %s" % os.path.join(output_dir, "current.txt.detailed"))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,724 @@
+#!/usr/bin/env python3
+# Copyright (c) 2024 Red Hat, Inc.
+# This program and the accompanying materials are made
+# available under the terms of the Eclipse Public License 2.0
+# which is available at https://www.eclipse.org/legal/epl-2.0/
+#
+# SPDX-License-Identifier: EPL-2.0
+"""Generate large, reproducible AsciiDoc and DITA corpora from the fixtures.
+
+Harvests sentences, headings, code blocks with callouts, tables,
+admonitions and conditionals from .vale/fixtures and
+schematron/fixtures, and recombines them into AsciiDoc assemblies with
+their modules and into DITA topics with a map. Sentences and headings
+from testinvalid.adoc files and DITA fixtures are violations, and are
+drawn with the probability given by --density. The clean pool only
+keeps the testvalid.adoc sentences that no existence or substitution
+rule of the RedHat style matches, so that most alerts in the corpus
+come from injected violations. Structural blocks are only taken from
+testvalid.adoc files, so that the generated markup stays well formed.
+
+Every file is generated from its own random generator, seeded with
+--seed and the file number, so a run always writes the same bytes, and
+a larger corpus starts with the modules and topics of a smaller one.
+Files are
+written as they are generated, in directories of 1000, so corpora of
+several gigabytes run in constant memory. A manifest.json records the
+options, the totals and the violations injected per rule.
+
+Usage:
+    tools/generate-corpus.py [--format adoc|dita|both] [--files N]
+                             [--size SIZE] [--density RATIO] [--seed N]
+                             OUTPUT_DIR
+"""
+
+import argparse
+import glob
+import json
+import os
+import random
+import re
+import sys
+import time
+from xml.sax.saxutils import escape, quoteattr
+
+from vale_patterns import FIXTURES_DIR, REPO_ROOT, load_patterns, python_pattern
+
+DITA_FIXTURES_DIR = os.path.join(REPO_ROOT, "schematron", "fixtures")
+
+DEFAULT_FILES = 100
+DEFAULT_DENSITY = 0.05
+
+# Modules or topics per output directory, and modules per assembly.
+# FILES_PER_DIR is a multiple of MODULES_PER_ASSEMBLY, so that an
+# assembly and its modules share a directory.
+FILES_PER_DIR = 1000
+MODULES_PER_ASSEMBLY = 8
+
+SIZE_UNITS = {"K": 1 << 10, "M": 1 << 20, "G": 1 << 30}
+
+MODULE_TYPES = (("CONCEPT", "con"), ("PROCEDURE", "proc"),
+                ("REFERENCE", "ref"))
+
+# Block kinds of a module or topic body, with their relative weights.
+BLOCK_WEIGHTS = (("paragraph", 8), ("list", 2), ("section", 2),
+                 ("code", 2), ("table", 1), ("admonition", 1),
+                 ("conditional", 1))
+
+# Lines starting with these characters are markup, not prose.
+MARKUP_START = tuple("=.[|/-*:<`+ \t#{}>\\'\"")
+
+_HEADING_RE = re.compile(r"^(=+) (\S.*)$")
+_SOURCE_RE = re.compile(r"^\[source,\s*([\w+-]+)")
+_CALLOUT_RE = re.compile(r"^<(\d+)> (\S.*)$")
+_MARKER_RE = re.compile(r"<(\d+)>")
+_COND_RE = re.compile(r"^(ifdef|ifndef)::([\w-]+)\[\]\s*$")
+_COND_INLINE_RE = re.compile(r"^(ifdef|ifndef)::([\w-]+)\[(\S.*)\]\s*$")
+_ADMONITION_RE = re.compile(r"^(NOTE|TIP|IMPORTANT|WARNING|CAUTION): (\S.*)$")
+_ADMONITION_BLOCK_RE = re.compile(r"^\[(NOTE|TIP|IMPORTANT|WARNING|CAUTION)\]\s*$")
+_DITA_RULE_RE = re.compile(r"test-(\w+)\.dita$")
+_DELIMITER_RE = re.compile(r"^(-{4,}|\.{4,}|={4,}|\*{4,}|_{4,}|\+{4,}|\|={3,})\s*$")
+_DIRECTIVE_RE = re.compile(r"^\w[\w-]*::")
+_REPEATED_RE = re.compile(r"(?i)\b(\w+)\s+\1\b")
+_DITA_PARAGRAPH_RE = re.compile(r"(<!--\s*Tests[^>]*-->\s*)?<p>([^<]+)</p>")
+
+# Rules whose valid fixtures are headings checked for heading style.
+HEADING_RULES = ("Headings", "HeadingPunctuation", "NoGerundsInTitles")
+
+
+# ---------------------------------------------------------------------------
+# Harvesting the fixtures
+# ---------------------------------------------------------------------------
+
+def _is_prose(line):
+    return bool(line.strip()) and not line.startswith(MARKUP_START)
+
+
+def _is_sentence(line):
+    return _is_prose(line) and line[0].isupper() and len(line.split()) >= 4
+
+
+def prose_lines(text):
+    """Yield the lines of a fixture outside delimited blocks and directives."""
+    delimiter = None
+    for line in text.splitlines():
+        m = _DELIMITER_RE.match(line)
+        if m:
+            if delimiter is None:
+                delimiter = m.group(1)
+            elif m.group(1) == delimiter:
+                delimiter = None
+            continue
+        if delimiter is None and not _DIRECTIVE_RE.match(line):
+            yield line
+
+
+def _terminate(text):
+    """End a fixture line with a period if it has no final punctuation."""
+    text = text.strip()
+    return text + "." if text[-1:].isalnum() else text
+
+
+def _table(attributes, lines):
+    """Parse the body of an AsciiDoc table into rows of cells."""
+    cells = []
+    columns = 0
+    for line in lines:
+        if not line.strip():
+            continue
+        parts = [c.strip() for c in line.split("|")[1:]]
+        if not parts:
+            return None
+        if not columns:
+            columns = len(parts)
+        cells.extend(parts)
+    m = re.search(r'cols="([^"]*)"', attributes)
+    if m:
+        columns = len(m.group(1).split(","))
+    if columns < 2 or len(cells) < 2 * columns:
+        return None
+    rows = [cells[i:i + columns]
+            for i in range(0, len(cells) - columns + 1, columns)]
+    return ("table", "header" in attributes, rows)
+
+
+def _code(language, lines, callouts):
+    """Build a code block, keeping callouts only when they all match."""
+    markers = sorted(set(int(n) for line in lines
+                         for n in _MARKER_RE.findall(line)))
+    numbers = [n for n, _ in callouts]
+    if markers and markers != numbers:
+        return None
+    if numbers != list(range(1, len(numbers) + 1)):
+        return None
+    return ("code", language, lines, [text for _, text in callouts])
+
+
+def harvest_blocks(text):
+    """Yield the structural blocks of a valid AsciiDoc fixture."""
+    lines = text.splitlines()
+    i = 0
+    attributes = ""
+    while i < len(lines):
+        line = lines[i].rstrip()
+        source = _SOURCE_RE.match(line)
+        if line.startswith("["):
+            attributes = line
+        elif not line.startswith(".") and not line.startswith("|="):
+            attributes = ""
+        if source and i + 1 < len(lines) and lines[i + 1].rstrip() == "----":
+            end = i + 2
+            while end < len(lines) and lines[end].rstrip() != "----":
+                end += 1
+            body = [l.rstrip() for l in lines[i + 2:end]]
+            callouts = []
+            j = end + 1
+            while j < len(lines) and _CALLOUT_RE.match(lines[j].rstrip()):
+                m = _CALLOUT_RE.match(lines[j].rstrip())
+                callouts.append((int(m.group(1)), m.group(2)))
+                j += 1
+            if end < len(lines) and body:
+                block = _code(source.group(1), body, callouts)
+                if block:
+                    yield block
+            i = j
+            continue
+        if re.match(r"^\|={3,}$", line):
+            end = i + 1
+            while end < len(lines) and lines[end].rstrip() != line:
+                end += 1
+            if end < len(lines):
+                block = _table(attributes, lines[i + 1:end])
+                if block:
+                    yield block
+            i = end + 1
+            continue
+        cond = _COND_RE.match(line)
+        if cond:
+            end = i + 1
+            while end < len(lines) and _is_prose(lines[end]):
+                end += 1
+            if (end < len(lines) and end > i + 1
+                    and lines[end].startswith("endif::")):
+                yield ("conditional", cond.group(1), cond.group(2),
+                       [l.strip() for l in lines[i + 1:end]])
+            i = end + 1
+            continue
+        cond = _COND_INLINE_RE.match(line)
+        if cond and _is_prose(cond.group(3)):
+            yield ("conditional", cond.group(1), cond.group(2),
+                   [cond.group(3)])
+        admonition = _ADMONITION_RE.match(line)
+        if admonition:
+            yield ("admonition", admonition.group(1), admonition.group(2))
+        admonition = _ADMONITION_BLOCK_RE.match(line)
+        if admonition:
+            j = i + 1
+            while j < len(lines) and lines[j].startswith("."):
+                j += 1
+            if j < len(lines) and lines[j].rstrip() == "====":
+                end = j + 1
+                while end < len(lines) and lines[end].rstrip() != "====":
+                    end += 1
+                prose = [l.strip() for l in lines[j + 1:end] if _is_prose(l)]
+                if end < len(lines) and prose:
+                    yield ("admonition", admonition.group(1), " ".join(prose))
+                i = end + 1
+                continue
+        i += 1
+
+
+def _block_prose(block):
+    """Return the prose of a structural block, for checking."""
+    kind = block[0]
+    if kind == "code":
+        return " ".join(block[3])
+    if kind == "table":
+        return " ".join(" ".join(row) for row in block[2])
+    if kind == "conditional":
+        return " ".join(block[3])
+    return block[2]
+
+
+def _fixture_files(name):
+    return sorted(glob.glob(os.path.join(FIXTURES_DIR, "*", "*", name)))
+
+
+def _rule_name(path):
+    parts = os.path.normpath(path).split(os.sep)
+    return "%s.%s" % (parts[-3], parts[-2])
+
+
+def _clean_matchers():
+    """Compile the regexes Vale runs for RedHat existence and swap rules.
+
+    Returns:
+        (sentence regexes, heading regexes), split by rule scope.
+    """
+    records = [r for r in load_patterns(["RedHat"])
+               if r["extends"] in ("existence", "substitution")]
+    combined = set(r["rule"] for r in records if r["kind"] == "rule")
+    sentence = []
+    heading = []
+    for record in records:
+        if record["rule"] in combined and record["kind"] != "rule":
+            continue
+        pattern, _ = python_pattern(record["pattern"])
+        if pattern is None:
+            continue
+        regex = re.compile(pattern)
+        if record["scope"] != ["heading"]:
+            sentence.append(regex)
+        if not set(record["scope"]) & {"~heading", "sentence", "paragraph",
+                                       "list"}:
+            heading.append(regex)
+    return sentence, heading
+
+
+class Pools(object):
+    """Sentences, headings and blocks harvested from the fixtures."""
+
+    def __init__(self):
+        self.sentences = []
+        self.headings = []
+        self.bad_sentences = []
+        self.bad_headings = []
+        self.blocks = {"code": [], "table": [], "admonition": [],
+                       "conditional": []}
+
+        sentence_matchers, heading_matchers = _clean_matchers()
+
+        def clean(text, matchers):
+            return not (_REPEATED_RE.search(text)
+                        or any(regex.search(text) for regex in matchers))
+
+        seen = set()
+        for path in _fixture_files("testvalid.adoc"):
+            with open(path, "r", encoding="utf-8") as f:
+                text = f.read()
+            for line in prose_lines(text):
+                heading = _HEADING_RE.match(line)
+                if heading:
+                    title = heading.group(2).strip()
+                    if (_rule_name(path).split(".")[1] in HEADING_RULES
+                            and "{" not in title and title not in seen
+                            and clean(title, heading_matchers)):
+                        seen.add(title)
+                        self.headings.append(title)
+                elif _is_sentence(line):
+                    sentence = _terminate(line)
+                    if (sentence not in seen
+                            and clean(sentence, sentence_matchers)):
+                        seen.add(sentence)
+                        self.sentences.append(sentence)
+            for block in harvest_blocks(text):
+                if (block not in self.blocks[block[0]]
+                        and clean(_block_prose(block), sentence_matchers)):
+                    self.blocks[block[0]].append(block)
+
+        for path in _fixture_files("testinvalid.adoc"):
+            if not path.startswith(os.path.join(FIXTURES_DIR, "RedHat")):
+                continue
+            rule = _rule_name(path)
+            with open(path, "r", encoding="utf-8") as f:
+                for line in prose_lines(f.read()):
+                    heading = _HEADING_RE.match(line)
+                    if heading:
+                        self.bad_headings.append((rule, heading.group(2)))
+                    elif _is_prose(line):
+                        self.bad_sentences.append((rule, _terminate(line)))
+
+        # Paragraphs of the DITA fixtures that follow a "Tests ..."
+        # comment are violations of the rule the file tests.
+        for path in sorted(glob.glob(os.path.join(DITA_FIXTURES_DIR,
+                                                  "test-*.dita"))):
+            rule = "RedHat.%s" % _DITA_RULE_RE.search(path).group(1)
+            with open(path, "r", encoding="utf-8") as f:
+                text = f.read()
+            for m in _DITA_PARAGRAPH_RE.finditer(text):
+                sentence = " ".join(m.group(2).split())
+                if m.group(1):
+                    self.bad_sentences.append((rule, sentence))
+                elif (sentence not in seen
+                      and clean(sentence, sentence_matchers)):
+                    seen.add(sentence)
+                    self.sentences.append(sentence)
+
+        if not self.sentences or not self.headings:
+            raise ValueError("no clean sentences or headings in %s" % FIXTURES_DIR)
+
+
+# ---------------------------------------------------------------------------
+# Content model
+# ---------------------------------------------------------------------------
+
+class FileGenerator(object):
+    """Draw the content of one generated file.
+
+    Keeps a count of the violations it injected per rule.
+    """
+
+    def __init__(self, pools, density, seed):
+        self.pools = pools
+        self.density = density
+        self.rng = random.Random(seed)
+        self.violations = {}
+
+    def _violation(self, pool):
+        rule, text = self.rng.choice(pool)
+        self.violations[rule] = self.violations.get(rule, 0) + 1
+        return text
+
+    def sentence(self):
+        if self.pools.bad_sentences and self.rng.random() < self.density:
+            return self._violation(self.pools.bad_sentences)
+        return self.rng.choice(self.pools.sentences)
+
+    def heading(self):
+        if self.pools.bad_headings and self.rng.random() < self.density:
+            return self._violation(self.pools.bad_headings)
+        return self.rng.choice(self.pools.headings)
+
+    def paragraph(self):
+        return " ".join(self.sentence()
+                        for _ in range(self.rng.randint(2, 5)))
+
+    def blocks(self):
+        """Return the list of body blocks of a module or topic."""
+        kinds = [k for k, _ in BLOCK_WEIGHTS
+                 if k not in self.pools.blocks or self.pools.blocks[k]]
+        weights = [w for k, w in BLOCK_WEIGHTS if k in kinds]
+        blocks = [("paragraph", self.paragraph())]
+        for kind in self.rng.choices(kinds, weights,
+                                     k=self.rng.randint(3, 12)):
+            if kind == "paragraph":
+                blocks.append(("paragraph", self.paragraph()))
+            elif kind == "list":
+                blocks.append(("list", [self.sentence() for _ in
+                                        range(self.rng.randint(2, 6))]))
+            elif kind == "section":
+                blocks.append(("section", self.heading()))
+            else:
+                blocks.append(self.rng.choice(self.pools.blocks[kind]))
+        return blocks
+
+
+# ---------------------------------------------------------------------------
+# AsciiDoc
+# ---------------------------------------------------------------------------
+
+def _adoc_block(block, ordered):
+    kind = block[0]
+    if kind == "paragraph":
+        return block[1]
+    if kind == "list":
+        bullet = "." if ordered else "*"
+        return "\n".join("%s %s" % (bullet, item) for item in block[1])
+    if kind == "section":
+        return "== %s" % block[1]
+    if kind == "code":
+        _, language, lines, callouts = block
+        text = "[source,%s]\n----\n%s\n----" % (language, "\n".join(lines))
+        for n, callout in enumerate(callouts, 1):
+            text += "\n<%d> %s" % (n, callout)
+        return text
+    if kind == "table":
+        _, header, rows = block
+        text = '[options="header"]\n|===\n' if header else "|===\n"
+        text += "\n".join("|" + " |".join(row) for row in rows)
+        return text + "\n|==="
+    if kind == "admonition":
+        return "%s: %s" % (block[1], block[2])
+    if kind == "conditional":
+        _, directive, attribute, lines = block
+        return "%s::%s[]\n%s\nendif::%s[]" % (
+            directive, attribute, "\n".join(lines), attribute)
+    raise ValueError(kind)
+
+
+def adoc_module(generator, name, assembly):
+    """Return the text and content type prefix of an AsciiDoc module."""
+    content_type, prefix = generator.rng.choice(MODULE_TYPES)
+    lines = [
+        "// Module included in the following assemblies:",
+        "//",
+        "// * %s" % assembly,
+        "",
+        ":_mod-docs-content-type: %s" % content_type,
+        '[id="%s-%s_{context}"]' % (prefix, name),
+        "= %s" % generator.heading(),
+        "",
+    ]
+    blocks = generator.blocks()
+    if content_type == "PROCEDURE":
+        steps = ("list", [generator.sentence()
+                          for _ in range(generator.rng.randint(3, 8))])
+        blocks = blocks[:2] + [("title", "Procedure"), steps] + blocks[2:]
+    for block in blocks:
+        if block[0] == "title":
+            lines.append(".%s" % block[1])
+            continue
+        lines.append(_adoc_block(block, content_type == "PROCEDURE"))
+        lines.append("")
+    return "\n".join(lines), prefix
+
+
+def adoc_assembly(generator, name, modules):
+    lines = [
+        ":_mod-docs-content-type: ASSEMBLY",
+        '[id="assembly-%s"]' % name,
+        "= %s" % generator.heading(),
+        ":context: assembly-%s" % name,
+        "",
+        "toc::[]",
+        "",
+        generator.paragraph(),
+        "",
+    ]
+    for module in modules:
+        lines.append("include::modules/%s[leveloffset=+1]" % module)
+        lines.append("")
+    return "\n".join(lines)
+
+
+# ---------------------------------------------------------------------------
+# DITA
+# ---------------------------------------------------------------------------
+
+def _dita_block(block):
+    kind = block[0]
+    if kind == "paragraph":
+        return "<p>%s</p>" % escape(block[1])
+    if kind == "list":
+        return "<ul>%s</ul>" % "".join(
+            "<li>%s</li>" % escape(item) for item in block[1])
+    if kind == "code":
+        _, language, lines, callouts = block
+        text = '<codeblock outputclass="language-%s">%s</codeblock>' % (
+            escape(language), escape("\n".join(lines)))
+        if callouts:
+            text += "\n    <ol>%s</ol>" % "".join(
+                "<li>%s</li>" % escape(c) for c in callouts)
+        return text
+    if kind == "table":
+        _, header, rows = block
+        text = "<simpletable>"
+        for i, row in enumerate(rows):
+            tag = "sthead" if header and i == 0 else "strow"
+            text += "<%s>%s</%s>" % (tag, "".join(
+                "<stentry>%s</stentry>" % escape(c) for c in row), tag)
+        return text + "</simpletable>"
+    if kind == "admonition":
+        return '<note type=%s><p>%s</p></note>' % (
+            quoteattr(block[1].lower()), escape(block[2]))
+    if kind == "conditional":
+        _, directive, attribute, lines = block
+        attribute = attribute if directive == "ifdef" else "not-" + attribute
+        return "<p audience=%s>%s</p>" % (
+            quoteattr(attribute), escape(" ".join(lines)))
+    raise ValueError(kind)
+
+
+def dita_topic(generator, name):
+    lines = [
+        '<?xml version="1.0" encoding="UTF-8"?>',
+        '<!DOCTYPE topic PUBLIC "-//OASIS//DTD DITA Topic//EN" "topic.dtd">',
+        '<topic id="topic-%s">' % name,
+        "  <title>%s</title>" % escape(generator.heading()),
+        "  <body>",
+    ]
+    section = False
+    for block in generator.blocks():
+        if block[0] == "section":
+            if section:
+                lines.append("    </section>")
+            lines.append("    <section>")
+            lines.append("      <title>%s</title>" % escape(block[1]))
+            section = True
+            continue
+        lines.append("%s%s" % ("      " if section else "    ",
+                               _dita_block(block)))
+    if section:
+        lines.append("    </section>")
+    lines.extend(["  </body>", "</topic>", ""])
+    return "\n".join(lines)
+
+
+# ---------------------------------------------------------------------------
+# Writing the corpus
+# ---------------------------------------------------------------------------
+
+def parse_size(text):
+    """Parse a size such as 512K, 64M or 1G into bytes."""
+    m = re.match(r"^(\d+)([KMG]?)B?$", text.strip().upper())
+    if not m or int(m.group(1)) == 0:
+        raise argparse.ArgumentTypeError("invalid size: %r" % text)
+    return int(m.group(1)) * SIZE_UNITS.get(m.group(2), 1)
+
+
+def _write(path, text):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    data = text.encode("utf-8")
+    with open(path, "wb") as f:
+        f.write(data)
+    return len(data)
+
+
+def _merge(totals, counts):
+    for rule, count in counts.items():
+        totals[rule] = totals.get(rule, 0) + count
+
+
+def _done(index, written, args):
+    if args.size is not None:
+        return written >= args.size
+    return index >= args.files
+
+
+def write_adoc(pools, args, violations):
+    """Write AsciiDoc assemblies and modules below OUTPUT_DIR/adoc.
+
+    Each assembly includes the modules generated just before it, from
+    the same directory.
+
+    Returns:
+        (number of files, bytes written)
+    """
+    root = os.path.join(args.output_dir, "adoc")
+    index = 0
+    files = 0
+    written = 0
+    modules = []
+    while not _done(index, written, args):
+        number = index // MODULES_PER_ASSEMBLY
+        directory = os.path.join(root, "%03d" % (index // FILES_PER_DIR))
+        generator = FileGenerator(
+            pools, args.density, "adoc:%d:%d" % (args.seed, index))
+        text, prefix = adoc_module(generator, "%06d" % index,
+                                   "assembly-%06d.adoc" % number)
+        filename = "%s-%06d.adoc" % (prefix, index)
+        written += _write(os.path.join(directory, "modules", filename), text)
+        _merge(violations, generator.violations)
+        modules.append(filename)
+        files += 1
+        index += 1
+
+        if (len(modules) == MODULES_PER_ASSEMBLY
+                or _done(index, written, args)):
+            generator = FileGenerator(
+                pools, args.density,
+                "adoc-assembly:%d:%d" % (args.seed, number))
+            written += _write(
+                os.path.join(directory, "assembly-%06d.adoc" % number),
+                adoc_assembly(generator, "%06d" % number, modules))
+            _merge(violations, generator.violations)
+            files += 1
+            modules = []
+    return files, written
+
+
+def write_dita(pools, args, violations):
+    """Write DITA topics and a map referencing them below OUTPUT_DIR/dita.
+
+    Returns:
+        (number of files, bytes written)
+    """
+    root = os.path.join(args.output_dir, "dita")
+    os.makedirs(root, exist_ok=True)
+    index = 0
+    written = 0
+    with open(os.path.join(root, "corpus.ditamap"), "w",
+              encoding="utf-8") as ditamap:
+        ditamap.write('<?xml version="1.0" encoding="UTF-8"?>\n'
+                      '<!DOCTYPE map PUBLIC "-//OASIS//DTD DITA Map//EN" '
+                      '"map.dtd">\n<map>\n  <title>Generated corpus</title>\n')
+        while not _done(index, written, args):
+            name = "%06d" % index
+            generator = FileGenerator(
+                pools, args.density, "dita:%d:%d" % (args.seed, index))
+            href = "%03d/topic-%s.dita" % (index // FILES_PER_DIR, name)
+            written += _write(os.path.join(root, href),
+                              dita_topic(generator, name))
+            _merge(violations, generator.violations)
+            ditamap.write('  <topicref href="%s"/>\n' % href)
+            index += 1
+        ditamap.write("</map>\n")
+    # The map is counted as a file, but not in the bytes written.
+    return index + 1, written
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "output_dir", metavar="OUTPUT_DIR",
+        help="directory to write the corpus to",
+    )
+    parser.add_argument(
+        "--format", choices=("adoc", "dita", "both"), default="both",
+        help="corpus format (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--files", type=int, default=DEFAULT_FILES, metavar="N",
+        help="number of modules or topics per format "
+             "(default: %(default)s)",
+    )
+    parser.add_argument(
+        "--size", type=parse_size, metavar="SIZE",
+        help="generate files until each format reaches SIZE bytes, with "
+             "an optional K, M or G suffix; overrides --files",
+    )
+    parser.add_argument(
+        "--density", type=float, default=DEFAULT_DENSITY, metavar="RATIO",
+        help="probability that a sentence or heading is a violation "
+             "(default: %(default)s)",
+    )
+    parser.add_argument(
+        "--seed", type=int, default=0,
+        help="random seed (default: %(default)s)",
+    )
+    args = parser.parse_args(argv)
+    if not 0.0 <= args.density <= 1.0:
+        parser.error("--density must be between 0 and 1")
+    if args.files < 1:
+        parser.error("--files must be at least 1")
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    start = time.monotonic()
+    pools = Pools()
+    print("Harvested %d clean and %d invalid sentences, %d code blocks, "
+          "%d tables from the fixtures" % (
+              len(pools.sentences), len(pools.bad_sentences),
+              len(pools.blocks["code"]), len(pools.blocks["table"])),
+          file=sys.stderr)
+
+    manifest = {
+        "seed": args.seed,
+        "density": args.density,
+        "formats": {},
+    }
+    writers = (("adoc", write_adoc), ("dita", write_dita))
+    for name, writer in writers:
+        if args.format not in (name, "both"):
+            continue
+        violations = {}
+        files, written = writer(pools, args, violations)
+        manifest["formats"][name] = {
+            "files": files,
+            "bytes": written,
+            "violations": dict(sorted(violations.items())),
+        }
+        print("Wrote %d %s files, %d bytes, %d violations" % (
+            files, name, written, sum(violations.values())), file=sys.stderr)
+
+    with open(os.path.join(args.output_dir, "manifest.json"), "w",
+              encoding="utf-8") as f:
+        f.write(json.dumps(manifest, indent=2, sort_keys=True) + "\n")
+    print("Done in %.1fs" % (time.monotonic() - start), file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,344 @@
+#!/usr/bin/env python3
+# Copyright (c) 2024 Red Hat, Inc.
+# This program and the accompanying materials are made
+# available under the terms of the Eclipse Public License 2.0
+# which is available at https://www.eclipse.org/legal/epl-2.0/
+#
+# SPDX-License-Identifier: EPL-2.0
+"""Harvest out-of-dictionary words from an AsciiDoc corpus.
+
+Reads the prose of every AsciiDoc file below the given paths in a pool
+of worker processes, skipping delimited code, literal, passthrough,
+comment and quote blocks, directives, attribute entries and inline
+code, URLs and cross references. Words are skipped with the filters of
+RedHat/Spelling.yml and checked against the words that the Red Hat
+dictionary and an en_US base dictionary accept once expanded with their
+affix files, as tools/hunspell_dictionary.py does.
+
+The unknown words are ranked by the number of files they appear in and
+by their number of occurrences. Words that many files use are the best
+candidates for wordlist.txt, and the ones that cut the most Spelling
+alerts.
+
+Vale uses its own en_US dictionary. Pass its .dic file, or any en_US
+Hunspell dictionary, with --dictionary; by default the system Hunspell
+dictionary is used if one is installed.
+
+Usage:
+    tools/harvest-spelling.py [--dictionary DIC ...] [--jobs N]
+                              [--min-files N] [--limit N]
+                              [--format text|tsv|json|words]
+                              [--output FILE] PATH...
+"""
+
+import argparse
+import collections
+import json
+import multiprocessing
+import os
+import re
+import sys
+import time
+
+import yaml
+
+import hunspell_dictionary
+from vale_patterns import STYLES_DIR, python_pattern
+
+SPELLING_RULE = os.path.join(STYLES_DIR, "RedHat", "Spelling.yml")
+REDHAT_DICTIONARY = os.path.join(
+    STYLES_DIR, "RedHat", "dictionaries", "en_US-RedHat.dic")
+
+# Base dictionaries looked up when --dictionary is not given.
+SYSTEM_DICTIONARIES = (
+    "/usr/share/hunspell/en_US.dic",
+    "/usr/share/myspell/en_US.dic",
+    "/usr/share/myspell/dicts/en_US.dic",
+)
+
+CORPUS_EXTENSIONS = (".adoc", ".asciidoc")
+
+# Files are handed to the workers in batches of about this many bytes.
+BATCH_BYTES = 4 << 20
+
+# Delimited blocks whose content Vale skips, lines that carry no prose,
+# and inline markup that Vale ignores. Each is removed from the whole
+# document in one pass.
+_BLOCK_RE = re.compile(
+    r"^(-{4,}|\.{4,}|\+{4,}|/{4,}|_{4,}|`{3,})[ \t]*\n.*?(?:^\1[ \t]*$|\Z)",
+    re.M | re.S)
+_SKIPPED_LINE_RE = re.compile(
+    r"^(?://|:[\w-]+!?:|\[.*\][ \t]*$|[\w-]+::|[ \t]).*$", re.M)
+_INLINE_IGNORE_RE = re.compile(
+    r"`[^`\n]+`"
+    r"|\+[^+\n]+\+"
+    r"|<<[^>\n]*>>"
+    r"|\[\[[^\]\n]*\]\]"
+    r"|\{[\w-]+\}"
+    r"|<[^<>\s][^<>\n]*>")
+# URLs and macro targets, kept apart because a pattern that can start
+# with any letter is several times slower to scan for.
+_MACRO_RE = re.compile(
+    r"(?:https?|ftp|file|irc|mailto|xref|link|image|include|footnote|kbd|btn"
+    r"|menu|pass|anchor|icon):{1,2}[^\s\[]*")
+
+# Words keep inner apostrophes, periods, slashes and hyphens, as the
+# Spelling.yml filters for dotted names and I/O expect. Hyphenated
+# words are checked part by part, as Hunspell breaks them.
+_TOKEN_RE = re.compile(r"\w(?:[\w'./-]*\w)?")
+_SKIPPED_TOKEN_RE = re.compile(r"\d|_|^\w$")
+
+# Worker state, set by _init_worker().
+_WORDS = None
+_FILTER = None
+_VERDICTS = None
+_UNKNOWN = None
+
+
+def load_filter(rule_path=SPELLING_RULE):
+    """Return one regex that matches the words a spelling rule filters.
+
+    Returns:
+        compiled regex, or None if the rule defines no filters.
+    """
+    with open(rule_path, encoding="utf-8") as f:
+        data = yaml.safe_load(f) or {}
+    patterns = []
+    for source in data.get("filters") or []:
+        pattern, notes = python_pattern(str(source))
+        if pattern is None:
+            print("Skipping filter %r: %s" % (source, notes[0]), file=sys.stderr)
+            continue
+        patterns.append("(?:%s)" % pattern)
+    return re.compile("|".join(patterns)) if patterns else None
+
+
+def base_dictionaries():
+    """Return the system en_US dictionaries that exist."""
+    return [path for path in SYSTEM_DICTIONARIES if os.path.exists(path)][:1]
+
+
+def prose(text):
+    """Return the prose of an AsciiDoc document, with markup blanked out."""
+    text = _BLOCK_RE.sub("", text)
+    text = _SKIPPED_LINE_RE.sub("", text)
+    return _MACRO_RE.sub(" ", _INLINE_IGNORE_RE.sub(" ", text))
+
+
+def unknown_parts(token, words, word_filter):
+    """Return the parts of a token that the dictionary does not accept.
+
+    Returns an empty list for tokens skipped by the filters.
+    """
+    if _SKIPPED_TOKEN_RE.search(token):
+        return []
+    if word_filter is not None and word_filter.search(token):
+        return []
+    return [part for part in token.split("-")
+            if part and not _SKIPPED_TOKEN_RE.search(part)
+            and not hunspell_dictionary.accepts(part, words)]
+
+
+def _init_worker(words, word_filter):
+    global _WORDS, _FILTER, _VERDICTS, _UNKNOWN
+    _WORDS = words
+    _FILTER = word_filter
+    _VERDICTS = {}
+    _UNKNOWN = set()
+
+
+def _harvest_batch(paths):
+    """Count the unknown words of a batch of files in a worker.
+
+    Tokens are only checked the first time a worker sees them. Known
+    tokens are then dropped with set operations, so only the unknown
+    ones are handled one by one.
+
+    Returns:
+        (dict of word -> [occurrences, files, first file], files read,
+        characters read)
+    """
+    found = {}
+    occurrences = collections.Counter()
+    read = 0
+    size = 0
+    for path in paths:
+        try:
+            with open(path, encoding="utf-8", errors="replace") as f:
+                text = f.read()
+        except OSError as e:
+            print("Error reading %s: %s" % (path, e), file=sys.stderr)
+            continue
+        read += 1
+        size += len(text)
+        tokens = _TOKEN_RE.findall(prose(text).replace("\u2019", "'"))
+        occurrences.update(tokens)
+        unique = set(tokens)
+        for token in unique.difference(_VERDICTS):
+            parts = _VERDICTS[token] = unknown_parts(token, _WORDS, _FILTER)
+            if parts:
+                _UNKNOWN.add(token)
+        in_file = set()
+        for token in unique.intersection(_UNKNOWN):
+            in_file.update(_VERDICTS[token])
+        for part in in_file:
+            entry = found.get(part)
+            if entry is None:
+                entry = found[part] = [0, 0, path]
+            entry[1] += 1
+    for token in _UNKNOWN.intersection(occurrences):
+        for part in _VERDICTS[token]:
+            found[part][0] += occurrences[token]
+    return found, read, size
+
+
+def collect_files(paths, extensions=CORPUS_EXTENSIONS):
+    """Yield the corpus files below the paths, skipping hidden directories.
+
+    Fixtures below .vale are hidden, as they are in .vale.ini.
+    """
+    for path in paths:
+        if not os.path.isdir(path):
+            yield path
+            continue
+        for dirpath, dirnames, filenames in os.walk(path):
+            dirnames[:] = sorted(d for d in dirnames if not d.startswith("."))
+            for filename in sorted(filenames):
+                if filename.lower().endswith(extensions):
+                    yield os.path.join(dirpath, filename)
+
+
+def batches(files, batch_bytes=BATCH_BYTES):
+    """Group files into lists of about batch_bytes bytes."""
+    batch = []
+    size = 0
+    for path in files:
+        batch.append(path)
+        try:
+            size += os.path.getsize(path)
+        except OSError:
+            pass
+        if size >= batch_bytes:
+            yield batch
+            batch = []
+            size = 0
+    if batch:
+        yield batch
+
+
+def rank(found, min_files=1, min_count=1):
+    """Return (word, occurrences, files, first file) rows, best first."""
+    rows = [(word, count, files, example)
+            for word, (count, files, example) in found.items()
+            if files >= min_files and count >= min_count]
+    rows.sort(key=lambda row: (-row[2], -row[1], row[0]))
+    return rows
+
+
+def write_report(rows, out, fmt):
+    if fmt == "json":
+        json.dump([{"word": word, "occurrences": count, "files": files,
+                    "example": example}
+                   for word, count, files, example in rows], out, indent=2)
+        out.write("\n")
+    elif fmt == "words":
+        for row in rows:
+            out.write("%s\n" % row[0])
+    elif fmt == "tsv":
+        out.write("word\toccurrences\tfiles\texample\n")
+        for row in rows:
+            out.write("%s\t%d\t%d\t%s\n" % row)
+    else:
+        width = max([len(row[0]) for row in rows] + [4])
+        out.write("%7s %11s  %-*s  %s\n" % (
+            "Files", "Occurrences", width, "Word", "Example"))
+        for word, count, files, example in rows:
+            out.write("%7d %11d  %-*s  %s\n" % (
+                files, count, width, word, example))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "paths", nargs="+", metavar="PATH",
+        help="AsciiDoc file or directory to harvest",
+    )
+    parser.add_argument(
+        "--dictionary", action="append", metavar="DIC",
+        help="base Hunspell .dic file, with its .aff file next to it "
+             "(repeatable, default: the system en_US dictionary)",
+    )
+    parser.add_argument(
+        "-j", "--jobs", type=int, default=os.cpu_count() or 1, metavar="N",
+        help="number of worker processes (default: number of CPUs)",
+    )
+    parser.add_argument(
+        "--min-files", type=int, default=1, metavar="N",
+        help="only report words found in at least N files (default: 1)",
+    )
+    parser.add_argument(
+        "--min-count", type=int, default=1, metavar="N",
+        help="only report words found at least N times (default: 1)",
+    )
+    parser.add_argument(
+        "--limit", type=int, default=0, metavar="N",
+        help="report at most N words (default: all)",
+    )
+    parser.add_argument(
+        "--format", choices=("text", "tsv", "json", "words"), default="text",
+        help="report format; words lists one word per line, as in "
+             "wordlist.txt (default: text)",
+    )
+    parser.add_argument(
+        "-o", "--output", metavar="FILE",
+        help="write the report to FILE instead of standard output",
+    )
+    args = parser.parse_args(argv)
+
+    dictionaries = args.dictionary or base_dictionaries()
+    if not dictionaries:
+        print("No en_US dictionary found: common English words will be "
+              "reported. Pass one with --dictionary.", file=sys.stderr)
+    words = frozenset(hunspell_dictionary.load_words(
+        [REDHAT_DICTIONARY] + dictionaries))
+    word_filter = load_filter()
+
+    found = {}
+    files = 0
+    size = 0
+    start = time.monotonic()
+    with multiprocessing.Pool(
+            max(1, args.jobs), initializer=_init_worker,
+            initargs=(words, word_filter)) as pool:
+        for batch_found, batch_files, batch_size in pool.imap_unordered(
+                _harvest_batch, batches(collect_files(args.paths))):
+            size += batch_size
+            files += batch_files
+            for word, (count, in_files, example) in batch_found.items():
+                entry = found.get(word)
+                if entry is None:
+                    found[word] = [count, in_files, example]
+                else:
+                    entry[0] += count
+                    entry[1] += in_files
+                    entry[2] = min(entry[2], example)
+    elapsed = time.monotonic() - start
+
+    rows = rank(found, args.min_files, args.min_count)
+    if args.limit > 0:
+        rows = rows[:args.limit]
+    out = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+    try:
+        write_report(rows, out, args.format)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+    print("Harvested %d files (%.1f MB) in %.1fs: %d unknown words, "
+          "%d reported" % (files, size / 1e6, elapsed, len(found), len(rows)),
+          file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
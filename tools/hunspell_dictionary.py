@@ -0,0 +1,173 @@
+# Copyright (c) 2024 Red Hat, Inc.
+# This program and the accompanying materials are made
+# available under the terms of the Eclipse Public License 2.0
+# which is available at https://www.eclipse.org/legal/epl-2.0/
+#
+# SPDX-License-Identifier: EPL-2.0
+"""Read Hunspell dictionaries and expand them into the words they accept.
+
+Shared by tools/build-dictionary.py and tools/harvest-spelling.py. Only
+the parts of the affix format that the Red Hat and en_US dictionaries
+use are supported: PFX and SFX classes with conditions and cross
+products, and the FLAG modes. Compounding and the other Hunspell
+options are ignored.
+"""
+
+import os
+import re
+
+
+def parse_aff(text):
+    """Return the affix classes defined in the text of a Hunspell .aff file.
+
+    Returns:
+        dict of flag -> (kind, cross_product, [(strip, affix, condition)])
+        where kind is "PFX" or "SFX".
+    """
+    classes = {}
+    for line in text.splitlines():
+        fields = line.split()
+        if len(fields) < 4 or fields[0] not in ("PFX", "SFX"):
+            continue
+        kind, flag = fields[0], fields[1]
+        if flag not in classes:
+            classes[flag] = (kind, fields[2] == "Y", [])
+            continue
+        strip = "" if fields[2] == "0" else fields[2]
+        affix = "" if fields[3] == "0" else fields[3]
+        condition = fields[4] if len(fields) > 4 else "."
+        classes[flag][2].append((strip, affix, condition))
+    return classes
+
+
+_CONDITIONS = {}
+
+
+def _condition_matches(condition, kind, word):
+    """Check a Hunspell affix condition against the start or end of a word."""
+    key = (condition, kind)
+    if key not in _CONDITIONS:
+        parts = re.findall(r"\[[^\]]*\]|.", condition)
+        pattern = "".join(p if p.startswith("[") or p == "." else re.escape(p)
+                          for p in parts)
+        _CONDITIONS[key] = re.compile(
+            "(?:%s)$" % pattern if kind == "SFX" else "^(?:%s)" % pattern)
+    return _CONDITIONS[key].search(word) is not None
+
+
+def _applies(word, kind, rule):
+    strip, _, condition = rule
+    if kind == "SFX" and not word.endswith(strip):
+        return False
+    if kind == "PFX" and not word.startswith(strip):
+        return False
+    return len(word) > len(strip) and _condition_matches(condition, kind, word)
+
+
+def expand_entry(word, flags, classes):
+    """Return every form a .dic entry generates, without case folding.
+
+    Follows Hunspell: each suffix and each prefix applies to the root,
+    and a prefix and a suffix combine only when both classes allow
+    cross products.
+    """
+    forms = {word}
+    suffixes = []
+    prefixes = []
+    for flag in flags:
+        if flag not in classes:
+            continue
+        kind, cross, rules = classes[flag]
+        for rule in rules:
+            if _applies(word, kind, rule):
+                (suffixes if kind == "SFX" else prefixes).append((rule, cross))
+    for (strip, affix, _), _ in suffixes:
+        forms.add(word[:len(word) - len(strip)] + affix)
+    for (strip, affix, _), _ in prefixes:
+        forms.add(affix + word[len(strip):])
+    for (p_strip, p_affix, _), p_cross in prefixes:
+        for (s_strip, s_affix, _), s_cross in suffixes:
+            if p_cross and s_cross and len(word) > len(p_strip) + len(s_strip):
+                forms.add(p_affix + word[len(p_strip):len(word) - len(s_strip)]
+                          + s_affix)
+    return forms
+
+
+def expand(entries, classes):
+    """Return the set of words accepted by a list of (word, flags) entries."""
+    words = set()
+    for word, flags in entries:
+        words.update(expand_entry(word, flags, classes))
+    return words
+
+
+def parse_entry(entry):
+    word, _, flags = entry.partition("/")
+    return word, flags
+
+
+def _flag_mode(aff_text):
+    m = re.search(r"^FLAG\s+(\S+)", aff_text, re.M)
+    return m.group(1) if m else "char"
+
+
+def _split_flags(flags, mode):
+    if mode == "long":
+        return [flags[i:i + 2] for i in range(0, len(flags), 2)]
+    if mode == "num":
+        return [f for f in flags.split(",") if f]
+    return list(flags)
+
+
+def read_dic(dic_path, aff_text=""):
+    """Return the (word, flags) entries of a .dic file.
+
+    The count on the first line and the morphological fields after
+    the word are skipped. Flags are split following the FLAG option
+    of the affix file.
+    """
+    mode = _flag_mode(aff_text)
+    entries = []
+    with open(dic_path, encoding="utf-8", errors="replace") as f:
+        for number, line in enumerate(f):
+            fields = line.split()
+            if not fields or (number == 0 and fields[0].isdigit()):
+                continue
+            word, flags = parse_entry(fields[0].replace("\\/", "\0"))
+            entries.append((word.replace("\0", "/"), _split_flags(flags, mode)))
+    return entries
+
+
+def load_words(dic_paths):
+    """Return the set of words accepted by one or more .dic files.
+
+    Each .dic file is expanded with the .aff file of the same name, or
+    without affixes if there is none.
+    """
+    words = set()
+    for dic_path in dic_paths:
+        aff_path = os.path.splitext(dic_path)[0] + ".aff"
+        aff_text = ""
+        if os.path.exists(aff_path):
+            with open(aff_path, encoding="utf-8", errors="replace") as f:
+                aff_text = f.read()
+        words.update(expand(read_dic(dic_path, aff_text), parse_aff(aff_text)))
+    return words
+
+
+def accepts(word, words):
+    """Check a word the way Hunspell does, including its case variants.
+
+    A capitalized word is also accepted in lowercase, and a word in
+    capitals in lowercase or capitalized.
+    """
+    if word in words:
+        return True
+    if not word[:1].isupper():
+        return False
+    lowered = word[0].lower() + word[1:]
+    if lowered in words:
+        return True
+    if word.isupper():
+        return word.lower() in words or word.capitalize() in words
+    return False
@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+# Copyright (c) 2024 Red Hat, Inc.
+# This program and the accompanying materials are made
+# available under the terms of the Eclipse Public License 2.0
+# which is available at https://www.eclipse.org/legal/epl-2.0/
+#
+# SPDX-License-Identifier: EPL-2.0
+"""Lint only the blocks of AsciiDoc files changed since a Git ref.
+
+Parses the hunks of `git diff --unified=0` and finds the blocks that
+contain the changed lines: runs of non-blank lines, with delimited
+blocks such as listings, examples and tables kept whole. Vale lints
+an excerpt of each file made of these blocks, --context blocks on each
+side for the rules that look at neighbouring blocks, the document
+header, and the preprocessor directives, attribute entries and Vale
+comments of the whole file. Every other line is blanked, so the
+excerpt keeps the line numbers of the original file and alerts need
+no mapping back.
+
+Only the alerts in the changed blocks are reported, so a one-line fix
+in a long assembly is checked in the time it takes to lint one
+paragraph. Added files are linted in full.
+
+Usage:
+    tools/lint-changed-hunks.py [--base REF] [--context N]
+                                [--output line|JSON]
+                                [--minAlertLevel LEVEL] [--no-exit]
+                                [PATH...]
+"""
+
+import argparse
+import ast
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+
+import vale_cache
+
+# Blocks kept on each side of a changed block.
+DEFAULT_CONTEXT = 1
+
+_FILE_RE = re.compile(r"^\+\+\+ (?:b/(.*)|(\".*\"))$")
+_HUNK_RE = re.compile(r"^@@ -\d+(?:,\d+)? \+(\d+)(?:,(\d+))? @@")
+# Delimiters of blocks that may contain blank lines.
+_DELIMITER_RE = re.compile(
+    r"^(-{4,}|\.{4,}|={4,}|\*{4,}|_{4,}|\+{4,}|/{4,}|`{3,}|[|!,:]={3,})[ \t]*$")
+# Lines that change how the rest of the file is read: conditionals,
+# attribute entries and comments that turn Vale rules off or on.
+_CONTROL_RE = re.compile(
+    r"^(?:(?:ifn?def|ifeval|endif)::|:[\w-]+!?:|.*<!-- vale |//\s*vale )")
+
+
+def _unquote(path):
+    """Decode a path that Git quoted because of special characters."""
+    return ast.literal_eval("b" + path).decode("utf-8", "surrogateescape")
+
+
+def changed_lines(base, paths=(), cwd=None):
+    """Return the lines of each AsciiDoc file changed since base.
+
+    Deleted lines mark the lines around them as changed.
+
+    Returns:
+        dict of file -> set of 1-based line numbers, or None for files
+        added since base.
+    """
+    command = ["git", "-c", "core.quotePath=false", "diff", "--unified=0",
+               "--no-color", "--no-ext-diff", "--no-renames",
+               "--diff-filter=AM", base, "--"] + (list(paths) or ["*.adoc"])
+    result = subprocess.run(command, cwd=cwd, stdout=subprocess.PIPE,
+                            stderr=subprocess.PIPE)
+    if result.returncode != 0:
+        raise vale_cache.ValeError("git diff failed: %s" % result.stderr.decode(
+            "utf-8", "replace").strip())
+    changes = {}
+    path = None
+    added = False
+    for line in result.stdout.decode("utf-8", "surrogateescape").splitlines():
+        if line.startswith("diff --git "):
+            path = None
+            added = False
+        elif line.startswith("new file mode"):
+            added = True
+        elif line.startswith("+++ "):
+            match = _FILE_RE.match(line)
+            if match:
+                path = match.group(1) or _unquote(match.group(2))
+                changes[path] = None if added else set()
+        elif path is not None and changes[path] is not None:
+            match = _HUNK_RE.match(line)
+            if match:
+                start = int(match.group(1))
+                count = int(match.group(2) or 1)
+                if count:
+                    changes[path].update(range(start, start + count))
+                else:
+                    changes[path].update((start, start + 1))
+    return changes
+
+
+def blocks(lines):
+    """Return the (start, end) line ranges of the blocks of a document.
+
+    A block is a run of non-blank lines. Delimited blocks, which may
+    contain blank lines, are kept whole up to their closing delimiter.
+    Ranges are 0-based and end-exclusive.
+    """
+    ranges = []
+    i = 0
+    while i < len(lines):
+        if not lines[i].strip():
+            i += 1
+            continue
+        start = i
+        while i < len(lines) and lines[i].strip():
+            match = _DELIMITER_RE.match(lines[i])
+            i += 1
+            if match:
+                delimiter = match.group(1)
+                while i < len(lines) and lines[i].rstrip() != delimiter:
+                    i += 1
+                i += 1
+        ranges.append((start, min(i, len(lines))))
+    return ranges
+
+
+def excerpt(lines, changed, context=DEFAULT_CONTEXT):
+    """Return the excerpt of a document to lint for its changed lines.
+
+    Args:
+        lines: lines of the document, with their line endings.
+        changed: set of 1-based changed line numbers.
+        context: number of blocks kept on each side of a changed block.
+
+    Returns:
+        (excerpt lines, list of (first, last) 1-based line ranges of
+        the changed blocks)
+    """
+    ranges = blocks(lines)
+    touched = [index for index, (start, end) in enumerate(ranges)
+               if any(line in changed for line in range(start + 1, end + 1))]
+    kept = set(touched)
+    for index in touched:
+        kept.update(range(max(0, index - context),
+                          min(len(ranges), index + context + 1)))
+    if ranges:
+        kept.add(0)
+    keep = [False] * len(lines)
+    for index in kept:
+        start, end = ranges[index]
+        keep[start:end] = [True] * (end - start)
+    text = [line if keep[number] or _CONTROL_RE.match(line)
+            else ("\n" if line.endswith("\n") else "")
+            for number, line in enumerate(lines)]
+    return text, [(ranges[index][0] + 1, ranges[index][1]) for index in touched]
+
+
+def lint_changes(changes, config, vale="vale", jobs=1, context=DEFAULT_CONTEXT,
+                 root="."):
+    """Lint the changed blocks of files and return their alerts.
+
+    Returns:
+        (dict of file -> alerts in changed blocks, dict of file -> error)
+    """
+    work_dir = tempfile.mkdtemp(prefix="vale-hunks-")
+    try:
+        targets = {}
+        changed_blocks = {}
+        for path, changed in sorted(changes.items()):
+            source = os.path.join(root, path)
+            if changed is None:
+                targets[source] = path
+                continue
+            with open(source, encoding="utf-8", errors="surrogateescape") as f:
+                lines = f.readlines()
+            text, changed_blocks[path] = excerpt(lines, changed, context)
+            if not changed_blocks[path]:
+                continue
+            # Keep the relative path, as .vale.ini sections match on it.
+            target = os.path.join(work_dir, path)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            with open(target, "w", encoding="utf-8", errors="surrogateescape") as f:
+                f.writelines(text)
+            targets[target] = path
+        results, failures = vale_cache.run_vale(list(targets), config, vale, jobs)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    alerts = {}
+    for target, file_alerts in results.items():
+        path = targets.get(target, target)
+        if path in changed_blocks:
+            file_alerts = [alert for alert in file_alerts
+                           if any(first <= alert.get("Line", 0) <= last
+                                  for first, last in changed_blocks[path])]
+        alerts[path] = file_alerts
+    return alerts, {targets.get(target, target): error
+                    for target, error in failures.items()}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("paths", nargs="*", metavar="PATH",
+                        help="limit the diff to these paths (default: *.adoc)")
+    parser.add_argument(
+        "--base",
+        default="origin/%s" % (os.environ.get("GITHUB_BASE_REF") or "main"),
+        help="Git ref to compare with (default: origin/$GITHUB_BASE_REF "
+             "or origin/main)",
+    )
+    parser.add_argument(
+        "--context", type=int, default=DEFAULT_CONTEXT, metavar="N",
+        help="blocks linted on each side of a changed block "
+             "(default: %(default)s)",
+    )
+    parser.add_argument("--config", metavar="INI",
+                        help="Vale configuration file (default: as Vale finds it)")
+    parser.add_argument("--output", choices=("line", "JSON"), default="line",
+                        help="output format (default: line)")
+    parser.add_argument("--minAlertLevel", choices=vale_cache.LEVELS,
+                        help="only report alerts of at least this level")
+    parser.add_argument("--no-exit", action="store_true",
+                        help="exit with status 0 even if there are errors")
+    parser.add_argument(
+        "-j", "--jobs", type=int, default=os.cpu_count() or 1, metavar="N",
+        help="number of Vale processes (default: number of CPUs)",
+    )
+    parser.add_argument("--vale", default="vale", help="Vale executable")
+    args = parser.parse_args(argv)
+
+    try:
+        root = subprocess.run(
+            ["git", "rev-parse", "--show-toplevel"], stdout=subprocess.PIPE,
+            check=True).stdout.decode("utf-8").strip()
+        changes = changed_lines(args.base, args.paths)
+        if not changes:
+            print("No files added or modified in comparison to %s" % args.base,
+                  file=sys.stderr)
+            return 0
+        config = vale_cache.find_config(args.config)
+        results, failures = lint_changes(changes, config, args.vale, args.jobs,
+                                         args.context, root)
+    except (vale_cache.ValeError, subprocess.CalledProcessError, OSError) as e:
+        print(str(e), file=sys.stderr)
+        return 2
+    for path, error in sorted(failures.items()):
+        print("Vale failed on %s: %s" % (path, error), file=sys.stderr)
+    print("Linted the changes of %d files since %s" % (len(changes), args.base),
+          file=sys.stderr)
+
+    if args.minAlertLevel:
+        results = vale_cache.filter_level(results, args.minAlertLevel)
+    results = {path: results[path] for path in sorted(results) if results[path]}
+    if args.output == "JSON":
+        json.dump(results, sys.stdout, indent=2, ensure_ascii=False)
+        sys.stdout.write("\n")
+    else:
+        vale_cache.write_line(results, sys.stdout)
+    if failures:
+        return 2
+    errors = any(alert.get("Severity") == "error"
+                 for alerts in results.values() for alert in alerts)
+    return 1 if errors and not args.no_exit else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
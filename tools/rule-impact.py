@@ -0,0 +1,739 @@
+#!/usr/bin/env python3
+# Copyright (c) 2024 Red Hat, Inc.
+# This program and the accompanying materials are made
+# available under the terms of the Eclipse Public License 2.0
+# which is available at https://www.eclipse.org/legal/epl-2.0/
+#
+# SPDX-License-Identifier: EPL-2.0
+"""List the corpus files that a change to the Vale styles can affect.
+
+Compares the rule YAML files of .vale/styles with --base and extracts
+the patterns that were added, removed or changed: swap keys and tokens
+whose entry changed, or every pattern of a rule whose other settings
+changed. Each pattern is reduced to the words it requires, as a query
+of alternatives of words that must all appear. A word is matched in
+full, as a prefix, a suffix or anywhere in a corpus token, depending
+on whether the pattern bounds it.
+
+The queries run against an inverted index of the corpus kept in an
+SQLite database: the files of each lowercased token, and the tokens of
+each trigram for the partial words. The index is updated incrementally:
+only the files whose size, modification time and content changed are
+read again.
+
+The candidate files are listed, or linted with --lint, through the
+cache of tools/vale_cache.py, reporting the alerts of the changed rules
+only. Unless --config is given, Vale lints with the styles of this
+repository, whatever .vale.ini the corpus has. Patterns that require
+no word, and rules such as spelling or script rules that have no
+patterns to index, make every file a candidate. Attribute references
+are indexed as written, not expanded.
+
+Usage:
+    tools/rule-impact.py [--base REF] [--index FILE] [--jobs N]
+                         [--lint [--config INI] [--output line|JSON]]
+                         CORPUS
+"""
+
+import argparse
+import array
+import hashlib
+import json
+import multiprocessing
+import os
+import re
+import sqlite3
+import subprocess
+import sys
+import time
+
+import yaml
+
+try:
+    from re import _constants as sre_constants
+    from re import _parser as sre_parse
+except ImportError:  # Python < 3.11
+    import sre_constants
+    import sre_parse
+
+import vale_cache
+from vale_patterns import REPO_ROOT, python_pattern, rule_patterns
+
+STYLES_PATH = ".vale/styles"
+DEFAULT_INDEX_DIR = os.path.join(
+    os.path.expanduser("~"), ".cache", "vale-at-red-hat", "impact")
+CORPUS_EXTENSIONS = (".adoc", ".asciidoc", ".md")
+
+# Bump when the index layout or tokenization changes.
+INDEX_VERSION = 1
+
+# Alternatives kept in the query of one pattern. Beyond this, the
+# conjunct with the most alternatives is dropped, which only widens
+# the query.
+MAX_ALTERNATIVES = 64
+
+# Characters of a class expanded into alternatives, as in [- ].
+MAX_CLASS_CHARS = 4
+
+# Below this many files to read, the index is updated in one process.
+PARALLEL_FILES = 256
+
+# Rule fields whose entries are compared one by one. A change to any
+# other field affects every pattern of the rule.
+_ENTRY_FIELDS = {"substitution": "swap", "existence": "tokens"}
+
+# Rules that only report text that their patterns match. Other rules,
+# such as capitalization rules or occurrence rules with a minimum, also
+# report text that does not match, and spelling, metric and script
+# rules have no patterns to index.
+_MATCHING_RULES = ("existence", "substitution", "repetition", "conditional",
+                   "sequence", "occurrence")
+
+_REPEATS = tuple(op for op in (
+    sre_constants.MAX_REPEAT, sre_constants.MIN_REPEAT,
+    getattr(sre_constants, "POSSESSIVE_REPEAT", None)) if op is not None)
+_TOKEN_RE = re.compile(r"\w+")
+
+# Word positions in a query: the word is a whole token, starts or ends
+# one, or may appear anywhere in one.
+EXACT, PREFIX, SUFFIX, INFIX = "exact", "prefix", "suffix", "infix"
+
+
+# ---------------------------------------------------------------------------
+# Rule changes
+# ---------------------------------------------------------------------------
+
+def _git(args):
+    result = subprocess.run(["git"] + args, cwd=REPO_ROOT,
+                            stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    if result.returncode != 0:
+        raise vale_cache.ValeError("git %s failed: %s" % (
+            " ".join(args), result.stderr.decode("utf-8", "replace").strip()))
+    return result.stdout.decode("utf-8")
+
+
+def changed_rule_files(base):
+    """Return the rule files of the styles changed or added since base."""
+    paths = _git(["diff", "--name-only", "--no-renames", base, "--", STYLES_PATH])
+    paths += _git(["ls-files", "--others", "--exclude-standard", "--", STYLES_PATH])
+    return sorted(path for path in set(paths.splitlines()) if path.endswith(".yml"))
+
+
+def _load_rule(text):
+    try:
+        data = yaml.safe_load(text) if text else None
+    except yaml.YAMLError:
+        return None
+    return data if isinstance(data, dict) else None
+
+
+def _patterns(data):
+    """Return the entry -> regex map of a rule, without combined regexes."""
+    if data is None:
+        return {}
+    return {(kind, source): regex for kind, source, regex in rule_patterns(data)
+            if kind != "rule"}
+
+
+def _entries(data):
+    field = _ENTRY_FIELDS.get(data.get("extends")) if data else None
+    entries = data.get(field) if field else None
+    if isinstance(entries, dict):
+        return {str(key): value for key, value in entries.items()}
+    if isinstance(entries, list):
+        return {str(entry): True for entry in entries}
+    return {}
+
+
+def changed_patterns(old, new):
+    """Return the regexes of a rule whose matches may change.
+
+    Args:
+        old: rule data at the base ref, or None if the rule is new.
+        new: rule data in the working tree, or None if it was removed.
+
+    Returns:
+        (list of regexes, whether the rule has changes that no regex
+        covers, such as spelling or script rules)
+    """
+    old_patterns = _patterns(old)
+    new_patterns = _patterns(new)
+    for data in (old, new):
+        if data is not None and (data.get("extends") not in _MATCHING_RULES
+                                 or data.get("min")):
+            return [], True
+    field = _ENTRY_FIELDS.get((new or old).get("extends"))
+    settings_changed = (
+        old is None or new is None
+        or {k: v for k, v in old.items() if k != field}
+        != {k: v for k, v in new.items() if k != field})
+    if settings_changed:
+        regexes = set(old_patterns.values()) | set(new_patterns.values())
+        return sorted(regexes), not regexes
+    old_entries = _entries(old)
+    new_entries = _entries(new)
+    regexes = set()
+    for key, regex in old_patterns.items():
+        if old_entries.get(key[1]) != new_entries.get(key[1]):
+            regexes.add(regex)
+    for key, regex in new_patterns.items():
+        if old_entries.get(key[1]) != new_entries.get(key[1]):
+            regexes.add(regex)
+    return sorted(regexes), False
+
+
+def style_changes(base):
+    """Return the changed rules and their regexes since base.
+
+    Returns:
+        dict of rule name, such as RedHat.TermsErrors -> (list of
+        regexes, whether every file is affected)
+    """
+    changes = {}
+    for path in changed_rule_files(base):
+        style = os.path.basename(os.path.dirname(path))
+        rule = "%s.%s" % (style, os.path.splitext(os.path.basename(path))[0])
+        try:
+            old_text = _git(["show", "%s:%s" % (base, path)])
+        except vale_cache.ValeError:
+            old_text = None
+        full_path = os.path.join(REPO_ROOT, path)
+        new_text = None
+        if os.path.exists(full_path):
+            with open(full_path, encoding="utf-8") as f:
+                new_text = f.read()
+        old, new = _load_rule(old_text), _load_rule(new_text)
+        if old is None and new is None:
+            continue
+        regexes, everything = changed_patterns(old, new)
+        if regexes or everything:
+            changes[rule] = (regexes, everything)
+    return changes
+
+
+# ---------------------------------------------------------------------------
+# Queries
+# ---------------------------------------------------------------------------
+
+def _char_choices(av):
+    """Return the lowercased characters a small class matches, or None."""
+    chars = set()
+    for op, value in av:
+        if op != sre_constants.LITERAL:
+            return None
+        chars.add(chr(value).lower())
+    return chars if len(chars) <= MAX_CLASS_CHARS else None
+
+
+def _product(left, right):
+    """Return the concatenations of two sets of strings, or None if too many."""
+    if left is None or right is None or len(left) * len(right) > MAX_ALTERNATIVES:
+        return None
+    return {a + b for a in left for b in right}
+
+
+def _expand(seq):
+    """Return the strings a parsed regex matches, if they are few.
+
+    Word boundaries and anchors become spaces, and lookarounds are
+    ignored, which only widens the set.
+
+    Returns:
+        set of lowercased strings, or None.
+    """
+    strings = {""}
+    for op, av in seq:
+        if op == sre_constants.LITERAL:
+            choices = {chr(av).lower()}
+        elif op == sre_constants.IN:
+            choices = _char_choices(av)
+        elif op == sre_constants.AT and av != sre_constants.AT_NON_BOUNDARY:
+            choices = {" "}
+        elif op in (sre_constants.ASSERT, sre_constants.ASSERT_NOT):
+            continue
+        elif op == sre_constants.SUBPATTERN:
+            choices = _expand(av[-1])
+        elif op == sre_constants.BRANCH:
+            choices = set()
+            for child in av[1]:
+                expanded = _expand(child)
+                if expanded is None:
+                    return None
+                choices |= expanded
+        elif op in _REPEATS and av[1] == 1:
+            choices = _expand(av[2])
+            if choices is not None and av[0] == 0:
+                choices.add("")
+        else:
+            return None
+        strings = _product(strings, choices)
+        if strings is None:
+            return None
+    return strings
+
+
+def _combine(conjuncts):
+    """Return the alternatives of the conjunction of queries."""
+    result = {frozenset()}
+    for query in sorted(conjuncts, key=len):
+        product = {left | right for left in result for right in query}
+        if len(product) <= MAX_ALTERNATIVES:
+            result = product
+    return result
+
+
+def _query(seq):
+    """Return the literal strings a parsed regex requires.
+
+    Consecutive items that match few strings are expanded together, so
+    the words of a swap key keep the word boundaries around it.
+
+    Returns:
+        set of alternatives, each a frozenset of lowercased strings
+        that must all appear. A space in a string marks a word
+        boundary. The empty alternative matches anything.
+    """
+    conjuncts = []
+    run = {""}
+    for item in seq:
+        op, av = item
+        if op in (sre_constants.ASSERT, sre_constants.ASSERT_NOT):
+            continue
+        expanded = _product(run, _expand([item]))
+        if expanded is not None:
+            run = expanded
+            continue
+        conjuncts.append({frozenset([text]) for text in run})
+        run = {""}
+        choices = _expand([item])
+        if choices is not None:
+            run = choices
+        elif op == sre_constants.SUBPATTERN:
+            conjuncts.append(_query(av[-1]))
+        elif op == getattr(sre_constants, "ATOMIC_GROUP", None):
+            conjuncts.append(_query(av))
+        elif op == sre_constants.BRANCH:
+            alternatives = set()
+            for child in av[1]:
+                alternatives |= _query(child)
+            conjuncts.append(alternatives)
+        elif op in _REPEATS and av[0] >= 1:
+            conjuncts.append(_query(av[2]))
+    conjuncts.append({frozenset([text]) for text in run})
+    result = _combine(conjuncts)
+    return {frozenset()} if frozenset() in result else result
+
+
+def _words(text):
+    """Yield the (word, position) constraints of a required string."""
+    for match in _TOKEN_RE.finditer(text):
+        starts = match.start() > 0
+        ends = match.end() < len(text)
+        position = (EXACT if starts and ends else PREFIX if starts
+                    else SUFFIX if ends else INFIX)
+        yield match.group(), position
+
+
+def regex_query(regex):
+    """Return the words a Vale regex requires, as a query.
+
+    Returns:
+        list of alternatives, each a sorted tuple of (word, position)
+        pairs, or None if the regex may match without any word.
+    """
+    pattern, notes = python_pattern(regex)
+    if pattern is None:
+        return None
+    try:
+        parsed = sre_parse.parse(pattern)
+    except re.error:
+        return None
+    alternatives = []
+    for strings in _query(list(parsed)):
+        words = set()
+        for text in strings:
+            words.update(_words(text))
+        if not words:
+            return None
+        alternatives.append(tuple(sorted(words)))
+    return sorted(set(alternatives)) or None
+
+
+# ---------------------------------------------------------------------------
+# Index
+# ---------------------------------------------------------------------------
+
+def _ids(blob):
+    ids = array.array("I")
+    ids.frombytes(blob)
+    return ids
+
+
+def _trigrams(token):
+    return {token[i:i + 3] for i in range(len(token) - 2)}
+
+
+def collect_files(corpus, extensions=CORPUS_EXTENSIONS):
+    """Yield the corpus files, relative to corpus, skipping hidden directories."""
+    for dirpath, dirnames, filenames in os.walk(corpus):
+        dirnames[:] = sorted(d for d in dirnames if not d.startswith("."))
+        for filename in sorted(filenames):
+            if filename.lower().endswith(extensions):
+                yield os.path.relpath(os.path.join(dirpath, filename), corpus)
+
+
+def _tokenize(path):
+    """Return the digest and the lowercased tokens of a file."""
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+    except OSError:
+        return path, None, ()
+    text = data.decode("utf-8", "replace").lower()
+    return path, hashlib.sha256(data).hexdigest(), set(_TOKEN_RE.findall(text))
+
+
+class CorpusIndex:
+    """Inverted token and trigram index of a corpus, in SQLite.
+
+    Files get a new id each time their content changes. The postings of
+    a token are the ids of the files it appeared in, and ids of files
+    that changed or were removed are filtered out when querying, until
+    the index is compacted.
+    """
+
+    def __init__(self, path):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.db = sqlite3.connect(path)
+        self.db.executescript("""
+            CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+            CREATE TABLE IF NOT EXISTS files (
+                id INTEGER PRIMARY KEY AUTOINCREMENT, path TEXT UNIQUE,
+                mtime INTEGER, size INTEGER, digest TEXT);
+            CREATE TABLE IF NOT EXISTS tokens (
+                id INTEGER PRIMARY KEY, token TEXT UNIQUE, postings BLOB);
+            CREATE TABLE IF NOT EXISTS trigrams (gram TEXT PRIMARY KEY, tokens BLOB);
+        """)
+        version = self._meta("version")
+        if version is not None and version != str(INDEX_VERSION):
+            with self.db:
+                for table in ("files", "tokens", "trigrams", "meta"):
+                    self.db.execute("DELETE FROM %s" % table)
+        self._set_meta("version", INDEX_VERSION)
+        self._vocabulary = None
+        self._live = None
+
+    def _meta(self, key):
+        row = self.db.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, key, value):
+        with self.db:
+            self.db.execute("INSERT OR REPLACE INTO meta VALUES (?, ?)", (key, str(value)))
+
+    def update(self, corpus, jobs=1):
+        """Index the files of corpus that changed since the last update.
+
+        Returns:
+            (files in the corpus, files read again)
+        """
+        known = {path: (file_id, mtime, size, digest) for file_id, path, mtime, size, digest
+                 in self.db.execute("SELECT id, path, mtime, size, digest FROM files")}
+        stats = {}
+        stale = []
+        for path in collect_files(corpus):
+            try:
+                st = os.stat(os.path.join(corpus, path))
+            except OSError:
+                continue
+            stats[path] = (st.st_mtime_ns, st.st_size)
+            if path not in known or known[path][1:3] != stats[path]:
+                stale.append(path)
+
+        removed = [known[path][0] for path in known if path not in stats]
+        added = {}
+        refreshed = []
+        pool = None
+        if jobs > 1 and len(stale) >= PARALLEL_FILES:
+            pool = multiprocessing.Pool(jobs)
+        try:
+            full_paths = [os.path.join(corpus, path) for path in stale]
+            results = (pool.imap_unordered(_tokenize, full_paths, 16) if pool
+                       else map(_tokenize, full_paths))
+            for full_path, digest, tokens in results:
+                path = os.path.relpath(full_path, corpus)
+                if digest is None:
+                    continue
+                if path in known and known[path][3] == digest:
+                    refreshed.append(path)
+                    continue
+                added[path] = (digest, tokens)
+        finally:
+            if pool is not None:
+                pool.close()
+                pool.join()
+
+        with self.db:
+            for path in refreshed:
+                self.db.execute("UPDATE files SET mtime = ?, size = ? WHERE path = ?",
+                                stats[path] + (path,))
+            removed += [known[path][0] for path in added if path in known]
+            self.db.executemany("DELETE FROM files WHERE id = ?",
+                                [(file_id,) for file_id in removed])
+            postings = {}
+            for path, (digest, tokens) in sorted(added.items()):
+                file_id = self.db.execute(
+                    "INSERT INTO files (path, mtime, size, digest) VALUES (?, ?, ?, ?)",
+                    (path,) + stats[path] + (digest,)).lastrowid
+                for token in tokens:
+                    postings.setdefault(token, array.array("I")).append(file_id)
+            self._add_postings(postings)
+            dead = int(self._meta("dead") or 0) + len(removed)
+        self._set_meta("dead", dead)
+        if dead > len(stats):
+            self.compact()
+        self._vocabulary = None
+        self._live = None
+        return len(stats), len(added)
+
+    def _add_postings(self, postings):
+        token_ids = dict(self.db.execute("SELECT token, id FROM tokens"))
+        next_id = max(token_ids.values(), default=0) + 1
+        grams = {}
+        for token, ids in postings.items():
+            token_id = token_ids.get(token)
+            if token_id is None:
+                token_id = next_id
+                next_id += 1
+                self.db.execute("INSERT INTO tokens VALUES (?, ?, ?)",
+                                (token_id, token, ids.tobytes()))
+                for gram in _trigrams(token):
+                    grams.setdefault(gram, array.array("I")).append(token_id)
+            else:
+                self._append("tokens", "postings", "id", token_id, ids)
+        for gram, ids in grams.items():
+            self._append("trigrams", "tokens", "gram", gram, ids)
+
+    def _append(self, table, column, key_column, key, ids):
+        """Append ids to the id array stored in a row, creating the row."""
+        row = self.db.execute("SELECT %s FROM %s WHERE %s = ?" % (
+            column, table, key_column), (key,)).fetchone()
+        if row is None:
+            self.db.execute("INSERT INTO %s (%s, %s) VALUES (?, ?)" % (
+                table, key_column, column), (key, ids.tobytes()))
+        else:
+            self.db.execute("UPDATE %s SET %s = ? WHERE %s = ?" % (
+                table, column, key_column), (bytes(row[0]) + ids.tobytes(), key))
+
+    def compact(self):
+        """Drop the ids of changed and removed files from the postings."""
+        live = self.live_ids()
+        with self.db:
+            rows = self.db.execute("SELECT id, postings FROM tokens").fetchall()
+            for token_id, blob in rows:
+                ids = array.array("I", (i for i in _ids(blob) if i in live))
+                self.db.execute("UPDATE tokens SET postings = ? WHERE id = ?",
+                                (ids.tobytes(), token_id))
+        self._set_meta("dead", 0)
+        self.db.execute("VACUUM")
+
+    def live_ids(self):
+        return {row[0] for row in self.db.execute("SELECT id FROM files")}
+
+    def paths(self, ids=None):
+        """Return the paths of the given file ids, or of every file."""
+        rows = self.db.execute("SELECT id, path FROM files")
+        return sorted(path for file_id, path in rows if ids is None or file_id in ids)
+
+    def _tokens_for(self, word, position):
+        """Return the ids of the tokens that satisfy a word constraint."""
+        if self._vocabulary is None:
+            self._vocabulary = dict(self.db.execute("SELECT token, id FROM tokens"))
+            self._by_id = {token_id: token for token, token_id in self._vocabulary.items()}
+        if position == EXACT:
+            token_id = self._vocabulary.get(word)
+            return [token_id] if token_id is not None else []
+        if len(word) >= 3:
+            candidates = None
+            for gram in sorted(_trigrams(word)):
+                row = self.db.execute("SELECT tokens FROM trigrams WHERE gram = ?",
+                                      (gram,)).fetchone()
+                ids = set(_ids(row[0])) if row else set()
+                candidates = ids if candidates is None else candidates & ids
+                if not candidates:
+                    return []
+            tokens = ((self._by_id[token_id], token_id) for token_id in candidates)
+        else:
+            tokens = self._vocabulary.items()
+        if position == PREFIX:
+            return [token_id for token, token_id in tokens if token.startswith(word)]
+        if position == SUFFIX:
+            return [token_id for token, token_id in tokens if token.endswith(word)]
+        return [token_id for token, token_id in tokens if word in token]
+
+    def files_for(self, word, position):
+        """Return the ids of the files with a token that satisfies a word."""
+        files = set()
+        for token_id in self._tokens_for(word, position):
+            row = self.db.execute("SELECT postings FROM tokens WHERE id = ?",
+                                  (token_id,)).fetchone()
+            files.update(_ids(row[0]))
+        return files
+
+    def candidates(self, query, cache=None):
+        """Return the ids of the live files that may match a query."""
+        cache = {} if cache is None else cache
+        files = set()
+        for words in query:
+            matching = None
+            for word in sorted(words, key=lambda word: -len(word[0])):
+                if word not in cache:
+                    cache[word] = self.files_for(*word)
+                matching = cache[word] if matching is None else matching & cache[word]
+                if not matching:
+                    break
+            files |= matching or set()
+        if self._live is None:
+            self._live = self.live_ids()
+        return files & self._live
+
+    def close(self):
+        self.db.close()
+
+
+def impacted_files(index, changes):
+    """Return the ids of the files that changed rules may report on.
+
+    Returns:
+        set of file ids, or None if every file may be affected.
+    """
+    candidates = set()
+    cache = {}
+    for rule, (regexes, everything) in sorted(changes.items()):
+        if everything:
+            print("%s: the change is not limited to patterns, every file "
+                  "may be affected" % rule, file=sys.stderr)
+            return None
+        for regex in regexes:
+            query = regex_query(regex)
+            if query is None:
+                print("%s: %s requires no word, every file may match"
+                      % (rule, regex), file=sys.stderr)
+                return None
+            candidates |= index.candidates(query, cache)
+    return candidates
+
+
+def default_index(corpus):
+    return os.path.join(DEFAULT_INDEX_DIR, "%s.sqlite" % hashlib.sha256(
+        os.path.abspath(corpus).encode("utf-8")).hexdigest()[:16])
+
+
+def write_config(path):
+    """Write a Vale configuration that lints with the styles of this repository.
+
+    The corpus's own .vale.ini usually points at a copy of the RedHat
+    package synced into the corpus, not at the changed rules.
+
+    Returns:
+        path
+    """
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(vale_cache.VALE_CONFIG.format(
+            styles=os.path.join(REPO_ROOT, STYLES_PATH)))
+    return path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("corpus", metavar="CORPUS", help="directory to index")
+    parser.add_argument(
+        "--base", default=os.environ.get("BASE_REF", "upstream/main"),
+        help="Git ref of the styles to compare with (default: $BASE_REF or "
+             "upstream/main)",
+    )
+    parser.add_argument(
+        "--index", metavar="FILE",
+        help="index database (default: one per corpus in %s)" % DEFAULT_INDEX_DIR,
+    )
+    parser.add_argument(
+        "-j", "--jobs", type=int, default=os.cpu_count() or 1, metavar="N",
+        help="number of processes reading files, and of Vale processes "
+             "(default: number of CPUs)",
+    )
+    parser.add_argument("--lint", action="store_true",
+                        help="lint the candidate files and report the alerts "
+                             "of the changed rules")
+    parser.add_argument("--config", metavar="INI",
+                        help="Vale configuration file for --lint (default: one "
+                             "with the styles of this repository)")
+    parser.add_argument("--output", choices=("line", "JSON"), default="line",
+                        help="output format of --lint (default: line)")
+    parser.add_argument("--vale", default="vale", help="Vale executable")
+    args = parser.parse_args(argv)
+
+    try:
+        changes = style_changes(args.base)
+    except vale_cache.ValeError as e:
+        print(str(e), file=sys.stderr)
+        return 2
+    if not changes:
+        print("No rules changed since %s" % args.base, file=sys.stderr)
+        return 0
+
+    start = time.monotonic()
+    index_path = args.index or default_index(args.corpus)
+    index = CorpusIndex(index_path)
+    try:
+        total, read = index.update(args.corpus, args.jobs)
+        indexed = time.monotonic() - start
+        patterns = sum(len(regexes) for regexes, everything in changes.values())
+        candidates = impacted_files(index, changes)
+        files = index.paths(candidates)
+    finally:
+        index.close()
+    print("%d patterns changed in %s: %d of %d files may match "
+          "(index updated in %.1fs, %d files re-indexed)" % (
+              patterns, ", ".join(sorted(changes)), len(files), total, indexed, read),
+          file=sys.stderr)
+
+    paths = [os.path.join(args.corpus, path) for path in files]
+    if not args.lint:
+        for path in paths:
+            print(path)
+        return 0
+    if not paths:
+        return 0
+
+    result_cache = vale_cache.ResultCache(
+        os.environ.get("VALE_CACHE_DIR") or vale_cache.DEFAULT_CACHE_DIR)
+    try:
+        if args.config:
+            config = vale_cache.find_config(args.config)
+        else:
+            # Next to the index, so that the cache keys of the corpus
+            # files, relative to the configuration, stay the same.
+            config = write_config(os.path.splitext(index_path)[0] + ".vale.ini")
+        results, hits, failures = vale_cache.lint(paths, config, result_cache,
+                                                  args.vale, args.jobs)
+    except (vale_cache.ValeError, OSError) as e:
+        print(str(e), file=sys.stderr)
+        return 2
+    finally:
+        result_cache.close()
+    for path, error in sorted(failures.items()):
+        print("Vale failed on %s: %s" % (path, error), file=sys.stderr)
+    results = {path: [alert for alert in results[path] if alert.get("Check") in changes]
+               for path in sorted(results)}
+    results = {path: alerts for path, alerts in results.items() if alerts}
+    if args.output == "JSON":
+        json.dump(results, sys.stdout, indent=2, ensure_ascii=False)
+        sys.stdout.write("\n")
+    else:
+        vale_cache.write_line(results, sys.stdout)
+    return 2 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,877 @@
+#!/usr/bin/env python3
+# Copyright (c) 2024 Red Hat, Inc.
+# This program and the accompanying materials are made
+# available under the terms of the Eclipse Public License 2.0
+# which is available at https://www.eclipse.org/legal/epl-2.0/
+#
+# SPDX-License-Identifier: EPL-2.0
+"""Evaluate generated Schematron rules over DITA in-process.
+
+lxml.isoschematron only supports XSLT 1.0, so the matches() and
+tokenize() based rules generated by tools/vale-to-schematron.py never
+fire outside a full DITA-OT run. This module loads the generated .sch
+files and evaluates them directly over lxml trees:
+
+- sch:rule contexts are XPath 1.0 and are compiled with lxml.
+- sch:let, sch:report and sch:assert expressions are compiled from the
+  XPath 2.0 subset the generator emits (matches(), tokenize(), let,
+  some/every, ranges, predicates and the usual string functions) into
+  Python closures, with every regex precompiled once.
+
+Findings are SVRL-compatible and can be serialized as SVRL or JSON.
+Expressions outside the supported subset are reported as unsupported
+and skipped rather than guessed at.
+
+Usage:
+    tools/schematron_engine.py [--sch FILE ...] [--format text|json|svrl] DITA...
+"""
+
+import argparse
+import collections
+import json
+import math
+import os
+import re
+import sys
+
+from lxml import etree
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+OUTPUT_DIR = os.path.join(REPO_ROOT, "schematron", "output")
+DEFAULT_SCHEMA = os.path.join(OUTPUT_DIR, "RedHat-all.sch")
+
+SCH_NS = "http://purl.oclc.org/dsdl/schematron"
+SCH = "{%s}" % SCH_NS
+SVRL_NS = "http://purl.oclc.org/dsdl/svrl"
+SVRL = "{%s}" % SVRL_NS
+
+Finding = collections.namedtuple(
+    "Finding", "kind pattern context test role location message",
+)
+
+
+class UnsupportedExpression(Exception):
+    """Raised when an expression is outside the supported XPath subset."""
+
+
+# ---------------------------------------------------------------------------
+# Regular expressions
+# ---------------------------------------------------------------------------
+
+_REGEX_CACHE = {}
+
+
+def _convert_dollar_anchors(pattern):
+    """Turn unescaped $ outside character classes into \\Z.
+
+    Without the m flag, XPath $ only matches at the end of the string,
+    while Python $ also matches before a trailing newline.
+    """
+    out = []
+    in_class = False
+    i = 0
+    while i < len(pattern):
+        ch = pattern[i]
+        if ch == "\\":
+            out.append(pattern[i:i + 2])
+            i += 2
+            continue
+        if ch == "[":
+            in_class = True
+        elif ch == "]":
+            in_class = False
+        elif ch == "$" and not in_class:
+            ch = "\\Z"
+        out.append(ch)
+        i += 1
+    return "".join(out)
+
+
+def compile_regex(pattern, flags=""):
+    """Compile an XPath 2.0 regex and flags string into a Python regex.
+
+    Compiled regexes are cached, so a pattern shared by a sch:let and
+    its guarded reports is only compiled once.
+
+    \\w and \\W follow Python's Unicode definition, which is close to
+    but not identical to the XML Schema one.
+    """
+    key = (pattern, flags)
+    if key in _REGEX_CACHE:
+        return _REGEX_CACHE[key]
+
+    py_flags = 0
+    source = pattern
+    if "q" in flags:
+        source = re.escape(source)
+    else:
+        if "x" in flags:
+            source = re.sub(r"\s", "", source)
+        if "m" not in flags:
+            source = _convert_dollar_anchors(source)
+    if "i" in flags:
+        py_flags |= re.IGNORECASE
+    if "s" in flags:
+        py_flags |= re.DOTALL
+    if "m" in flags:
+        py_flags |= re.MULTILINE
+
+    try:
+        compiled = re.compile(source, py_flags)
+    except re.error as e:
+        raise UnsupportedExpression("invalid regex '%s': %s" % (pattern, e))
+    _REGEX_CACHE[key] = compiled
+    return compiled
+
+
+# ---------------------------------------------------------------------------
+# XPath 2.0 subset
+# ---------------------------------------------------------------------------
+
+_TOKEN_RE = re.compile(r"""
+    \s*(?:
+      (?P<string>'(?:[^']|'')*'|"(?:[^"]|"")*")
+    | (?P<number>\d+(?:\.\d*)?|\.\d+)
+    | (?P<var>\$[A-Za-z_][\w.\-]*)
+    | (?P<name>[A-Za-z_][\w.\-]*)
+    | (?P<op>//|:=|!=|<=|>=|[()\[\],=<>+\-*/.])
+    )""", re.VERBOSE)
+
+
+def _tokenize_expression(expr):
+    """Split an expression into (kind, value) tokens."""
+    tokens = []
+    pos = 0
+    expr = expr.rstrip()
+    while pos < len(expr):
+        m = _TOKEN_RE.match(expr, pos)
+        if not m or m.end() == pos:
+            raise UnsupportedExpression(
+                "unexpected character at %d in: %s" % (pos, expr))
+        kind = m.lastgroup
+        value = m.group(kind)
+        if kind == "string":
+            quote = value[0]
+            value = value[1:-1].replace(quote * 2, quote)
+        tokens.append((kind, value))
+        pos = m.end()
+    tokens.append(("end", None))
+    return tokens
+
+
+def _atomize(value):
+    """Return the first item of a sequence, or the value itself."""
+    if isinstance(value, list):
+        return value[0] if value else None
+    return value
+
+
+def _string(value):
+    """XPath string() of a value."""
+    value = _atomize(value)
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, float):
+        if value.is_integer():
+            return str(int(value))
+        return repr(value)
+    return str(value)
+
+
+def _number(value):
+    """XPath number() of a value."""
+    value = _atomize(value)
+    if isinstance(value, bool):
+        return 1.0 if value else 0.0
+    if isinstance(value, (int, float)):
+        return float(value)
+    try:
+        return float(str(value).strip())
+    except (TypeError, ValueError):
+        return float("nan")
+
+
+def _boolean(value):
+    """XPath effective boolean value."""
+    if value is True or value is False:
+        return value
+    if isinstance(value, list):
+        return bool(value)
+    if isinstance(value, (int, float)):
+        return value != 0 and not math.isnan(value)
+    return value != ""
+
+
+def _as_sequence(value):
+    return value if isinstance(value, list) else [value]
+
+
+_COMPARATORS = {
+    "=": lambda a, b: a == b,
+    "!=": lambda a, b: a != b,
+    "<": lambda a, b: a < b,
+    "<=": lambda a, b: a <= b,
+    ">": lambda a, b: a > b,
+    ">=": lambda a, b: a >= b,
+}
+
+
+def _general_compare(op, left, right):
+    """XPath general comparison: true if any pair of items compares."""
+    compare = _COMPARATORS[op]
+    for a in _as_sequence(left):
+        for b in _as_sequence(right):
+            if isinstance(a, (int, float)) or isinstance(b, (int, float)):
+                a_val, b_val = _number(a), _number(b)
+            else:
+                a_val, b_val = _string(a), _string(b)
+            if compare(a_val, b_val):
+                return True
+    return False
+
+
+def _split_on_regex(text, regex):
+    """XPath tokenize(): split text on every match of regex."""
+    if text == "":
+        return []
+    parts = []
+    start = 0
+    for m in regex.finditer(text):
+        if m.end() == m.start():
+            raise UnsupportedExpression("tokenize() regex matches empty string")
+        parts.append(text[start:m.start()])
+        start = m.end()
+    parts.append(text[start:])
+    return parts
+
+
+def _regex_function(name, args, env):
+    """Evaluate matches()/tokenize() with regex compilation."""
+    text = _string(args[0](env))
+    flags = _string(args[2](env)) if len(args) > 2 else ""
+    regex = compile_regex(_string(args[1](env)), flags)
+    if name == "matches":
+        return regex.search(text) is not None
+    return _split_on_regex(text, regex)
+
+
+def _normalize_space(value):
+    return " ".join(_string(value).split())
+
+
+def _translate(text, src, dst):
+    table = {}
+    for i, ch in enumerate(src):
+        if ord(ch) not in table:
+            table[ord(ch)] = dst[i] if i < len(dst) else None
+    return text.translate(table)
+
+
+# name: (min args, max args, implementation over evaluated arguments)
+_FUNCTIONS = {
+    "not": (1, 1, lambda a: not _boolean(a[0])),
+    "true": (0, 0, lambda a: True),
+    "false": (0, 0, lambda a: False),
+    "boolean": (1, 1, lambda a: _boolean(a[0])),
+    "count": (1, 1, lambda a: float(len(_as_sequence(a[0])))),
+    "exists": (1, 1, lambda a: bool(_as_sequence(a[0]))),
+    "empty": (1, 1, lambda a: not _as_sequence(a[0])),
+    "string": (1, 1, lambda a: _string(a[0])),
+    "string-length": (1, 1, lambda a: float(len(_string(a[0])))),
+    "normalize-space": (1, 1, lambda a: _normalize_space(a[0])),
+    "lower-case": (1, 1, lambda a: _string(a[0]).lower()),
+    "upper-case": (1, 1, lambda a: _string(a[0]).upper()),
+    "contains": (2, 2, lambda a: _string(a[1]) in _string(a[0])),
+    "starts-with": (2, 2, lambda a: _string(a[0]).startswith(_string(a[1]))),
+    "ends-with": (2, 2, lambda a: _string(a[0]).endswith(_string(a[1]))),
+    "concat": (2, None, lambda a: "".join(_string(x) for x in a)),
+    "translate": (3, 3, lambda a: _translate(
+        _string(a[0]), _string(a[1]), _string(a[2]))),
+}
+
+
+class _ExpressionCompiler:
+    """Recursive-descent compiler from the XPath subset to closures.
+
+    Each compiled closure takes an environment dict holding variable
+    bindings plus '.' (the context item as a string) and '.node' (the
+    context element, used by .//text()).
+    """
+
+    def __init__(self, expr):
+        self.expr = expr
+        self.tokens = _tokenize_expression(expr)
+        self.pos = 0
+
+    def compile(self):
+        fn = self.expr_single()
+        if self.peek()[0] != "end":
+            raise UnsupportedExpression(
+                "unexpected '%s' in: %s" % (self.peek()[1], self.expr))
+        return fn
+
+    # token helpers
+
+    def peek(self, offset=0):
+        return self.tokens[self.pos + offset]
+
+    def next(self):
+        token = self.tokens[self.pos]
+        self.pos += 1
+        return token
+
+    def at(self, kind, value=None):
+        token = self.peek()
+        return token[0] == kind and (value is None or token[1] == value)
+
+    def at_keyword(self, word):
+        return self.at("name", word)
+
+    def expect(self, kind, value=None):
+        if not self.at(kind, value):
+            raise UnsupportedExpression(
+                "expected '%s' but found '%s' in: %s"
+                % (value or kind, self.peek()[1], self.expr))
+        return self.next()
+
+    # grammar
+
+    def expr_single(self):
+        if self.at_keyword("let") and self.peek(1)[0] == "var":
+            return self.let_expr()
+        if (self.at_keyword("some") or self.at_keyword("every")) \
+                and self.peek(1)[0] == "var":
+            return self.quantified_expr()
+        if self.at_keyword("if") and self.peek(1) == ("op", "("):
+            return self.if_expr()
+        return self.or_expr()
+
+    def let_expr(self):
+        self.next()
+        bindings = []
+        while True:
+            name = self.expect("var")[1][1:]
+            self.expect("op", ":=")
+            bindings.append((name, self.expr_single()))
+            if not self.at("op", ","):
+                break
+            self.next()
+        self.expect("name", "return")
+        body = self.expr_single()
+
+        def evaluate(env):
+            scope = dict(env)
+            for name, fn in bindings:
+                scope[name] = fn(scope)
+            return body(scope)
+        return evaluate
+
+    def quantified_expr(self):
+        every = self.next()[1] == "every"
+        bindings = []
+        while True:
+            name = self.expect("var")[1][1:]
+            self.expect("name", "in")
+            bindings.append((name, self.expr_single()))
+            if not self.at("op", ","):
+                break
+            self.next()
+        self.expect("name", "satisfies")
+        test = self.expr_single()
+
+        def iterate(env, index):
+            if index == len(bindings):
+                yield _boolean(test(env))
+                return
+            name, fn = bindings[index]
+            for item in _as_sequence(fn(env)):
+                scope = dict(env)
+                scope[name] = item
+                yield from iterate(scope, index + 1)
+
+        if every:
+            return lambda env: all(iterate(env, 0))
+        return lambda env: any(iterate(env, 0))
+
+    def if_expr(self):
+        self.next()
+        self.expect("op", "(")
+        cond = self.expr_single()
+        self.expect("op", ")")
+        self.expect("name", "then")
+        then = self.expr_single()
+        self.expect("name", "else")
+        otherwise = self.expr_single()
+        return lambda env: then(env) if _boolean(cond(env)) else otherwise(env)
+
+    def or_expr(self):
+        left = self.and_expr()
+        while self.at_keyword("or"):
+            self.next()
+            right = self.and_expr()
+            left = (lambda l, r: lambda env: bool(_boolean(l(env)) or _boolean(r(env))))(left, right)
+        return left
+
+    def and_expr(self):
+        left = self.comparison_expr()
+        while self.at_keyword("and"):
+            self.next()
+            right = self.comparison_expr()
+            left = (lambda l, r: lambda env: _boolean(l(env)) and _boolean(r(env)))(left, right)
+        return left
+
+    def comparison_expr(self):
+        left = self.range_expr()
+        token = self.peek()
+        if token[0] == "op" and token[1] in _COMPARATORS:
+            self.next()
+            right = self.range_expr()
+            op = token[1]
+            return lambda env: _general_compare(op, left(env), right(env))
+        return left
+
+    def range_expr(self):
+        left = self.additive_expr()
+        if self.at_keyword("to"):
+            self.next()
+            right = self.additive_expr()
+
+            def evaluate(env):
+                start, end = _number(left(env)), _number(right(env))
+                if math.isnan(start) or math.isnan(end):
+                    return []
+                return [float(i) for i in range(int(start), int(end) + 1)]
+            return evaluate
+        return left
+
+    def additive_expr(self):
+        left = self.multiplicative_expr()
+        while self.at("op", "+") or self.at("op", "-"):
+            op = self.next()[1]
+            right = self.multiplicative_expr()
+            if op == "+":
+                left = (lambda l, r: lambda env: _number(l(env)) + _number(r(env)))(left, right)
+            else:
+                left = (lambda l, r: lambda env: _number(l(env)) - _number(r(env)))(left, right)
+        return left
+
+    def multiplicative_expr(self):
+        left = self.unary_expr()
+        while self.at("op", "*") or self.at_keyword("div") or self.at_keyword("mod"):
+            op = self.next()[1]
+            right = self.unary_expr()
+            if op == "*":
+                left = (lambda l, r: lambda env: _number(l(env)) * _number(r(env)))(left, right)
+            elif op == "div":
+                left = (lambda l, r: lambda env: _number(l(env)) / _number(r(env)))(left, right)
+            else:
+                left = (lambda l, r: lambda env: math.fmod(_number(l(env)), _number(r(env))))(left, right)
+        return left
+
+    def unary_expr(self):
+        if self.at("op", "-"):
+            self.next()
+            operand = self.unary_expr()
+            return lambda env: -_number(operand(env))
+        return self.postfix_expr()
+
+    def postfix_expr(self):
+        primary = self.primary_expr()
+        while self.at("op", "["):
+            self.next()
+            predicate = self.expr_single()
+            self.expect("op", "]")
+            primary = self._filter(primary, predicate)
+        return primary
+
+    @staticmethod
+    def _filter(sequence_fn, predicate):
+        def evaluate(env):
+            items = _as_sequence(sequence_fn(env))
+            kept = []
+            for position, item in enumerate(items, 1):
+                scope = dict(env)
+                scope["."] = item
+                scope[".node"] = None
+                value = predicate(scope)
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    if value == position:
+                        kept.append(item)
+                elif _boolean(value):
+                    kept.append(item)
+            return kept
+        return evaluate
+
+    def primary_expr(self):
+        kind, value = self.peek()
+        if kind == "string":
+            self.next()
+            fn = lambda env: value
+            fn.literal = value
+            return fn
+        if kind == "number":
+            self.next()
+            number = float(value)
+            return lambda env: number
+        if kind == "var":
+            self.next()
+            name = value[1:]
+
+            def lookup(env):
+                if name not in env:
+                    raise UnsupportedExpression("unbound variable $%s" % name)
+                return env[name]
+            return lookup
+        if kind == "op" and value == ".":
+            self.next()
+            if self.at("op", "//"):
+                return self.descendant_text()
+            fn = lambda env: env["."]
+            fn.is_context = True
+            return fn
+        if kind == "op" and value == "(":
+            self.next()
+            if self.at("op", ")"):
+                self.next()
+                return lambda env: []
+            items = [self.expr_single()]
+            while self.at("op", ","):
+                self.next()
+                items.append(self.expr_single())
+            self.expect("op", ")")
+            if len(items) == 1:
+                return items[0]
+            return lambda env: [v for fn in items for v in _as_sequence(fn(env))]
+        if kind == "name" and self.peek(1) == ("op", "("):
+            return self.function_call()
+        raise UnsupportedExpression("unsupported '%s' in: %s" % (value, self.expr))
+
+    @staticmethod
+    def _precompiled_regex_function(name, args):
+        """matches()/tokenize() with literal pattern and flags.
+
+        The regex is compiled once here instead of on every call, and
+        matches(., ...) reads the context string directly.
+        """
+        flags = args[2].literal if len(args) > 2 else ""
+        regex = compile_regex(args[1].literal, flags)
+        text_fn = args[0]
+        if name == "tokenize":
+            return lambda env: _split_on_regex(_string(text_fn(env)), regex)
+        search = regex.search
+        if getattr(text_fn, "is_context", False):
+            return lambda env: search(env["."]) is not None
+        return lambda env: search(_string(text_fn(env))) is not None
+
+    def descendant_text(self):
+        """.//text(): the text nodes below the context element."""
+        self.expect("op", "//")
+        self.expect("name", "text")
+        self.expect("op", "(")
+        self.expect("op", ")")
+
+        def evaluate(env):
+            node = env.get(".node")
+            if node is None:
+                raise UnsupportedExpression(".//text() on a non-node item")
+            return [str(t) for t in _TEXT_NODES(node)]
+        return evaluate
+
+    def function_call(self):
+        name = self.next()[1]
+        self.expect("op", "(")
+        args = []
+        if not self.at("op", ")"):
+            args.append(self.expr_single())
+            while self.at("op", ","):
+                self.next()
+                args.append(self.expr_single())
+        self.expect("op", ")")
+
+        if name in ("matches", "tokenize"):
+            if len(args) not in (2, 3):
+                raise UnsupportedExpression("%s() takes 2 or 3 arguments" % name)
+            if all(hasattr(fn, "literal") for fn in args[1:]):
+                return self._precompiled_regex_function(name, args)
+            return lambda env: _regex_function(name, args, env)
+
+        if name in ("string", "normalize-space", "string-length") and not args:
+            args = [lambda env: env["."]]
+        if name not in _FUNCTIONS:
+            raise UnsupportedExpression("unsupported function %s()" % name)
+        low, high, impl = _FUNCTIONS[name]
+        if len(args) < low or (high is not None and len(args) > high):
+            raise UnsupportedExpression("wrong number of arguments to %s()" % name)
+        return lambda env: impl([fn(env) for fn in args])
+
+
+_TEXT_NODES = etree.XPath(".//text()")
+_STRING_VALUE = etree.XPath("string(.)")
+
+
+def compile_guarded_expression(expr):
+    """Split "$name and rest" into a guard variable and compiled rest.
+
+    Reports generated with --optimize are guarded by a sch:let holding a
+    combined regex test. Knowing the guard lets the engine skip every
+    report behind a false guard without calling into them.
+
+    Returns:
+        (guard name, compiled rest) or (None, compiled expr).
+    """
+    compiler = _ExpressionCompiler(expr)
+    kind, value = compiler.peek()
+    if kind == "var" and compiler.peek(1) == ("name", "and"):
+        compiler.pos += 2
+        rest = compiler.and_expr()
+        if compiler.peek()[0] == "end":
+            return value[1:], rest
+    return None, compile_expression(expr)
+
+
+def compile_expression(expr):
+    """Compile an XPath 2.0 subset expression into a Python callable.
+
+    Raises:
+        UnsupportedExpression: if the expression uses anything outside
+            the supported subset.
+    """
+    return _ExpressionCompiler(expr).compile()
+
+
+# ---------------------------------------------------------------------------
+# Schemas
+# ---------------------------------------------------------------------------
+
+CompiledCheck = collections.namedtuple(
+    "CompiledCheck", "index kind test role message evaluate",
+)
+
+
+class CompiledRule:
+    """A sch:rule with its context, lets and checks compiled."""
+
+    def __init__(self, rule_el):
+        self.context = rule_el.get("context")
+        self.select = etree.XPath(self.context)
+        self.lets = []
+        self.checks = []
+        self.unsupported = []
+        # Reports grouped by guard variable, in first-seen order
+        buckets = collections.OrderedDict()
+
+        for child in rule_el:
+            if child.tag == SCH + "let":
+                self.lets.append(
+                    (child.get("name"), compile_expression(child.get("value"))))
+            elif child.tag in (SCH + "report", SCH + "assert"):
+                kind = "report" if child.tag == SCH + "report" else "assert"
+                test = child.get("test")
+                message = " ".join("".join(child.itertext()).split())
+                try:
+                    if kind == "report":
+                        guard, evaluate = compile_guarded_expression(test)
+                    else:
+                        guard, evaluate = None, compile_expression(test)
+                except UnsupportedExpression as e:
+                    self.unsupported.append((test, str(e)))
+                    continue
+                check = CompiledCheck(len(self.checks), kind, test,
+                                      child.get("role", ""), message, evaluate)
+                self.checks.append(check)
+                buckets.setdefault(guard, []).append(check)
+
+        self.buckets = list(buckets.items())
+        self.has_guards = len(self.buckets) > 1 or None not in buckets
+
+
+class CompiledSchema:
+    """All patterns of one or more Schematron files, ready to evaluate.
+
+    Usage:
+        schema = load_schema([".../RedHat-all.sch"])
+        findings = schema.validate(etree.parse("topic.dita"))
+    """
+
+    def __init__(self, title=""):
+        self.title = title
+        self.patterns = []
+        self.unsupported = []
+
+    def add_schema(self, root):
+        """Compile every sch:pattern below a sch:schema root element."""
+        if not self.title:
+            title_el = root.find(SCH + "title")
+            if title_el is not None and title_el.text:
+                self.title = title_el.text
+        for pattern_el in root.iter(SCH + "pattern"):
+            pattern_id = pattern_el.get("id", "")
+            rules = []
+            for rule_el in pattern_el.findall(SCH + "rule"):
+                try:
+                    rule = CompiledRule(rule_el)
+                except UnsupportedExpression as e:
+                    self.unsupported.append(
+                        (pattern_id, rule_el.get("context"), str(e)))
+                    continue
+                for test, reason in rule.unsupported:
+                    self.unsupported.append((pattern_id, test, reason))
+                rules.append(rule)
+            self.patterns.append((pattern_id, rules))
+
+    def validate(self, doc):
+        """Evaluate every pattern over a parsed document.
+
+        Within a pattern, each node is only handled by the first rule
+        whose context matches it, as in ISO Schematron.
+
+        Args:
+            doc: lxml ElementTree or root element.
+        Returns:
+            List of Finding tuples in pattern, rule and document order.
+        """
+        tree = doc if isinstance(doc, etree._ElementTree) else doc.getroottree()
+        root = tree.getroot()
+        string_values = {}
+        findings = []
+
+        for pattern_id, rules in self.patterns:
+            seen = set()
+            for rule in rules:
+                for node in rule.select(root):
+                    if not isinstance(node, etree._Element) or node in seen:
+                        continue
+                    seen.add(node)
+                    if node not in string_values:
+                        string_values[node] = str(_STRING_VALUE(node))
+                    env = {".": string_values[node], ".node": node}
+                    for name, fn in rule.lets:
+                        env[name] = fn(env)
+                    fired = []
+                    for guard, checks in rule.buckets:
+                        if guard is not None:
+                            if guard not in env:
+                                raise UnsupportedExpression(
+                                    "unbound variable $%s" % guard)
+                            if not _boolean(env[guard]):
+                                continue
+                        for check in checks:
+                            result = _boolean(check.evaluate(env))
+                            if result == (check.kind == "report"):
+                                fired.append(check)
+                    if not fired:
+                        continue
+                    if rule.has_guards:
+                        fired.sort(key=lambda c: c.index)
+                    location = tree.getpath(node)
+                    for check in fired:
+                        findings.append(Finding(
+                            "successful-report" if check.kind == "report"
+                            else "failed-assert",
+                            pattern_id, rule.context, check.test,
+                            check.role, location, check.message))
+        return findings
+
+
+def load_schema(paths):
+    """Load and compile one or more .sch files into a CompiledSchema."""
+    schema = CompiledSchema()
+    for path in paths:
+        schema.add_schema(etree.parse(path).getroot())
+    return schema
+
+
+# ---------------------------------------------------------------------------
+# Output
+# ---------------------------------------------------------------------------
+
+def findings_to_svrl(findings, schema, document=None):
+    """Build an svrl:schematron-output element from findings."""
+    root = etree.Element(SVRL + "schematron-output", nsmap={"svrl": SVRL_NS})
+    root.set("title", schema.title)
+    root.set("schemaVersion", "iso")
+
+    by_pattern = collections.OrderedDict(
+        (pattern_id, []) for pattern_id, _ in schema.patterns)
+    for finding in findings:
+        by_pattern.setdefault(finding.pattern, []).append(finding)
+
+    for pattern_id, pattern_findings in by_pattern.items():
+        active = etree.SubElement(root, SVRL + "active-pattern")
+        active.set("id", pattern_id)
+        if document:
+            active.set("document", document)
+        fired = None
+        for finding in pattern_findings:
+            if fired != (finding.context, finding.location):
+                fired = (finding.context, finding.location)
+                etree.SubElement(root, SVRL + "fired-rule").set(
+                    "context", finding.context)
+            el = etree.SubElement(root, SVRL + finding.kind)
+            el.set("test", finding.test)
+            el.set("location", finding.location)
+            if finding.role:
+                el.set("role", finding.role)
+            etree.SubElement(el, SVRL + "text").text = finding.message
+    return root
+
+
+def finding_to_dict(finding, document=None):
+    """Return a JSON-serializable dict for a finding."""
+    data = finding._asdict()
+    if document:
+        data["document"] = document
+    return data
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--sch", action="append", metavar="FILE",
+        help="Schematron file to load (repeatable, default: RedHat-all.sch)",
+    )
+    parser.add_argument(
+        "--format", choices=("text", "json", "svrl"), default="text",
+        help="output format (default: text)",
+    )
+    parser.add_argument("documents", nargs="+", metavar="DITA")
+    args = parser.parse_args(argv)
+    if args.format == "svrl" and len(args.documents) > 1:
+        # One SVRL document per DITA file, which does not concatenate.
+        parser.error("--format svrl takes one DITA file; use "
+                     "tools/validate-dita.py --svrl-dir DIR for several")
+
+    schema = load_schema(args.sch or [DEFAULT_SCHEMA])
+    for pattern_id, test, reason in schema.unsupported:
+        print("Skipping check in %s: %s" % (pattern_id, reason), file=sys.stderr)
+
+    total = 0
+    for path in args.documents:
+        try:
+            doc = etree.parse(path)
+        except etree.XMLSyntaxError as e:
+            print("Error parsing %s: %s" % (path, e), file=sys.stderr)
+            return 2
+        findings = schema.validate(doc)
+        total += len(findings)
+
+        if args.format == "svrl":
+            svrl = findings_to_svrl(findings, schema, document=path)
+            sys.stdout.write(etree.tostring(
+                svrl, pretty_print=True, encoding="unicode"))
+        elif args.format == "json":
+            for finding in findings:
+                print(json.dumps(finding_to_dict(finding, document=path)))
+        else:
+            for finding in findings:
+                print("%s:%s: [%s] %s" % (
+                    path, finding.location, finding.role or "report",
+                    finding.message))
+
+    return 1 if total else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,27 +1,38 @@
 #!/usr/bin/python
 
 #Import functions from ssg_lib.py
+import argparse
+
 from ssg_lib import *
 
 
 #Compares SSG glossary entries to Vale rules fixtures and outputs anything in the SSG that is not covered by the Vale fixtures. Writes the results as Vale swap terms in the form "bad: good" to the file ssg_utils/missing_ssg_terms.json. 
+#Also runs the SSG incorrect forms through the swap regexes of the substitution rules and prints how many are covered, shadowed, double-covered or uncovered; --report writes the details as JSON.
 def main():
 
+    #the SSG source can be a URL, a local zip or a local checkout; SSG_SOURCE sets the default
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--source', default=os.environ.get('SSG_SOURCE', SSG_ZIP_URL), help='URL, zip file or directory of the SSG sources')
+    parser.add_argument('--report', help='write the regex coverage of every SSG incorrect form to this JSON file')
+    parser.add_argument('--cache-dir', help='SSG snapshot cache (default: $SSG_CACHE_DIR or ~/.cache/vale-at-red-hat/ssg)')
+    parser.add_argument('--max-age', type=float, default=os.environ.get('SSG_MAX_AGE'), metavar='HOURS', help='reuse a snapshot of the source URL taken less than HOURS ago without contacting the network (default: $SSG_MAX_AGE, or always download)')
+    parser.add_argument('--offline', action='store_true', help='only use the last snapshot of the source URL, never the network')
+    args = parser.parse_args()
+
     #initialize some variables
     git_repo = git.Repo(os.path.abspath(os.getcwd()), search_parent_directories=True)
     git_root = git_repo.git.rev_parse("--show-toplevel")
     rules_dir = git_root + '/.vale/styles/RedHat'
     fixtures_dir = git_root + '/.vale/fixtures/RedHat'
     temp_dir = git_root + '/tools/ssg_utils/temp'
-    ssg_zip_url = 'https://github.com/redhat-documentation/supplementary-style-guide/archive/refs/heads/main.zip'
     adoc_dir = git_root + '/modules/reference-guide/partials'
     adoc_ref_files = ["ref_error_terms.adoc", "ref_suggestion_terms.adoc", "ref_usage_terms.adoc"]
 
-    #grab the ssg source from github and unzip it to /temp
-    get_ssg_source(temp_dir, ssg_zip_url)
+    #grab the ssg source, from the snapshot cache when its content is unchanged
+    ssg_dir, digest = get_ssg_source(temp_dir, args.source, args.cache_dir, get_max_age(args.max_age, args.offline))
 
     #scans ssg *.adoc files in terms and creates a list of incorrect word usages
-    get_ssg_terms(temp_dir)
+    get_ssg_terms(temp_dir, ssg_dir, digest, args.cache_dir)
 
     #get the current vale rules terms
     get_vale_rule_terms(temp_dir, rules_dir)
@@ -29,8 +40,20 @@ def main():
     #get the current vale rules test fixture terms
     get_vale_fixture_terms(temp_dir, fixtures_dir)
 
+    #load and index the SSG, rule and fixture terms once
+    catalog = TermCatalog.load(temp_dir)
+
     #check for new SSG entries that are potentially not included in the vale rules
-    check_new_ssg_entries(temp_dir, rules_dir, git_root)
+    check_new_ssg_entries(temp_dir, rules_dir, git_root, catalog)
+
+    #run every SSG incorrect form through the swap maps of the substitution rules
+    report = check_ssg_swap_coverage(catalog, load_swap_rules(rules_dir))
+    statuses = [r["status"] for r in report]
+    for status in ("covered", "shadowed", "double-covered", "uncovered"):
+        print("%s: %d" % (status, statuses.count(status)))
+    if args.report:
+        with open(args.report, "w", encoding='utf-8') as f:
+            json.dump(report, f, indent = 4)
 
     #remove the temp folder
     clean_up(temp_dir)
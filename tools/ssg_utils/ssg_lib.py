@@ -3,36 +3,165 @@
 # Various Python functions for parsing the Red Hat Supplementary Style Guide glossary
 # https://github.com/redhat-documentation/supplementary-style-guide
 
+import bisect
 import glob
+import hashlib
 import os
 import re
 import shutil
-import wget, zipfile
+import tempfile
+import time
+import unicodedata
+import urllib.request
+import zipfile
 import git
 import yaml
 import json
 import sys
 
+#the Vale pattern loader shared by the tools in the parent directory
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from vale_patterns import python_pattern, rule_patterns
+
+SSG_ZIP_URL = 'https://github.com/redhat-documentation/supplementary-style-guide/archive/refs/heads/main.zip'
+
+#snapshots of the SSG sources and their parsed terms are kept here, keyed by content hash
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'vale-at-red-hat', 'ssg')
+
 def clean_up(temp_dir):
     if os.path.exists(temp_dir):
         shutil.rmtree(temp_dir)
 
-def get_ssg_source(temp_dir, ssg_zip_url):
+def get_cache_dir(cache_dir=None):
+    return cache_dir or os.environ.get('SSG_CACHE_DIR') or DEFAULT_CACHE_DIR
+
+#seconds a snapshot of a URL is reused without contacting the network, from --max-age hours or --offline
+def get_max_age(max_age_hours=None, offline=False):
+    if offline:
+        return float('inf')
+    if max_age_hours is None:
+        return None
+    return max_age_hours * 3600
+
+#the sha256 of every *.adoc file and its path relative to the SSG root
+def _snapshot_digest(members):
+    digest = hashlib.sha256()
+    for name, data in sorted(members):
+        digest.update(name.encode('utf-8') + b'\0' + hashlib.sha256(data).digest())
+    return digest.hexdigest()
+
+def _dir_members(ssg_dir):
+    for path in glob.glob(os.path.join(ssg_dir, '**', '*.adoc'), recursive=True):
+        with open(path, 'rb') as f:
+            yield os.path.relpath(path, ssg_dir).replace(os.sep, '/'), f.read()
+
+#zip members without the top-level folder GitHub archives add, such as supplementary-style-guide-main/
+def _zip_members(zip_ref):
+    names = [n for n in zip_ref.namelist() if not n.endswith('/')]
+    tops = set(n.split('/', 1)[0] for n in names)
+    strip = len(tops.pop()) + 1 if len(tops) == 1 and all('/' in n for n in names) else 0
+    return [(n[strip:], n) for n in names]
+
+def snapshot_digest(ssg_dir):
+    return _snapshot_digest(_dir_members(ssg_dir))
+
+def _source_pointer(cache_dir, ssg_source):
+    name = hashlib.sha256(ssg_source.encode('utf-8')).hexdigest()
+    return os.path.join(cache_dir, 'sources', name)
+
+def _snapshot_from_zip(zip_path, cache_dir):
+    with zipfile.ZipFile(zip_path, 'r') as zip_ref:
+        members = _zip_members(zip_ref)
+        digest = _snapshot_digest((name, zip_ref.read(member))
+                                  for name, member in members if name.endswith('.adoc'))
+        snapshot_dir = os.path.join(cache_dir, 'snapshots', digest)
+        if not os.path.isdir(snapshot_dir):
+            #extract next to the final location and rename, so an interrupted run leaves no partial snapshot
+            os.makedirs(os.path.dirname(snapshot_dir), exist_ok=True)
+            partial_dir = tempfile.mkdtemp(dir=os.path.dirname(snapshot_dir))
+            root = os.path.realpath(partial_dir)
+            for name, member in members:
+                target = os.path.realpath(os.path.join(partial_dir, name))
+                if not name or not target.startswith(root + os.sep):
+                    continue
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                with zip_ref.open(member) as src, open(target, 'wb') as dst:
+                    shutil.copyfileobj(src, dst)
+            try:
+                os.rename(partial_dir, snapshot_dir)
+            except OSError:
+                #another run stored the same snapshot first
+                shutil.rmtree(partial_dir)
+    return snapshot_dir, digest
+
+def _download(url, temp_dir):
+    zip_path = os.path.join(temp_dir, 'supplementary-style-guide-main.zip')
+    with urllib.request.urlopen(url, timeout=60) as response, open(zip_path, 'wb') as f:
+        shutil.copyfileobj(response, f)
+    return zip_path
+
+#the snapshot the pointer file of a URL records, or None
+def _pointed_snapshot(pointer, cache_dir):
+    try:
+        with open(pointer, 'r', encoding='utf-8') as p:
+            digest = p.read().strip()
+    except OSError:
+        return None
+    snapshot_dir = os.path.join(cache_dir, 'snapshots', digest)
+    if not digest or not os.path.isdir(snapshot_dir):
+        return None
+    return snapshot_dir, digest
+
+#get the SSG sources from a URL, a local zip or a local directory
+#returns the directory holding the SSG *.adoc files and its content hash
+#downloaded and local zips are extracted once into the snapshot cache; without network, a URL falls back to the last snapshot taken from it
+#a URL downloaded less than max_age seconds ago is not contacted again; max_age=float('inf') never contacts the network
+def get_ssg_source(temp_dir, ssg_source=SSG_ZIP_URL, cache_dir=None, max_age=None):
+    cache_dir = get_cache_dir(cache_dir)
     if not os.path.exists(temp_dir):
         os.makedirs(temp_dir, exist_ok=True)
-    os.chdir(temp_dir)
-    r = wget.download(ssg_zip_url)
-    with zipfile.ZipFile('supplementary-style-guide-main.zip', 'r') as zip_ref:
-        zip_ref.extractall(temp_dir + '/')
+    if os.path.isdir(ssg_source):
+        return ssg_source, snapshot_digest(ssg_source)
+    if os.path.isfile(ssg_source):
+        return _snapshot_from_zip(ssg_source, cache_dir)
+    pointer = _source_pointer(cache_dir, ssg_source)
+    if max_age is not None:
+        cached = _pointed_snapshot(pointer, cache_dir)
+        if cached and time.time() - os.path.getmtime(pointer) <= max_age:
+            print('Using the cached snapshot %s of %s' % (cached[1][:12], ssg_source), file=sys.stderr)
+            return cached
+        if max_age == float('inf'):
+            raise OSError('No cached snapshot of %s to use offline' % ssg_source)
+    try:
+        zip_path = _download(ssg_source, temp_dir)
+    except OSError as e:
+        cached = _pointed_snapshot(pointer, cache_dir)
+        if not cached:
+            raise
+        print('Cannot download %s (%s), using the cached snapshot %s' % (ssg_source, e, cached[1][:12]), file=sys.stderr)
+        return cached
+    snapshot_dir, digest = _snapshot_from_zip(zip_path, cache_dir)
+    os.remove(zip_path)
+    os.makedirs(os.path.dirname(pointer), exist_ok=True)
+    with open(pointer, 'w', encoding='utf-8') as p:
+        p.write(digest + '\n')
+    return snapshot_dir, digest
+
+#parsed terms are only reused with the same parser, so changes to this file invalidate them
+def _parser_fingerprint():
+    with open(os.path.abspath(__file__), 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()[:16]
+
+def _cached_terms_path(cache_dir, digest):
+    return os.path.join(cache_dir, 'terms', digest + '-' + _parser_fingerprint() + '.json')
 
 def get_vale_rule_terms(temp_dir, rules_dir):
-    os.chdir(rules_dir)
-    with open("vale_terms.json", "w+", encoding='utf-8') as out_file:
+    with open(os.path.join(temp_dir, "vale_terms.json"), "w+", encoding='utf-8') as out_file:
         #set up the list of dicts
         vale_terms_list = []
         for file in os.listdir(rules_dir):
             if file.endswith('.yml'):
-                with open(file, 'r+', encoding='utf-8') as f:
+                with open(os.path.join(rules_dir, file), 'r+', encoding='utf-8') as f:
                     yaml_data = yaml.safe_load(f)
                     for key, value in yaml_data.items():
                         if 'swap' in key:
@@ -53,13 +182,11 @@ def get_vale_rule_terms(temp_dir, rules_dir):
         #serialize the json 
         vale_terms_json = json.dumps(vale_terms_list, indent = 4)
         out_file.write(vale_terms_json)
-    shutil.move("./vale_terms.json", temp_dir + "/vale_terms.json")
 
 def get_vale_fixture_terms(temp_dir, fixtures_dir):
-    os.chdir(fixtures_dir)
-    with open("fixture_terms.json", "w+", encoding='utf-8') as out_file:
+    with open(os.path.join(temp_dir, "fixture_terms.json"), "w+", encoding='utf-8') as out_file:
         vale_fixtures_list = []
-        for file in glob.glob("**/*.adoc", recursive=True):
+        for file in glob.glob(os.path.join(fixtures_dir, "**", "*.adoc"), recursive=True):
             with open(file, 'r+', encoding='utf-8') as w:
                 lines = w.read().splitlines()
                 for line in lines:
@@ -68,69 +195,265 @@ def get_vale_fixture_terms(temp_dir, fixtures_dir):
         #serialize the json 
         fixtures_json = json.dumps(vale_fixtures_list, indent = 4)
         out_file.write(fixtures_json)
-    shutil.move("./fixture_terms.json", temp_dir + "/fixture_terms.json")
 
-def get_ssg_terms(temp_dir):
-    os.chdir(temp_dir)
-    with open("ssg_terms.json", "w+", encoding='utf-8') as out_file:
+#line patterns of a glossary entry: an [[id]] anchor, a ==== heading on the next line, then *Field*: value lines
+_ANCHOR_RE = re.compile(r'^\[\[(.*)\]\]$')
+_ENTRY_HEADING_RE = re.compile(r'^==== (.*)$')
+_HEADING_RE = re.compile(r'^=+ ')
+_FIELD_RE = re.compile(r'^\*([^*]+)\*: ?(.*)$')
+
+#parses glossary entries line by line in a single pass
+#yields (word_id, heading, fields) for every anchored ==== heading, where fields maps each *Field* name to its value
+def parse_glossary(lines):
+    entry = None
+    anchor = None
+    for line in lines:
+        line = line.rstrip('\r\n')
+        first = line[:1]
+        #only lines starting with [, = or * can open or fill an entry
+        if first == '*':
+            anchor = None
+            m = _FIELD_RE.match(line) if entry is not None else None
+            if m:
+                entry[2].setdefault(m.group(1), m.group(2))
+        elif first == '=':
+            m = _ENTRY_HEADING_RE.match(line) if anchor is not None else None
+            if m:
+                entry = (anchor, m.group(1), {})
+            elif _HEADING_RE.match(line):
+                if entry is not None:
+                    yield entry
+                entry = None
+            anchor = None
+        elif first == '[':
+            m = _ANCHOR_RE.match(line)
+            if m:
+                if entry is not None:
+                    yield entry
+                entry = None
+            anchor = m.group(1) if m else None
+        else:
+            anchor = None
+    if entry is not None:
+        yield entry
+
+def _ssg_term(word_id, correct_form, incorrect_forms):
+    incorrect_forms = re.sub(r', ', '|', incorrect_forms)
+    #clean out yes/no image refs
+    incorrect_forms = re.sub(r'image:images\/yes\.png\[yes\] ', '', incorrect_forms)
+    incorrect_forms = re.sub(r'image:images\/no\.png\[no\] ', '', incorrect_forms)
+    correct_form = re.sub(r'image:images\/yes\.png\[yes\] ', '', correct_form)
+    correct_form = re.sub(r'image:images\/caution\.png\[with caution\] ', '', correct_form)
+    correct_form = re.sub(r' \((noun|verb|adjective|adverb|preposition)\)', '', correct_form)
+    correct_form = re.sub(r'image:images\/no\.png\[no\] ', '', correct_form)
+    #clean out other items
+    incorrect_forms = re.sub(r' \(capitalized\)', '', incorrect_forms)
+    incorrect_forms = re.sub(r', and so on', '', incorrect_forms)
+    incorrect_forms = re.sub(r' \(without trademark symbol\)', '', incorrect_forms)
+    incorrect_forms = re.sub(r' \(unless at the start of a sentence\).', '', incorrect_forms)
+    incorrect_forms = re.sub(r'^.*xref.*$', '', incorrect_forms)
+    #clean regex special characters hack - this needs to be handled correctly
+    incorrect_forms = re.sub(r'\/', ' ', incorrect_forms)
+    incorrect_forms = re.sub(r'\^', '', incorrect_forms)
+    incorrect_forms = re.sub(r'\(', '\\(', incorrect_forms)
+    incorrect_forms = re.sub(r'\)', '\\)', incorrect_forms)
+    #write the terms into the dict
+    return {"term": {"correct_term": correct_form, "word_id": word_id, "incorrect_forms": incorrect_forms}}
+
+#scans the SSG *.adoc files in ssg_dir, by default temp_dir, and writes temp_dir/ssg_terms.json
+#keeps the entries marked *Use it*: yes that list *Incorrect forms*
+#with the content hash of ssg_dir, the terms parsed from an identical snapshot are reused from the cache
+def get_ssg_terms(temp_dir, ssg_dir=None, digest=None, cache_dir=None):
+    ssg_dir = ssg_dir or temp_dir
+    terms_path = os.path.join(temp_dir, "ssg_terms.json")
+    cached_path = _cached_terms_path(get_cache_dir(cache_dir), digest) if digest else None
+    if cached_path and os.path.exists(cached_path):
+        shutil.copyfile(cached_path, terms_path)
+        return
+    with open(terms_path, "w+", encoding='utf-8') as out_file:
         #set up the list of dicts
         ssg_terms_list = []
-        for file in glob.glob("**/*.adoc", recursive=True):
-            #file_folder = os.path.dirname(file)
-            with open(file, 'r+', encoding='utf-8') as w:
-                data = w.read()
-                #fix this! this regex is very brittle
-                data = re.findall(r'\[\[(.*)\]\]\n(====) (.*)\n\*Description\*:.*\n(.*\n){1,10}\*Use it\*: yes\n\n\*Incorrect forms\*: (.+)', data)
-                for word_usage in data:
-                    #set up the term dict
-                    ssg_term_dict = {}
-                    ssg_term_dict["term"] = {}
-                    ssg_term_dict["term"]["correct_term"] = {}
-                    ssg_term_dict["term"]["word_id"] = {}
-                    ssg_term_dict["term"]["incorrect_forms"] = {}
-                    #process the terms
-                    word_id = word_usage[0]
-                    correct_form = word_usage[2]
-                    incorrect_forms = re.sub(r', ', '|', word_usage[4])
-                    #clean out yes/no image refs
-                    incorrect_forms = re.sub(r'image:images\/yes\.png\[yes\] ', '', incorrect_forms)
-                    incorrect_forms = re.sub(r'image:images\/no\.png\[no\] ', '', incorrect_forms) 
-                    correct_form = re.sub(r'image:images\/yes\.png\[yes\] ', '', correct_form)
-                    correct_form = re.sub(r'image:images\/caution\.png\[with caution\] ', '', correct_form)
-                    correct_form = re.sub(r' \((noun|verb|adjective|adverb|preposition)\)', '', correct_form)
-                    correct_form = re.sub(r'image:images\/no\.png\[no\] ', '', correct_form)
-                    #clean out other items
-                    incorrect_forms = re.sub(r' \(capitalized\)', '', incorrect_forms)
-                    incorrect_forms = re.sub(r', and so on', '', incorrect_forms)
-                    incorrect_forms = re.sub(r' \(without trademark symbol\)', '', incorrect_forms)
-                    incorrect_forms = re.sub(r' \(unless at the start of a sentence\).', '', incorrect_forms)
-                    incorrect_forms = re.sub(r'^.*xref.*$', '', incorrect_forms)
-                    #clean regex special characters hack - this needs to be handled correctly
-                    incorrect_forms = re.sub(r'\/', ' ', incorrect_forms)
-                    incorrect_forms = re.sub(r'\^', '', incorrect_forms)
-                    incorrect_forms = re.sub(r'\(', '\\(', incorrect_forms)
-                    incorrect_forms = re.sub(r'\)', '\\)', incorrect_forms)
-                    #write the terms into the dict
-                    ssg_term_dict["term"]["word_id"] = word_id
-                    ssg_term_dict["term"]["correct_term"] = correct_form
-                    ssg_term_dict["term"]["incorrect_forms"] = incorrect_forms
-                    #append to the list
-                    ssg_terms_list.append(ssg_term_dict)
+        for file in sorted(glob.glob(os.path.join(ssg_dir, "**", "*.adoc"), recursive=True)):
+            with open(file, 'r', encoding='utf-8') as w:
+                for word_id, heading, fields in parse_glossary(w):
+                    incorrect_forms = fields.get("Incorrect forms", "").strip()
+                    if fields.get("Use it", "").strip() == "yes" and incorrect_forms:
+                        ssg_terms_list.append(_ssg_term(word_id, heading, incorrect_forms))
         #serialize the json 
         ssg_terms_json = json.dumps(ssg_terms_list, indent = 4)
-        #print(ssg_terms_json)  
         out_file.write(ssg_terms_json)
+    if cached_path:
+        os.makedirs(os.path.dirname(cached_path), exist_ok=True)
+        shutil.copyfile(terms_path, cached_path + '.tmp')
+        os.replace(cached_path + '.tmp', cached_path)
+
+#key used to join terms across the SSG, the Vale rules and the fixtures: Unicode NFC with whitespace collapsed
+def normalize_term(term):
+    return ' '.join(unicodedata.normalize('NFC', term).split())
+
+#loads the SSG terms, the Vale swap terms and the fixture lines once and indexes them by normalized correct term
+#each side is optional, so both create_ssg_refs.py and check_ssg_coverage.py can load what they need
+class TermCatalog:
+
+    def __init__(self, ssg_terms=(), vale_terms=(), fixture_lines=()):
+        self.ssg_terms = list(ssg_terms)
+        self.vale_terms = list(vale_terms)
+        self.ssg_by_correct = {}
+        for entry in self.ssg_terms:
+            self.ssg_by_correct.setdefault(normalize_term(entry["term"]["correct_term"]), []).append(entry)
+        self.fixture_lines = set(normalize_term(line) for line in fixture_lines)
+
+    #reads whichever of ssg_terms.json, vale_terms.json and fixture_terms.json exist in temp_dir
+    @classmethod
+    def load(cls, temp_dir):
+        sides = []
+        for name in ("ssg_terms.json", "vale_terms.json", "fixture_terms.json"):
+            path = os.path.join(temp_dir, name)
+            if os.path.exists(path):
+                with open(path, 'r', encoding='utf-8') as f:
+                    sides.append(json.load(f))
+            else:
+                sides.append(())
+        return cls(*sides)
+
+    #SSG entries with the same correct term, in SSG order
+    def ssg_entries(self, correct_term):
+        return self.ssg_by_correct.get(normalize_term(correct_term), [])
+
+    #(vale entry, ssg entry) for every Vale swap term that has an SSG entry, in Vale rule order
+    def vale_ssg_pairs(self):
+        for vale_entry in self.vale_terms:
+            for ssg_entry in self.ssg_entries(vale_entry["term"]["correct_term"]):
+                yield vale_entry, ssg_entry
+
+    #SSG entries whose correct term is not a line of any Vale fixture
+    def missing_ssg_entries(self):
+        return [entry for entry in self.ssg_terms
+                if normalize_term(entry["term"]["correct_term"]) not in self.fixture_lines]
+
+#compiles the swap map of a substitution rule into one combined matcher, as Vale does
+#each key is followed by an empty marker group, which closes last when the key matches, so the
+#match tells which key won; unlike a group around each key, it leaves the literal at the start
+#of each alternative visible to the regex engine, which then skips most keys in one test
+class SwapRule:
 
-def write_ref_tables(temp_dir, adoc_dir):
-    os.chdir(temp_dir)
-    #invoke json.loads() on the contents of the file, not the file path
-    with open("./ssg_terms.json", 'r') as s:
-        ssg_contents = json.loads(s.read())
-    with open("./vale_terms.json", 'r') as j:
-        vale_contents = json.loads(j.read())
+    def __init__(self, name, data):
+        self.name = name
+        self.level = data.get("level", "suggestion")
+        self.ignorecase = data.get("ignorecase", False)
+        self.swaps = [(str(k), str(v)) for k, v in (data.get("swap") or {}).items()]
+        singles = [self._compile(regex) for kind, source, regex in rule_patterns(data) if kind == "swap"]
+        #matchers are (regex, marker group index -> (swap index, first group of the key))
+        self.matchers = []
+        if None not in singles:
+            markers = {}
+            index = 1
+            for i, single in enumerate(singles):
+                markers[index + single.groups] = (i, index)
+                index += single.groups + 1
+            body = '|'.join('(?:%s)()' % key for key, value in self.swaps)
+            if not data.get("nonword", False):
+                body = r'\b(?:%s)\b' % body
+            combined = self._compile(('(?im)' if self.ignorecase else '(?m)') + body)
+            if combined is not None and combined.groups == index - 1:
+                self.matchers.append((combined, markers))
+        if not self.matchers:
+            #keys that do not combine: one matcher per key, as Vale would report them
+            for i, single in enumerate(singles):
+                if single is not None:
+                    self.matchers.append((single, {None: (i, 1)}))
+
+    @staticmethod
+    def _compile(regex):
+        pattern, notes = python_pattern(regex)
+        return re.compile(pattern) if pattern is not None else None
+
+    #the replacement of a swap, with $N replaced by the Nth group of the key
+    def _suggestion(self, match, swap, first):
+        def group(ref):
+            n = first + int(ref.group(1)) - 1
+            return (match.group(n) or '') if n <= match.re.groups else ''
+        return re.sub(r'\$(\d+)', group, self.swaps[swap][1])
+
+    #yields (start, end, swap index, suggestion) for each alert the rule raises in text
+    def finditer(self, text):
+        for regex, markers in self.matchers:
+            for m in regex.finditer(text):
+                key = markers.get(None) or markers.get(m.lastindex)
+                if key is None:
+                    continue
+                swap, first = key
+                suggestion = self._suggestion(m, swap, first)
+                observed = m.group(0)
+                options = suggestion.split('|')
+                if self.ignorecase:
+                    observed = observed.lower()
+                    options = [o.lower() for o in options]
+                #Vale does not report a match that is already one of the suggestions
+                if observed not in options:
+                    yield m.start(), m.end(), swap, suggestion
+
+#loads the substitution rules of a style directory
+def load_swap_rules(rules_dir):
+    rules = []
+    for path in sorted(glob.glob(os.path.join(rules_dir, '*.yml'))):
+        with open(path, 'r', encoding='utf-8') as f:
+            data = yaml.safe_load(f) or {}
+        if data.get("extends") == "substitution" and data.get("swap"):
+            rules.append(SwapRule(os.path.splitext(os.path.basename(path))[0], data))
+    return rules
+
+#the incorrect forms of an SSG entry as plain text, without the regex escaping of get_ssg_terms
+def ssg_incorrect_forms(entry):
+    forms = entry["term"]["incorrect_forms"].replace('\\(', '(').replace('\\)', ')')
+    return [f.strip() for f in forms.split('|') if f.strip()]
+
+#runs every SSG incorrect form through the combined swap matchers, one pass over all forms per rule
+#returns a list of dicts, one per form, with a status of:
+#  covered: exactly one rule reports the form and suggests the SSG term
+#  shadowed: the form is reported, but the swap that matches it first suggests something else
+#  double-covered: more than one rule reports the form
+#  uncovered: no rule reports the form
+def check_ssg_swap_coverage(catalog, rules):
+    forms = []
+    for entry in catalog.ssg_terms:
+        for form in ssg_incorrect_forms(entry):
+            forms.append((entry, form))
+    #one newline-separated batch, with the offset where each form starts
+    starts = []
+    offset = 0
+    for entry, form in forms:
+        starts.append(offset)
+        offset += len(form) + 1
+    text = '\n'.join(form for entry, form in forms)
+    hits = [[] for _ in forms]
+    for rule in rules:
+        for start, end, swap, suggestion in rule.finditer(text):
+            i = bisect.bisect_right(starts, start) - 1
+            if i < 0 or end > starts[i] + len(forms[i][1]):
+                continue
+            hits[i].append({"rule": rule.name, "level": rule.level, "swap": rule.swaps[swap][0], "suggestion": suggestion, "match": text[start:end]})
+    report = []
+    for (entry, form), form_hits in zip(forms, hits):
+        #a suggestion agrees when it contains the SSG term as whole words, as in bare-metal$1
+        correct = re.compile(r'(?<!\w)' + re.escape(normalize_term(entry["term"]["correct_term"]).lower()) + r'(?!\w)')
+        rules_hit = sorted(set(h["rule"] for h in form_hits))
+        agrees = [h for h in form_hits if any(correct.search(normalize_term(o).lower()) for o in h["suggestion"].split('|'))]
+        if not form_hits:
+            status = "uncovered"
+        elif len(rules_hit) > 1:
+            status = "double-covered"
+        elif not agrees:
+            status = "shadowed"
+        else:
+            status = "covered"
+        report.append({"word_id": entry["term"]["word_id"], "correct_term": entry["term"]["correct_term"], "incorrect_form": form, "status": status, "matches": form_hits})
+    return report
+
+def write_ref_tables(temp_dir, adoc_dir, catalog=None):
+    catalog = catalog or TermCatalog.load(temp_dir)
     #start writing
-    os.chdir(adoc_dir)
-    with open('/home/aireilly/vale-at-red-hat/modules/reference-guide/partials/ref_error_terms.adoc', 'w+', encoding='utf-8') as w:
+    with open(os.path.join(adoc_dir, 'ref_error_terms.adoc'), 'w+', encoding='utf-8') as w:
         w.seek(0)
         #clean the previous version
         w.truncate()
@@ -149,57 +472,42 @@ def write_ref_tables(temp_dir, adoc_dir):
         w.write("|Incorrect term|Correct term" + "\n")
 
         #for every line in the vale rules file, if a correspoding entry exists in ssg file, write a table row
-        for line in vale_contents:
-            correct_vale_term = line["term"]["correct_term"]
-            rule_file = line["term"]["rule_file"]
-            for line in ssg_contents:
-                if correct_vale_term == line["term"]["correct_term"]:
-                    word_id = line["term"]["word_id"]
-                    correct = line["term"]["correct_term"]
-                    incorrect = line["term"]["incorrect_forms"]
-                    #re.sub pipe char
-                    incorrect = re.sub(r'\|', ' \\| ', incorrect)
-                    correct = re.sub(r'\|', ' \\| ', correct)
-                    #re.sub escaped brackets
-                    incorrect = re.sub(r'\\\(', '(', incorrect)
-                    incorrect = re.sub(r'\\\)', ')', incorrect)
-                    correct = re.sub(r'\\\(', '(', correct)
-                    correct = re.sub(r'\\\)', ')', correct)
-                    #handle noun, adj, verb
-                    if bool(re.search('(-adj)$', word_id)):
-                        grammar_type = ' (as an adjective)'
-                    elif bool(re.search('(-n)$', word_id)):
-                        grammar_type = ' (as a noun)'
-                    elif bool(re.search('(-v)$', word_id)):
-                        grammar_type = ' (as a verb)'
-                    else:
-                        grammar_type = ''
-
-                    w.write("\n")
-                    w.write("|" + incorrect + "|" + "link:https://redhat-documentation.github.io/supplementary-style-guide/#" + word_id + "[" + correct + grammar_type + "]" + "\n")
+        for vale_entry, line in catalog.vale_ssg_pairs():
+            word_id = line["term"]["word_id"]
+            correct = line["term"]["correct_term"]
+            incorrect = line["term"]["incorrect_forms"]
+            #re.sub pipe char
+            incorrect = re.sub(r'\|', ' \\| ', incorrect)
+            correct = re.sub(r'\|', ' \\| ', correct)
+            #re.sub escaped brackets
+            incorrect = re.sub(r'\\\(', '(', incorrect)
+            incorrect = re.sub(r'\\\)', ')', incorrect)
+            correct = re.sub(r'\\\(', '(', correct)
+            correct = re.sub(r'\\\)', ')', correct)
+            #handle noun, adj, verb
+            if bool(re.search('(-adj)$', word_id)):
+                grammar_type = ' (as an adjective)'
+            elif bool(re.search('(-n)$', word_id)):
+                grammar_type = ' (as a noun)'
+            elif bool(re.search('(-v)$', word_id)):
+                grammar_type = ' (as a verb)'
+            else:
+                grammar_type = ''
+
+            w.write("\n")
+            w.write("|" + incorrect + "|" + "link:https://redhat-documentation.github.io/supplementary-style-guide/#" + word_id + "[" + correct + grammar_type + "]" + "\n")
         w.write("|====" + "\n")
         w.write("\n")
 
-def check_new_ssg_entries(temp_dir, adoc_dir, git_root):
-    os.chdir(temp_dir)
-    with open("missing_terms.json", "w+", encoding='utf-8') as out_file:
-        with open("./ssg_terms.json", 'r') as s:
-            ssg_contents = json.loads(s.read())
-        with open("./fixture_terms.json", 'r') as j:
-            fixture_contents = json.loads(j.read())
+def check_new_ssg_entries(temp_dir, adoc_dir, git_root, catalog=None):
+    catalog = catalog or TermCatalog.load(temp_dir)
+    with open(os.path.join(temp_dir, "missing_terms.json"), "w+", encoding='utf-8') as out_file:
         #compare terms from the Vale fixtures and SSG JSON files
-        ssg_terms_list = []
-        terms_diff = []
         missing_terms = []
-        for i in ssg_contents:
-            ssg_terms_list.append(i["term"]["correct_term"])
-        terms_diff = [x for x in ssg_terms_list if x not in fixture_contents]
-        for i in terms_diff:
-            for j in ssg_contents:
-                if i == j["term"]["correct_term"]:
-                    missing_term = (j["term"]["incorrect_forms"] + ': ' + i)
-                    missing_terms.append(missing_term)
+        for j in catalog.missing_ssg_entries():
+            missing_term = (j["term"]["incorrect_forms"] + ': ' + j["term"]["correct_term"])
+            missing_terms.append(missing_term)
         #serialize the json 
         missing_terms_json = json.dumps(missing_terms, indent = 4)
         out_file.write(missing_terms_json)
-        shutil.move("./missing_terms.json", git_root + "/tools/ssg_utils/missing_ssg_terms.json")
\ No newline at end of file
+    shutil.move(os.path.join(temp_dir, "missing_terms.json"), git_root + "/tools/ssg_utils/missing_ssg_terms.json")
@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+# Copyright (c) 2024 Red Hat, Inc.
+# This program and the accompanying materials are made
+# available under the terms of the Eclipse Public License 2.0
+# which is available at https://www.eclipse.org/legal/epl-2.0/
+#
+# SPDX-License-Identifier: EPL-2.0
+"""Summarize a Vale JSON report in one streaming pass.
+
+Reads the output of `vale --output=JSON` incrementally, one alert at a
+time, so memory stays bounded by the number of distinct rules, matches
+and files rather than by the size of the report. From that single pass
+it writes the breakdowns that tools/vale_report.sh used to build with
+one jq run per rule:
+
+    PREFIX.severity          alerts per severity
+    PREFIX.rules             alerts per rule
+    PREFIX-rule-RULE.txt     alerts per match, for each rule
+    PREFIX.files             alerts per file
+    PREFIX-wordcount.log     words in the files of --file-list
+
+Counts are written as `uniq -c | sort -nr` would, so the files can be
+compared with earlier reports.
+
+Usage:
+    tools/summarize-vale-report.py [--file-list FILE] [--prefix PREFIX]
+                                   [REPORT.json]
+"""
+
+import argparse
+import json
+import sys
+
+# Bytes read from the report at a time.
+CHUNK_SIZE = 1 << 20
+
+_WHITESPACE = " \t\n\r"
+
+
+class ReportError(ValueError):
+    """Raised when the report is not a Vale JSON report."""
+
+
+class _Reader:
+    """Buffered reader that decodes one JSON value at a time."""
+
+    def __init__(self, stream, chunk_size=CHUNK_SIZE):
+        self.stream = stream
+        self.chunk_size = chunk_size
+        self.buffer = ""
+        self.pos = 0
+        self.eof = False
+        self.decoder = json.JSONDecoder()
+
+    def _fill(self):
+        if self.eof:
+            return False
+        chunk = self.stream.read(self.chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self):
+        """Return the next non-whitespace character, or "" at the end."""
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self._fill():
+                return ""
+
+    def expect(self, chars):
+        char = self.peek()
+        if not char or char not in chars:
+            raise ReportError("expected %s, found %r" % (" or ".join(chars), char or "end of input"))
+        self.pos += 1
+        return char
+
+    def value(self):
+        """Decode the next JSON value, reading more input as needed."""
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError as e:
+                # A value cut at the end of the buffer needs more input.
+                if self._fill():
+                    continue
+                raise ReportError(str(e))
+            # A number at the end of the buffer may continue in the next chunk.
+            if end == len(self.buffer) and not self.eof and not isinstance(value, (dict, list, str)):
+                if self._fill():
+                    continue
+            self.pos = end
+            return value
+
+
+def iter_alerts(stream, chunk_size=CHUNK_SIZE):
+    """Yield (path, alert) for each alert of a Vale JSON report.
+
+    The report is an object mapping each file to a list of alerts; only
+    one alert is decoded at a time.
+    """
+    reader = _Reader(stream, chunk_size)
+    if not reader.peek():
+        return
+    reader.expect("{")
+    if reader.peek() == "}":
+        reader.expect("}")
+        return
+    while True:
+        path = reader.value()
+        if not isinstance(path, str):
+            raise ReportError("expected a file path, found %r" % (path,))
+        reader.expect(":")
+        reader.expect("[")
+        if reader.peek() == "]":
+            reader.expect("]")
+        else:
+            while True:
+                alert = reader.value()
+                if not isinstance(alert, dict):
+                    raise ReportError("expected an alert object in %s" % path)
+                yield path, alert
+                if reader.expect(",]") == "]":
+                    break
+        if reader.expect(",}") == "}":
+            break
+    if reader.peek():
+        raise ReportError("unexpected data after the report")
+
+
+class Summary:
+    """Alert counts by severity, rule, match and file."""
+
+    def __init__(self):
+        self.alerts = 0
+        self.severities = {}
+        self.rules = {}
+        self.matches = {}
+        self.files = {}
+
+    def add(self, path, alert):
+        self.alerts += 1
+        severity = alert.get("Severity", "")
+        rule = alert.get("Check", "")
+        match = alert.get("Match", "")
+        self.severities[severity] = self.severities.get(severity, 0) + 1
+        self.rules[rule] = self.rules.get(rule, 0) + 1
+        counts = self.matches.setdefault(rule, {})
+        counts[match] = counts.get(match, 0) + 1
+        self.files[path] = self.files.get(path, 0) + 1
+
+
+def summarize(stream, chunk_size=CHUNK_SIZE):
+    """Return the Summary of a Vale JSON report read from a text stream."""
+    summary = Summary()
+    for path, alert in iter_alerts(stream, chunk_size):
+        summary.add(path, alert)
+    return summary
+
+
+def count_words(paths):
+    """Count whitespace-separated words in files, as `cat FILES | wc -w`."""
+    words = 0
+    for path in paths:
+        try:
+            with open(path, "rb") as f:
+                words += len(f.read().split())
+        except OSError as e:
+            print("Error reading %s: %s" % (path, e), file=sys.stderr)
+    return words
+
+
+def format_counts(counts, quote=True):
+    """Format counts as `sort | uniq -c | sort -nr` prints them.
+
+    Values are JSON-quoted as jq prints them, unless quote is false, as
+    with jq -r.
+    """
+    lines = []
+    for value, count in sorted(counts.items(), key=lambda item: (item[1], item[0]), reverse=True):
+        text = json.dumps(value, ensure_ascii=False) if quote else str(value)
+        lines.append("%7d %s\n" % (count, text))
+    return "".join(lines)
+
+
+def _write(path, text):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+
+
+def write_summary(summary, prefix, words=None):
+    """Write the breakdown files of a summary next to prefix."""
+    _write(prefix + ".severity", format_counts(summary.severities))
+    _write(prefix + ".rules", format_counts(summary.rules))
+    _write(prefix + ".files", format_counts(summary.files, quote=False))
+    for rule, counts in summary.matches.items():
+        _write("%s-rule-%s.txt" % (prefix, rule), format_counts(counts, quote=False))
+    if words is not None:
+        _write(prefix + "-wordcount.log", "%d\n" % words)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "report", nargs="?", metavar="REPORT.json",
+        help="Vale JSON report (default: standard input)",
+    )
+    parser.add_argument(
+        "--prefix", metavar="PREFIX",
+        help="prefix of the output files (default: the report path "
+             "without .json, or vale-report for standard input)",
+    )
+    parser.add_argument(
+        "--file-list", metavar="FILE",
+        help="file listing the linted files, one per line, to count "
+             "their words",
+    )
+    args = parser.parse_args(argv)
+
+    if args.prefix:
+        prefix = args.prefix
+    elif args.report:
+        prefix = args.report[:-len(".json")] if args.report.endswith(".json") else args.report
+    else:
+        prefix = "vale-report"
+
+    try:
+        if args.report:
+            with open(args.report, encoding="utf-8") as f:
+                summary = summarize(f)
+        else:
+            summary = summarize(sys.stdin)
+    except ReportError as e:
+        print("Invalid Vale report: %s" % e, file=sys.stderr)
+        return 2
+
+    words = None
+    if args.file_list:
+        with open(args.file_list, encoding="utf-8") as f:
+            words = count_words(line.strip() for line in f if line.strip())
+
+    write_summary(summary, prefix, words)
+    print("Summarized %d alerts in %d files: %d rules%s" % (
+        summary.alerts, len(summary.files), len(summary.rules),
+        ", %d words" % words if words is not None else ""), file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
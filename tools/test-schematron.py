@@ -13,46 +13,122 @@ smoke tests. This script validates that the Schematron files are structurally
 sound and can be loaded by a Schematron processor. Full XPath 2.0 validation
 requires a processor like Saxon or SchXslt.
 
+Files that lxml.isoschematron cannot compile are evaluated with the
+in-process engine in tools/schematron_engine.py instead, which runs the
+matches()-based reports with Python regexes.
+
 Each .sch file is tested against its matching test-{RuleName}.dita fixture
-in schematron/fixtures/.
+in schematron/fixtures/. The XSLT 1.0 variants in schematron/output/xslt1/
+must compile with lxml, and are tested against the same fixtures.
+
+Compiled validators are cached by the content hash of their schema, in
+memory for the life of the process and as XSLT files in a cache
+directory between runs, so an unchanged schema is never compiled twice.
 """
 
+import argparse
 import glob
+import hashlib
 import os
 import sys
 
 from lxml import etree
 from lxml.isoschematron import Schematron
 
+import schematron_engine
+
 REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 OUTPUT_DIR = os.path.join(REPO_ROOT, "schematron", "output")
+XSLT1_OUTPUT_DIR = os.path.join(OUTPUT_DIR, "xslt1")
 FIXTURES_DIR = os.path.join(REPO_ROOT, "schematron", "fixtures")
+CACHE_DIR = os.environ.get(
+    "SCHEMATRON_CACHE_DIR",
+    os.path.join(os.path.expanduser("~"), ".cache", "vale-at-red-hat", "schematron"),
+)
 
+# Compiled validators by schema key: (etree.XSLT, None) or (None, error)
+_VALIDATORS = {}
 
-def get_schematron_reports(sch_path, dita_path):
-    """Apply a Schematron file to a DITA file and return report messages.
 
+def schema_cache_key(sch_bytes):
+    """Return the cache key of a schema: its SHA-256 plus the lxml version.
+
+    The compiled XSLT depends on the ISO skeleton bundled with lxml, so
+    a different lxml version must not reuse it.
+    """
+    digest = hashlib.sha256(sch_bytes)
+    digest.update(("lxml-%s" % ".".join(map(str, etree.LXML_VERSION))).encode())
+    return digest.hexdigest()
+
+
+def get_validator(sch_path, cache_dir=CACHE_DIR):
+    """Return the compiled validator XSLT for a Schematron file.
+
+    Looks the schema up by content hash in memory, then in cache_dir,
+    and only compiles it with lxml.isoschematron on a miss. Newly
+    compiled validators are written to cache_dir. Compilation failures
+    are only cached in memory.
+
+    Args:
+        sch_path: Path to the .sch file.
+        cache_dir: Directory for compiled XSLT files, or None to only
+            cache in memory.
     Returns:
-        (list of report message strings, error string) or (None, error) on failure.
+        (etree.XSLT, None) or (None, error string) on failure.
     """
+    with open(sch_path, "rb") as f:
+        sch_bytes = f.read()
+    key = schema_cache_key(sch_bytes)
+    if key in _VALIDATORS:
+        return _VALIDATORS[key]
+
+    cached_path = os.path.join(cache_dir, "%s.xsl" % key) if cache_dir else None
+    if cached_path and os.path.exists(cached_path):
+        try:
+            _VALIDATORS[key] = (etree.XSLT(etree.parse(cached_path)), None)
+            return _VALIDATORS[key]
+        except (etree.XMLSyntaxError, etree.XSLTParseError):
+            os.remove(cached_path)
+
     try:
-        sch_doc = etree.parse(sch_path)
-        schematron = Schematron(sch_doc, store_report=True)
+        schematron = Schematron(etree.fromstring(sch_bytes), store_xslt=True)
+        xslt_doc = schematron.validator_xslt
+        validator = etree.XSLT(xslt_doc)
     except Exception as e:
-        return None, str(e)
+        _VALIDATORS[key] = (None, str(e))
+        return _VALIDATORS[key]
+
+    if cached_path:
+        os.makedirs(cache_dir, exist_ok=True)
+        tmp_path = "%s.%d.tmp" % (cached_path, os.getpid())
+        xslt_doc.write(tmp_path)
+        os.replace(tmp_path, cached_path)
+
+    _VALIDATORS[key] = (validator, None)
+    return _VALIDATORS[key]
+
+
+def get_schematron_reports(sch_path, dita_path, cache_dir=CACHE_DIR):
+    """Apply a Schematron file to a DITA file and return report messages.
+
+    Returns:
+        (list of report message strings, error string) or (None, error) on failure.
+    """
+    validator, err = get_validator(sch_path, cache_dir)
+    if validator is None:
+        return None, err
 
     try:
         dita_doc = etree.parse(dita_path)
     except etree.XMLSyntaxError as e:
         return None, "DITA parse error: %s" % e
 
-    schematron.validate(dita_doc)
-    report = schematron.validation_report
+    report = validator(dita_doc)
 
-    if report is None:
+    if report is None or report.getroot() is None:
         return [], ""
 
-    ns = {"svrl": "http://purl.oclc.org/dml/svrl"}
+    ns = {"svrl": "http://purl.oclc.org/dsdl/svrl"}
     messages = []
 
     for elem in report.xpath("//svrl:successful-report", namespaces=ns):
@@ -68,7 +144,38 @@ def get_schematron_reports(sch_path, dita_path):
     return messages, ""
 
 
-def main():
+def get_engine_reports(sch_path, dita_path):
+    """Apply a Schematron file to a DITA file with the Python engine.
+
+    Returns:
+        (list of report message strings, list of unsupported check
+        descriptions) or (None, error) on failure.
+    """
+    try:
+        schema = schematron_engine.load_schema([sch_path])
+        dita_doc = etree.parse(dita_path)
+        findings = schema.validate(dita_doc)
+    except (etree.XMLSyntaxError, schematron_engine.UnsupportedExpression) as e:
+        return None, str(e)
+
+    unsupported = [reason for _, _, reason in schema.unsupported]
+    return [f.message for f in findings], unsupported
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--cache-dir", default=CACHE_DIR, metavar="DIR",
+        help="directory for compiled validators (default: %(default)s, "
+             "or $SCHEMATRON_CACHE_DIR)",
+    )
+    parser.add_argument(
+        "--no-cache", action="store_true",
+        help="do not read or write compiled validators on disk",
+    )
+    args = parser.parse_args(argv)
+    cache_dir = None if args.no_cache else args.cache_dir
+
     sch_files = sorted(glob.glob(os.path.join(OUTPUT_DIR, "*.sch")))
     sch_files = [f for f in sch_files if not f.endswith("RedHat-all.sch")]
 
@@ -80,6 +187,7 @@ def main():
 
     compile_errors = 0
     compilable = 0
+    engine_tested = 0
     detections_total = 0
     xpath2_skipped = 0
     missing_fixtures = 0
@@ -93,10 +201,22 @@ def main():
             missing_fixtures += 1
             continue
 
-        reports, err = get_schematron_reports(sch_path, fixture)
+        reports, err = get_schematron_reports(sch_path, fixture, cache_dir)
         if reports is None:
-            xpath2_skipped += 1
-            print("  SKIP: %s (XPath 2.0, not testable with lxml: %s)" % (name, err[:80]))
+            reports, unsupported = get_engine_reports(sch_path, fixture)
+            if reports is None or unsupported:
+                xpath2_skipped += 1
+                reason = unsupported if reports is None else unsupported[0]
+                print("  SKIP: %s (XPath 2.0, not testable with lxml: %s)" % (name, err[:80]))
+                print("        Python engine: %s" % reason[:80])
+                continue
+            engine_tested += 1
+            det_count = len(reports)
+            if det_count > 0:
+                print("  OK: %s — %d detection(s) (Python engine)" % (name, det_count))
+                detections_total += det_count
+            else:
+                print("  INFO: %s — 0 detections (Python engine)" % name)
             continue
 
         compilable += 1
@@ -107,9 +227,37 @@ def main():
         else:
             print("  INFO: %s — 0 detections (may need XPath 2.0)" % name)
 
+    xslt1_files = sorted(glob.glob(os.path.join(XSLT1_OUTPUT_DIR, "*.sch")))
+    xslt1_files = [f for f in xslt1_files if not f.endswith("RedHat-all.sch")]
+    if xslt1_files:
+        print("\nSmoke-testing %d XSLT 1.0 variants...\n" % len(xslt1_files))
+
+    for sch_path in xslt1_files:
+        name = os.path.basename(sch_path).replace(".sch", "")
+        fixture = os.path.join(FIXTURES_DIR, "test-%s.dita" % name)
+        if not os.path.exists(fixture):
+            print("  MISSING: test-%s.dita — no fixture file" % name)
+            missing_fixtures += 1
+            continue
+
+        reports, err = get_schematron_reports(sch_path, fixture, cache_dir)
+        if reports is None:
+            print("  FAIL: xslt1/%s (%s)" % (name, err[:80]))
+            compile_errors += 1
+            continue
+
+        det_count = len(reports)
+        if det_count > 0:
+            print("  OK: xslt1/%s — %d detection(s)" % (name, det_count))
+            detections_total += det_count
+        else:
+            print("  INFO: xslt1/%s — 0 detections" % name)
+
     print("\nSummary:")
     print("  Files tested: %d" % len(sch_files))
     print("  Compilable by lxml (XSLT 1.0): %d" % compilable)
+    print("  XSLT 1.0 variants tested: %d" % len(xslt1_files))
+    print("  Evaluated by Python engine: %d" % engine_tested)
     print("  Skipped (require XPath 2.0): %d" % xpath2_skipped)
     print("  Missing fixtures: %d" % missing_fixtures)
     print("  Total detections: %d" % detections_total)
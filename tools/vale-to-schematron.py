@@ -7,10 +7,13 @@
 # SPDX-License-Identifier: EPL-2.0
 """Generate ISO Schematron rules from Red Hat Vale style YAML files."""
 
-import copy
+import argparse
+import hashlib
+import json
 import os
 import re
 import sys
+from concurrent.futures import ProcessPoolExecutor
 
 import yaml
 from lxml import etree
@@ -18,6 +21,8 @@ from lxml import etree
 REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 VALE_STYLES_DIR = os.path.join(REPO_ROOT, ".vale", "styles", "RedHat")
 OUTPUT_DIR = os.path.join(REPO_ROOT, "schematron", "output")
+MANIFEST_PATH = os.path.join(OUTPUT_DIR, "manifest.json")
+XSLT1_OUTPUT_DIR = os.path.join(OUTPUT_DIR, "xslt1")
 
 SCH_NS = "http://purl.oclc.org/dsdl/schematron"
 SCH = "{%s}" % SCH_NS
@@ -47,16 +52,46 @@ RULES_TO_GENERATE = [
     "Symbols", "TermsErrors", "TermsSuggestions", "TermsWarnings",
 ]
 
+# Maximum number of alternatives merged into one combined regex in
+# optimized output mode.
+OPTIMIZE_CHUNK_SIZE = 250
+
+# Characters mapped to spaces before the contains() tests of the XSLT 1.0
+# variant, so that they act as word boundaries around literal terms.
+# Hyphens, slashes and underscores join words and are left alone, so that
+# 'bare metal' does not match 'bare-metal'.
+XSLT1_PUNCTUATION = ".,;:!?()[]{}<>\"'"
+XSLT1_UPPER = "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+XSLT1_LOWER = "abcdefghijklmnopqrstuvwxyz"
+
+# Maximum number of literal spellings a pattern may expand to, e.g.
+# 'log(-| )?in' expands to 3, before it is left to the regex backend.
+XSLT1_VARIANT_LIMIT = 16
+
 COVERAGE_DATA = {}
 
+# sch:pattern elements of the rules generated in this run, keyed by rule
+# name, used to build RedHat-all.sch without re-parsing the .sch files.
+GENERATED_PATTERNS = {}
+
+# sch:pattern elements of the XSLT 1.0 variants generated in this run.
+GENERATED_XSLT1_PATTERNS = {}
 
-def record_coverage(rule_name, extends_type, level, fidelity, notes=""):
-    """Record coverage information for a rule."""
+
+def record_coverage(rule_name, extends_type, level, fidelity, notes="",
+                    xslt1=None):
+    """Record coverage information for a rule.
+
+    xslt1 is a (literal, total) pair counting the patterns of the rule
+    that are expressible in its XSLT 1.0 variant, or None if the rule
+    type has no such variant.
+    """
     COVERAGE_DATA[rule_name] = {
         "extends": extends_type,
         "level": level,
         "fidelity": fidelity,
         "notes": notes,
+        "xslt1": list(xslt1) if xslt1 else None,
     }
 
 
@@ -70,37 +105,67 @@ def write_coverage_md():
         "",
         "Generated by `tools/vale-to-schematron.py`. Do not edit manually.",
         "",
-        "| Vale Rule | Type | Level | Schematron Fidelity | Notes |",
-        "|---|---|---|---|---|",
+        "| Vale Rule | Type | Level | Schematron Fidelity | XSLT 1.0 Literal | Notes |",
+        "|---|---|---|---|---|---|",
     ]
 
+    literal_patterns = 0
+    total_patterns = 0
+    literal_rules = 0
     for name in sorted(COVERAGE_DATA.keys()):
         d = COVERAGE_DATA[name]
-        lines.append("| %s | %s | %s | %s | %s |" % (
-            name, d["extends"], d["level"], d["fidelity"], d["notes"],
+        xslt1 = d.get("xslt1")
+        if xslt1:
+            literal, total = xslt1
+            literal_patterns += literal
+            total_patterns += total
+            if literal:
+                literal_rules += 1
+            xslt1_cell = "%d/%d" % (literal, total)
+        else:
+            xslt1_cell = "n/a"
+        lines.append("| %s | %s | %s | %s | %s | %s |" % (
+            name, d["extends"], d["level"], d["fidelity"], xslt1_cell,
+            d["notes"],
         ))
 
     for name in sorted(SKIP_RULES):
         if name == "Spelling":
-            lines.append("| %s | spelling | warning | Skipped | Hunspell dictionary not expressible in XPath |" % name)
+            lines.append("| %s | spelling | warning | Skipped | n/a | Hunspell dictionary not expressible in XPath |" % name)
         elif name == "Using":
-            lines.append("| %s | sequence | warning | Skipped | POS tagging not available in XPath |" % name)
+            lines.append("| %s | sequence | warning | Skipped | n/a | POS tagging not available in XPath |" % name)
         elif name == "ReadabilityGrade":
-            lines.append("| %s | readability | suggestion | Skipped | Flesch-Kincaid scoring not expressible in XPath |" % name)
+            lines.append("| %s | readability | suggestion | Skipped | n/a | Flesch-Kincaid scoring not expressible in XPath |" % name)
 
     lines.append("")
+    lines.append("## XSLT 1.0 Fast Path")
+    lines.append("")
+    share = 100.0 * literal_patterns / total_patterns if total_patterns else 0.0
+    lines.append(
+        "%d of %d existence and substitution patterns (%.1f%%) are plain "
+        "literals once word boundaries are removed. %d of %d generated rules "
+        "have at least one, and get an `xslt` queryBinding variant in "
+        "`schematron/output/xslt1/` that tests them with `contains()` "
+        "instead of `matches()`." % (
+            literal_patterns, total_patterns, share,
+            literal_rules, len(COVERAGE_DATA)))
+    lines.append("")
 
-    with open(filepath, "w", encoding="utf-8") as f:
-        f.write("\n".join(lines))
-    print("  COVERAGE.md written")
+    if write_if_changed(filepath, "\n".join(lines).encode("utf-8")):
+        print("  COVERAGE.md written")
+    else:
+        print("  COVERAGE.md unchanged")
 
 
-def handle_existence(rule_name, data):
+def handle_existence(rule_name, data, optimize=False):
     """Generate Schematron for a Vale 'existence' rule.
 
     Existence rules flag text matching any token in the tokens list.
     If a 'raw' field is present (e.g., PassiveVoice), each token is
     prefixed with the raw pattern to form a compound match.
+    With optimize=True, the token patterns are merged into combined
+    tests (see append_reports). Literal tokens are also written to an
+    XSLT 1.0 variant (see write_xslt1_variant).
     """
     level = data.get("level", "warning")
     role = LEVEL_TO_ROLE.get(level, "warning")
@@ -130,6 +195,7 @@ def handle_existence(rule_name, data):
     flags = "'i'" if ignorecase else ""
     word_bounded = not nonword
 
+    entries = []
     for token in tokens:
         token_str = str(token)
         if prefix:
@@ -141,25 +207,15 @@ def handle_existence(rule_name, data):
             full_pattern, word_bounded=word_bounded
         )
 
-        for w in warnings:
-            rule_el.append(etree.Comment(" %s " % w))
-
-        report = etree.SubElement(rule_el, SCH + "report")
-
-        escaped = xml_escape_regex(converted)
-        if flags:
-            test = "matches(., '%s', %s)" % (escaped, flags)
-        else:
-            test = "matches(., '%s')" % escaped
-
-        report.set("test", test)
-        report.set("role", role)
-
         try:
             msg = message_template % token_str
         except TypeError:
             msg = message_template
-        report.text = msg
+        entries.append((converted, warnings, msg))
+
+    append_reports(rule_el, entries, flags, role, optimize=optimize)
+    literal = write_xslt1_variant(
+        rule_name, "existence", level, context, entries, ignorecase, role)
 
     has_warnings = any(
         isinstance(child, etree._Comment) and "Stripped" in str(child.text)
@@ -167,17 +223,22 @@ def handle_existence(rule_name, data):
     )
     fidelity = "Simplified" if has_warnings else "Full"
     notes = "Lookbehind/lookahead stripped" if has_warnings else ""
-    record_coverage(rule_name, "existence", level, fidelity, notes)
+    record_coverage(rule_name, "existence", level, fidelity, notes,
+                    xslt1=(literal, len(entries)))
 
     write_schematron_file(rule_name, schema)
+    return schema
 
 
-def handle_substitution(rule_name, data):
+def handle_substitution(rule_name, data, optimize=False):
     """Generate Schematron for a Vale 'substitution' rule.
 
     Substitution rules have a swap map of {bad_pattern: replacement}.
     Each swap entry becomes a sch:report that flags the bad pattern
-    and suggests the replacement in its message.
+    and suggests the replacement in its message. With optimize=True,
+    the swap keys are merged into combined tests (see append_reports).
+    Literal swap keys are also written to an XSLT 1.0 variant (see
+    write_xslt1_variant).
     """
     level = data.get("level", "warning")
     role = LEVEL_TO_ROLE.get(level, "warning")
@@ -199,6 +260,7 @@ def handle_substitution(rule_name, data):
 
     flags = "'i'" if ignorecase else ""
 
+    entries = []
     for bad_pattern, replacement in swap.items():
         bad_str = str(bad_pattern)
         repl_str = str(replacement)
@@ -207,20 +269,6 @@ def handle_substitution(rule_name, data):
             bad_str, word_bounded=word_bounded
         )
 
-        for w in warnings:
-            rule_el.append(etree.Comment(" %s " % w))
-
-        report = etree.SubElement(rule_el, SCH + "report")
-
-        escaped = xml_escape_regex(converted)
-        if flags:
-            test = "matches(., '%s', %s)" % (escaped, flags)
-        else:
-            test = "matches(., '%s')" % escaped
-
-        report.set("test", test)
-        report.set("role", role)
-
         try:
             msg = message_template % (repl_str, bad_str)
         except TypeError:
@@ -228,7 +276,11 @@ def handle_substitution(rule_name, data):
                 msg = message_template % repl_str
             except TypeError:
                 msg = message_template
-        report.text = msg
+        entries.append((converted, warnings, msg))
+
+    append_reports(rule_el, entries, flags, role, optimize=optimize)
+    literal = write_xslt1_variant(
+        rule_name, "substitution", level, context, entries, ignorecase, role)
 
     has_warnings = any(
         isinstance(child, etree._Comment) and "Stripped" in str(child.text)
@@ -236,12 +288,14 @@ def handle_substitution(rule_name, data):
     )
     fidelity = "Simplified" if has_warnings else "Full"
     notes = "Lookbehind/lookahead stripped" if has_warnings else ""
-    record_coverage(rule_name, "substitution", level, fidelity, notes)
+    record_coverage(rule_name, "substitution", level, fidelity, notes,
+                    xslt1=(literal, len(entries)))
 
     write_schematron_file(rule_name, schema)
+    return schema
 
 
-def handle_conditional(rule_name, data):
+def handle_conditional(rule_name, data, optimize=False):
     """Generate Schematron for a Vale 'conditional' rule.
 
     Checks that if 'first' pattern appears, 'second' pattern must also
@@ -287,9 +341,10 @@ def handle_conditional(rule_name, data):
                     "Scoped per topic, not per document")
 
     write_schematron_file(rule_name, schema)
+    return schema
 
 
-def handle_capitalization(rule_name, data):
+def handle_capitalization(rule_name, data, optimize=False):
     """Generate Schematron for a Vale 'capitalization' rule.
 
     Simplified: checks for title-case words after the first word in headings.
@@ -326,9 +381,10 @@ def handle_capitalization(rule_name, data):
                     "Checks for title-case words; %d exceptions not enforced" % len(exceptions))
 
     write_schematron_file(rule_name, schema)
+    return schema
 
 
-def handle_occurrence(rule_name, data):
+def handle_occurrence(rule_name, data, optimize=False):
     """Generate Schematron for a Vale 'occurrence' rule.
 
     Counts word tokens and flags when count exceeds max.
@@ -364,9 +420,10 @@ def handle_occurrence(rule_name, data):
                     "XPath 2.0 tokenize() word counting")
 
     write_schematron_file(rule_name, schema)
+    return schema
 
 
-def handle_repetition(rule_name, data):
+def handle_repetition(rule_name, data, optimize=False):
     """Generate Schematron for a Vale 'repetition' rule.
 
     Detects consecutive duplicate words.
@@ -396,6 +453,7 @@ def handle_repetition(rule_name, data):
     record_coverage(rule_name, "repetition", level, "Full", "")
 
     write_schematron_file(rule_name, schema)
+    return schema
 
 
 TYPE_HANDLERS = {
@@ -605,6 +663,463 @@ def xml_escape_regex(pattern):
     return result
 
 
+def _matches_test(pattern, flags):
+    """Build an XPath matches() call for a converted pattern."""
+    escaped = xml_escape_regex(pattern)
+    if flags:
+        return "matches(., '%s', %s)" % (escaped, flags)
+    return "matches(., '%s')" % escaped
+
+
+def _read_quantifier(pattern, i):
+    """Return the index just past a quantifier starting at pattern[i]."""
+    n = len(pattern)
+    if i < n and pattern[i] in "?*+":
+        i += 1
+    elif i < n and pattern[i] == "{":
+        m = re.match(r"\{[0-9]+(,[0-9]*)?\}", pattern[i:])
+        if not m:
+            return i
+        i += m.end()
+    else:
+        return i
+    # Reluctant modifier
+    if i < n and pattern[i] == "?":
+        i += 1
+    return i
+
+
+def _split_regex_atoms(pattern):
+    """Split a converted regex into atoms for prefix factoring.
+
+    An atom is an escape, a character class, a parenthesized group or a
+    single character, together with any quantifier that follows it.
+    A pattern with top-level alternation is returned as a single group
+    atom.
+
+    Returns:
+        List of atom strings, or None if the pattern cannot be safely
+        merged with others (unbalanced syntax, backreferences, or inline
+        flags such as (?i)).
+    """
+    if not pattern or re.search(r"\\[1-9]|\(\?[a-zA-Z]", pattern):
+        return None
+    if _has_top_level_alternation(pattern):
+        pattern = "(%s)" % pattern
+
+    atoms = []
+    n = len(pattern)
+    i = 0
+    while i < n:
+        start = i
+        ch = pattern[i]
+        if ch == "\\":
+            if i + 1 >= n:
+                return None
+            i += 2
+            if pattern[i - 1] in "pP" and i < n and pattern[i] == "{":
+                end = pattern.find("}", i)
+                if end < 0:
+                    return None
+                i = end + 1
+        elif ch == "[":
+            depth = 1
+            i += 1
+            if i < n and pattern[i] == "^":
+                i += 1
+            if i < n and pattern[i] == "]":
+                i += 1
+            while i < n and depth:
+                c = pattern[i]
+                if c == "\\":
+                    i += 2
+                    continue
+                if c == "[" and pattern[i - 1] == "-":
+                    depth += 1
+                elif c == "]":
+                    depth -= 1
+                i += 1
+            if depth:
+                return None
+        elif ch == "(":
+            depth = 1
+            i += 1
+            while i < n and depth:
+                c = pattern[i]
+                if c == "\\":
+                    i += 2
+                    continue
+                if c == "[":
+                    close = pattern.find("]", i + 2)
+                    if close < 0:
+                        return None
+                    i = close + 1
+                    continue
+                if c == "(":
+                    depth += 1
+                elif c == ")":
+                    depth -= 1
+                i += 1
+            if depth:
+                return None
+        elif ch in ")|?*+{":
+            return None
+        else:
+            i += 1
+        i = _read_quantifier(pattern, i)
+        atoms.append(pattern[start:i])
+    return atoms
+
+
+def _factor_alternation(sequences):
+    """Merge atom sequences into one prefix-factored regex alternation.
+
+    Builds a trie over the atoms so that shared prefixes are written
+    once: ['ab', 'ac', 'a'] becomes 'a(b|c)?'. Branch order follows
+    input order so the output is deterministic.
+    """
+    trie = {}
+    for atoms in sequences:
+        node = trie
+        for atom in atoms:
+            node = node.setdefault(atom, {})
+        node[None] = {}
+
+    def emit(node):
+        terminal = None in node
+        branches = [atom + emit(child)
+                    for atom, child in node.items() if atom is not None]
+        if not branches:
+            return ""
+        if len(branches) == 1 and not terminal:
+            return branches[0]
+        joined = "(%s)" % "|".join(branches)
+        return joined + "?" if terminal else joined
+
+    return emit(trie)
+
+
+def _combine_patterns(patterns):
+    """Combine converted patterns into as few regexes as possible.
+
+    Patterns are grouped by their word-boundary wrapper, so that the
+    leading (^|\\W) and trailing (\\W|$) are matched once per group,
+    and each group is split into chunks of at most
+    OPTIMIZE_CHUNK_SIZE alternatives.
+
+    Returns:
+        (combined, standalone) where combined is a list of
+        (regex, member_indexes) tuples and standalone lists the
+        indexes of patterns that could not be merged.
+    """
+    lead, trail = "(^|\\W)", "(\\W|$)"
+    groups = {}
+    standalone = []
+    for idx, pattern in enumerate(patterns):
+        atoms = _split_regex_atoms(pattern)
+        if atoms is None:
+            standalone.append(idx)
+            continue
+        has_lead = len(atoms) > 1 and atoms[0] == lead
+        if has_lead:
+            atoms = atoms[1:]
+        has_trail = len(atoms) > 1 and atoms[-1] == trail
+        if has_trail:
+            atoms = atoms[:-1]
+        groups.setdefault((has_lead, has_trail), []).append((idx, atoms))
+
+    combined = []
+    for (has_lead, has_trail), members in groups.items():
+        for start in range(0, len(members), OPTIMIZE_CHUNK_SIZE):
+            chunk = members[start:start + OPTIMIZE_CHUNK_SIZE]
+            body = _factor_alternation([atoms for _, atoms in chunk])
+            regex = "(%s)" % body
+            if has_lead:
+                regex = lead + regex
+            if has_trail:
+                regex = regex + trail
+            combined.append((regex, [idx for idx, _ in chunk]))
+    return combined, standalone
+
+
+def append_reports(rule_el, entries, flags, role, optimize=False):
+    """Append one sch:report per (pattern, warnings, message) entry.
+
+    By default each report runs its own matches() test. With
+    optimize=True, the patterns are merged into a few prefix-factored
+    alternations bound to sch:let variables, which the processor
+    evaluates once per context node. Each report then checks its own
+    pattern only after its combined test has matched, so nodes without
+    findings cost one matches() call per combined regex instead of one
+    per entry.
+    """
+    guards = {}
+    if optimize:
+        combined, _ = _combine_patterns([e[0] for e in entries])
+        for regex, members in combined:
+            if len(members) < 2:
+                continue
+            name = "hit%d" % (len(set(guards.values())) + 1)
+            let = etree.SubElement(rule_el, SCH + "let")
+            let.set("name", name)
+            let.set("value", _matches_test(regex, flags))
+            for idx in members:
+                guards[idx] = name
+
+    for idx, (converted, warnings, msg) in enumerate(entries):
+        for w in warnings:
+            rule_el.append(etree.Comment(" %s " % w))
+
+        report = etree.SubElement(rule_el, SCH + "report")
+        test = _matches_test(converted, flags)
+        if idx in guards:
+            test = "$%s and %s" % (guards[idx], test)
+        report.set("test", test)
+        report.set("role", role)
+        report.text = msg
+
+
+def _split_alternatives(pattern):
+    """Split a regex on its top-level | into a list of branches."""
+    branches = []
+    depth = 0
+    start = 0
+    i = 0
+    while i < len(pattern):
+        ch = pattern[i]
+        if ch == "\\":
+            i += 2
+            continue
+        if ch == "[":
+            close = pattern.find("]", i + 2)
+            if close < 0:
+                return None
+            i = close + 1
+            continue
+        if ch == "(":
+            depth += 1
+        elif ch == ")":
+            depth -= 1
+        elif ch == "|" and depth == 0:
+            branches.append(pattern[start:i])
+            start = i + 1
+        i += 1
+    branches.append(pattern[start:])
+    return branches
+
+
+def _atom_body_end(atom):
+    """Return the length of an atom without its quantifier."""
+    if atom[0] == "\\":
+        return 2
+    if atom[0] == "[":
+        return atom.find("]", 2 if atom[1:2] in ("]", "^") else 1) + 1
+    if atom[0] == "(":
+        return atom.rfind(")") + 1
+    return 1
+
+
+def _expand_atom(body, limit):
+    """Return the strings matched by one unquantified atom, or None."""
+    if body[0] == "\\":
+        return None if body[1].isalnum() else [body[1]]
+    if body[0] == "[":
+        inner = body[1:-1]
+        if not inner or inner[0] == "^" or "\\" in inner or "[" in inner:
+            return None
+        if "-" in inner[1:-1]:
+            return None
+        return list(dict.fromkeys(inner))
+    if body[0] == "(":
+        inner = body[1:-1]
+        if inner.startswith("?:"):
+            inner = inner[2:]
+        elif inner.startswith("?"):
+            return None
+        branches = _split_alternatives(inner)
+        if branches is None:
+            return None
+        strings = []
+        for branch in branches:
+            if not branch:
+                strings.append("")
+                continue
+            expanded = _expand_literals(_split_regex_atoms(branch), limit)
+            if expanded is None:
+                return None
+            strings.extend(expanded)
+        return strings
+    return None if body in ".^$" else [body]
+
+
+def _expand_literals(atoms, limit=XSLT1_VARIANT_LIMIT):
+    """Expand regex atoms into the finite set of strings they match.
+
+    Handles literal characters, escaped punctuation, character classes
+    without ranges such as [Ss], groups with alternation, and the ?
+    quantifier, which covers most terminology patterns.
+
+    Returns:
+        List of strings in first-seen order, or None if the atoms use
+        any other regex feature or match more than limit strings.
+    """
+    if atoms is None:
+        return None
+    results = [""]
+    for atom in atoms:
+        end = _atom_body_end(atom)
+        quantifier = atom[end:]
+        if quantifier not in ("", "?", "??"):
+            return None
+        options = _expand_atom(atom[:end], limit)
+        if options is None:
+            return None
+        if quantifier:
+            options = options + [""]
+        results = [r + o for r in results for o in options]
+        if len(results) > limit:
+            return None
+    return list(dict.fromkeys(results))
+
+
+def _xslt1_translation(ignorecase):
+    """Return the (from, to) strings of the XSLT 1.0 translate() call."""
+    source = XSLT1_PUNCTUATION
+    target = " " * len(XSLT1_PUNCTUATION)
+    if ignorecase:
+        source = XSLT1_UPPER + source
+        target = XSLT1_LOWER + target
+    return source, target
+
+
+def xslt1_needles(pattern, ignorecase):
+    """Sort a converted pattern into literal-expressible or needs-regex.
+
+    A pattern is literal-expressible when, after its (^|\\W) and (\\W|$)
+    wrappers are removed, it matches a small finite set of printable
+    ASCII strings. The XSLT 1.0 variant tests each of them with
+    contains() on the node text, normalized as in _xslt1_text_expr():
+    punctuation becomes spaces, and the text is padded with a space at
+    each end, so a space on either side of a needle stands in for the
+    word boundary.
+
+    Args:
+        pattern: Pattern returned by convert_regex_to_xpath().
+        ignorecase: Whether the rule matches case-insensitively.
+    Returns:
+        List of contains() needles, or None if the pattern needs regex.
+    """
+    atoms = _split_regex_atoms(pattern)
+    if atoms is None:
+        return None
+    lead, trail = "(^|\\W)", "(\\W|$)"
+    has_lead = len(atoms) > 1 and atoms[0] == lead
+    if has_lead:
+        atoms = atoms[1:]
+    has_trail = len(atoms) > 1 and atoms[-1] == trail
+    if has_trail:
+        atoms = atoms[:-1]
+
+    literals = _expand_literals(atoms)
+    if not literals:
+        return None
+
+    source, target = _xslt1_translation(ignorecase)
+    table = str.maketrans(source, target)
+    needles = []
+    for literal in literals:
+        if not all(" " <= c <= "~" for c in literal):
+            return None
+        text = literal.translate(table)
+        if not text or text != text.strip(" ") or "  " in text:
+            return None
+        needles.append("%s%s%s" % (" " if has_lead else "", text,
+                                   " " if has_trail else ""))
+    return list(dict.fromkeys(needles))
+
+
+def _xpath1_literal(value):
+    """Quote a string as an XPath 1.0 literal.
+
+    XPath 1.0 has no escape syntax, so strings holding both kinds of
+    quote are built with concat().
+    """
+    if "'" not in value:
+        return "'%s'" % value
+    if '"' not in value:
+        return '"%s"' % value
+    parts = ["'%s'" % p if p else None for p in value.split("'")]
+    pieces = []
+    for i, part in enumerate(parts):
+        if i:
+            pieces.append('"\'"')
+        if part:
+            pieces.append(part)
+    return "concat(%s)" % ", ".join(pieces)
+
+
+def _xslt1_text_expr(ignorecase):
+    """XPath 1.0 expression for the normalized text of the context node."""
+    source, target = _xslt1_translation(ignorecase)
+    return "concat(' ', translate(normalize-space(.), %s, %s), ' ')" % (
+        _xpath1_literal(source), _xpath1_literal(target))
+
+
+def write_xslt1_variant(rule_name, extends_type, level, context, entries,
+                        ignorecase, role):
+    """Write the XSLT 1.0 variant of an existence or substitution rule.
+
+    The variant has an 'xslt' queryBinding and keeps only the entries
+    that xslt1_needles() can express as contains() tests, so it compiles
+    with libxslt through lxml. The normalized text is bound once per
+    context node with sch:let. Rules without any literal entry get no
+    variant, and a variant left over from an earlier run is removed.
+
+    Returns:
+        Number of entries written to the variant.
+    """
+    reports = []
+    for converted, _, msg in entries:
+        needles = xslt1_needles(converted, ignorecase)
+        if needles:
+            reports.append((needles, msg))
+
+    GENERATED_XSLT1_PATTERNS.pop(rule_name, None)
+    if not reports:
+        filepath = os.path.join(XSLT1_OUTPUT_DIR, "%s.sch" % rule_name)
+        if os.path.exists(filepath):
+            os.remove(filepath)
+        return 0
+
+    schema = make_schema_element(rule_name, rule_name, extends_type, level,
+                                 query_binding="xslt")
+    schema.append(etree.Comment(
+        " XSLT 1.0 variant: %d of %d patterns as literal contains() tests "
+        % (len(reports), len(entries))
+    ))
+
+    pattern = etree.SubElement(schema, SCH + "pattern")
+    pattern.set("id", "RedHat-%s" % rule_name)
+
+    rule_el = etree.SubElement(pattern, SCH + "rule")
+    rule_el.set("context", context)
+
+    let = etree.SubElement(rule_el, SCH + "let")
+    let.set("name", "text")
+    let.set("value", _xslt1_text_expr(ignorecase))
+
+    for needles, msg in reports:
+        report = etree.SubElement(rule_el, SCH + "report")
+        report.set("test", " or ".join(
+            "contains($text, %s)" % _xpath1_literal(n) for n in needles))
+        report.set("role", role)
+        report.text = msg
+
+    write_schematron_file(rule_name, schema, output_dir=XSLT1_OUTPUT_DIR)
+    GENERATED_XSLT1_PATTERNS[rule_name] = schema.findall(SCH + "pattern")
+    return len(reports)
+
+
 def parse_vale_rule(filepath):
     """Parse a Vale YAML rule file and return its fields as a dict."""
     with open(filepath, "r", encoding="utf-8") as f:
@@ -612,10 +1127,11 @@ def parse_vale_rule(filepath):
     return data
 
 
-def make_schema_element(title, source_comment, extends_type, level):
+def make_schema_element(title, source_comment, extends_type, level,
+                        query_binding="xslt2"):
     """Create the root sch:schema element with metadata."""
     schema = etree.Element(SCH + "schema", nsmap=NSMAP)
-    schema.set("queryBinding", "xslt2")
+    schema.set("queryBinding", query_binding)
     schema.set("schemaVersion", "iso")
 
     title_el = etree.SubElement(schema, SCH + "title")
@@ -632,44 +1148,355 @@ def make_schema_element(title, source_comment, extends_type, level):
     return schema
 
 
-def write_schematron_file(rule_name, schema_element):
+def sha256_bytes(data):
+    """Return the hex SHA-256 digest of a bytes object."""
+    return hashlib.sha256(data).hexdigest()
+
+
+def sha256_file(filepath):
+    """Return the hex SHA-256 digest of a file, or None if it is missing."""
+    try:
+        with open(filepath, "rb") as f:
+            return sha256_bytes(f.read())
+    except FileNotFoundError:
+        return None
+
+
+def write_if_changed(filepath, data):
+    """Write bytes to a file unless it already holds exactly those bytes.
+
+    Leaving identical files untouched keeps their mtimes, so downstream
+    make-style pipelines and DITA-OT caches stay valid.
+
+    Returns:
+        True if the file was written, False if it was already current.
+    """
+    try:
+        with open(filepath, "rb") as f:
+            if f.read() == data:
+                return False
+    except FileNotFoundError:
+        pass
+    with open(filepath, "wb") as f:
+        f.write(data)
+    return True
+
+
+def write_schematron_file(rule_name, schema_element, output_dir=OUTPUT_DIR):
     """Write a sch:schema element to a .sch file."""
-    os.makedirs(OUTPUT_DIR, exist_ok=True)
-    filepath = os.path.join(OUTPUT_DIR, "%s.sch" % rule_name)
-    tree = etree.ElementTree(schema_element)
-    tree.write(
-        filepath,
+    os.makedirs(output_dir, exist_ok=True)
+    filepath = os.path.join(output_dir, "%s.sch" % rule_name)
+    data = etree.tostring(
+        schema_element,
         xml_declaration=True,
         encoding="UTF-8",
         pretty_print=True,
     )
+    write_if_changed(filepath, data)
+
+
+def generator_version():
+    """Return a fingerprint of this generator's source code.
+
+    Any change to the conversion logic invalidates every manifest entry.
+    """
+    return sha256_file(os.path.abspath(__file__))
 
 
-def write_combined_schematron(rule_names):
-    """Write RedHat-all.sch with all patterns inlined from individual .sch files."""
+def load_manifest():
+    """Load the incremental build manifest from the output directory.
+
+    Returns an empty manifest if none exists, if it cannot be read, or
+    if it was written by a different version of the generator.
+    """
+    empty = {"generator": generator_version(), "rules": {}, "combined": {}}
+    try:
+        with open(MANIFEST_PATH, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (FileNotFoundError, ValueError):
+        return empty
+    if manifest.get("generator") != empty["generator"]:
+        return empty
+    manifest.setdefault("rules", {})
+    manifest.setdefault("combined", {})
+    return manifest
+
+
+def write_manifest(manifest):
+    """Write the incremental build manifest, sorted for stable diffs."""
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    data = json.dumps(manifest, indent=2, sort_keys=True) + "\n"
+    write_if_changed(MANIFEST_PATH, data.encode("utf-8"))
+
+
+def rule_source_hash(rule_name):
+    """Return the SHA-256 of a rule's Vale YAML file, or None if missing."""
+    return sha256_file(os.path.join(VALE_STYLES_DIR, "%s.yml" % rule_name))
+
+
+def rule_is_current(entry, source_hash, options):
+    """Check whether a manifest entry still matches its inputs and output.
+
+    A rule is current when its YAML source and generation options are
+    unchanged and its .sch file, and XSLT 1.0 variant if any, still hold
+    the bytes recorded when they were emitted.
+    """
+    if not entry or source_hash is None:
+        return False
+    if entry.get("source") != source_hash or entry.get("options") != options:
+        return False
+    filepath = os.path.join(OUTPUT_DIR, "%s.sch" % entry["name"])
+    xslt1_path = os.path.join(XSLT1_OUTPUT_DIR, "%s.sch" % entry["name"])
+    return (sha256_file(filepath) == entry.get("artifact")
+            and sha256_file(xslt1_path) == entry.get("xslt1_artifact"))
+
+
+def _iter_rule_patterns(rule_names, patterns, output_dir=OUTPUT_DIR):
+    """Yield (rule_name, sch:pattern elements) in sorted rule order.
+
+    Patterns of rules generated in this run are taken from memory and
+    released from the patterns dict as they are consumed. Only rules
+    that were skipped as up to date are read back from their .sch file
+    in output_dir.
+    """
+    for name in sorted(rule_names):
+        if name in patterns:
+            yield name, patterns.pop(name)
+        else:
+            filepath = os.path.join(output_dir, "%s.sch" % name)
+            parser = etree.XMLParser(remove_blank_text=True)
+            root = etree.parse(filepath, parser).getroot()
+            yield name, root.findall(SCH + "pattern")
+
+
+_COMPACT_CONTEXT_RE = re.compile(
+    r"^//\*\[(self::[\w.-]+(?: or self::[\w.-]+)*)\](\[[^\[\]]*\])?$")
+
+
+def _context_elements(context):
+    """Return the element names selected by a compact context, or None.
+
+    Only contexts built by _compact_context() are recognized, since for
+    those the selected nodes are limited to the named elements whatever
+    the exclusion predicate.
+    """
+    m = _COMPACT_CONTEXT_RE.match(context)
+    if not m:
+        return None
+    return frozenset(re.findall(r"self::([\w.-]+)", m.group(1)))
+
+
+def _free_name(name, taken):
+    """Return name, or name with a new numeric suffix if it is taken."""
+    if name not in taken:
+        return name
+    base = name.rstrip("0123456789")
+    n = 2
+    while "%s%d" % (base, n) in taken:
+        n += 1
+    return "%s%d" % (base, n)
+
+
+def _rename_variables(expr, renames):
+    """Rewrite $name references in an XPath expression."""
+    if not renames or not expr:
+        return expr
+    names = "|".join(re.escape(n) for n in sorted(renames, key=len, reverse=True))
+    return re.sub(r"\$(%s)(?![\w.-])" % names,
+                  lambda m: "$" + renames[m.group(1)], expr)
+
+
+def _merge_rule_into(target, rule_el, source_id, bound):
+    """Move the children of rule_el to the end of the target sch:rule.
+
+    sch:let variables are moved ahead of the checks, shared when target
+    already binds the same value, and renamed when their name is taken,
+    with references in later tests rewritten to match.
+
+    Args:
+        target: The merged sch:rule element.
+        rule_el: The sch:rule whose checks are appended.
+        source_id: Id of the pattern rule_el came from, recorded in a
+            comment so merged reports can be traced back to their rule.
+        bound: Dict of let value to variable name in target, updated.
+    """
+    target.append(etree.Comment(" %s " % source_id))
+    renames = {}
+    for child in list(rule_el):
+        if child.tag == SCH + "let":
+            name = child.get("name")
+            value = _rename_variables(child.get("value"), renames)
+            if value in bound:
+                renames[name] = bound[value]
+                continue
+            new_name = _free_name(name, set(bound.values()))
+            if new_name != name:
+                renames[name] = new_name
+            child.set("name", new_name)
+            child.set("value", value)
+            bound[value] = new_name
+            # ISO Schematron requires lets before the checks of a rule.
+            # They go after the first source comment, which stays first.
+            target.insert(len(bound), child)
+            continue
+        elif isinstance(child.tag, str) and child.get("test"):
+            child.set("test", _rename_variables(child.get("test"), renames))
+        target.append(child)
+
+
+def group_patterns_by_context(patterns):
+    """Regroup sch:pattern elements so each context is visited once.
+
+    A Schematron processor walks the document once per pattern. Rules
+    with the same context are merged into one sch:rule, which fires
+    exactly the same reports. Merged rules then share a pattern when
+    their contexts select disjoint element sets, since first-match
+    semantics within a pattern only differ from separate patterns when
+    a node matches more than one rule. Contexts that may overlap, and
+    patterns with several rules, keep a pattern of their own.
+
+    Returns:
+        List of sch:pattern elements, in order of first appearance.
+    """
+    merged = {}
+    order = []
+    kept = []
+    for pattern in patterns:
+        rules = pattern.findall(SCH + "rule")
+        if len(rules) != 1:
+            kept.append(pattern)
+            continue
+        context = rules[0].get("context")
+        if context not in merged:
+            rule_el = etree.Element(SCH + "rule")
+            rule_el.set("context", context)
+            merged[context] = (rule_el, {}, [])
+            order.append(context)
+        rule_el, bound, sources = merged[context]
+        _merge_rule_into(rule_el, rules[0], pattern.get("id"), bound)
+        sources.append(pattern)
+
+    groups = []
+    for context in order:
+        elements = _context_elements(context)
+        for group in groups:
+            if elements is not None and all(
+                    other is not None and not (elements & other)
+                    for other in group["elements"]):
+                break
+        else:
+            group = {"contexts": [], "elements": []}
+            groups.append(group)
+        group["contexts"].append(context)
+        group["elements"].append(elements)
+
+    grouped = []
+    merged_count = 0
+    for group in groups:
+        contexts = group["contexts"]
+        if len(contexts) == 1 and len(merged[contexts[0]][2]) == 1:
+            source = merged[contexts[0]][2][0]
+            pattern = etree.Element(SCH + "pattern")
+            for name, value in source.attrib.items():
+                pattern.set(name, value)
+            rule_el = merged[contexts[0]][0]
+            # The source comment, which _merge_rule_into() keeps first.
+            rule_el.remove(rule_el[0])
+        else:
+            merged_count += 1
+            pattern = etree.Element(SCH + "pattern")
+            pattern.set("id", "RedHat-context-%d" % merged_count)
+        for context in contexts:
+            pattern.append(merged[context][0])
+        grouped.append(pattern)
+    return grouped + kept
+
+
+def _combined_schema_element(query_binding="xslt2"):
+    """Create the empty sch:schema root of RedHat-all.sch."""
     schema = etree.Element(SCH + "schema", nsmap=NSMAP)
-    schema.set("queryBinding", "xslt2")
+    schema.set("queryBinding", query_binding)
     schema.set("schemaVersion", "iso")
 
     title_el = etree.SubElement(schema, SCH + "title")
     title_el.text = "RedHat: All rules"
 
     schema.append(etree.Comment(" Combined Schematron — all patterns inlined "))
+    return schema
 
-    for name in sorted(rule_names):
-        filepath = os.path.join(OUTPUT_DIR, "%s.sch" % name)
-        tree = etree.parse(filepath)
-        for pattern in tree.findall(SCH + "pattern"):
-            schema.append(copy.deepcopy(pattern))
 
-    write_schematron_file("RedHat-all", schema)
+def write_combined_schematron(rule_names, patterns=None, stream=False,
+                              output_dir=OUTPUT_DIR, query_binding="xslt2",
+                              group=False):
+    """Write RedHat-all.sch with all patterns inlined.
+
+    Args:
+        rule_names: Names of the rules to include.
+        patterns: Dict of in-memory sch:pattern elements by rule name,
+            GENERATED_PATTERNS by default. Rules missing from it are
+            read from their .sch file.
+        stream: If True, write the schema incrementally, one rule at
+            a time, instead of building the whole combined tree in
+            memory. Pass an empty patterns dict to read every rule
+            back from its .sch file and release it once written. The
+            streamed file is identical to the one built in memory.
+        output_dir: Directory holding the per-rule .sch files and the
+            combined schema, XSLT1_OUTPUT_DIR for the XSLT 1.0 variant.
+        query_binding: queryBinding of the combined schema.
+        group: If True, regroup the patterns with
+            group_patterns_by_context() so that each distinct context is
+            visited once instead of once per rule. Grouping needs every
+            pattern at once, even when streaming.
+    """
+    if patterns is None:
+        patterns = GENERATED_PATTERNS
+    rule_patterns = _iter_rule_patterns(rule_names, patterns, output_dir)
+    if group:
+        rule_patterns = [(None, group_patterns_by_context(
+            p for _, pattern_list in rule_patterns for p in pattern_list))]
+
+    if not stream:
+        schema = _combined_schema_element(query_binding)
+        for _, pattern_list in rule_patterns:
+            for pattern in pattern_list:
+                schema.append(pattern)
+        write_schematron_file("RedHat-all", schema, output_dir=output_dir)
+        return
+
+    os.makedirs(output_dir, exist_ok=True)
+    filepath = os.path.join(output_dir, "RedHat-all.sch")
+    tmp_path = filepath + ".tmp"
+    # Each pattern is serialized inside an otherwise empty schema and
+    # cut out of it, so that it gets the indentation of the combined
+    # tree and no namespace declaration of its own.
+    header = etree.tostring(_combined_schema_element(query_binding),
+                            encoding="UTF-8", pretty_print=True)
+    end = b"</sch:schema>\n"
+    start = header[:-len(end)]
+
+    with open(tmp_path, "wb") as f:
+        f.write(b"<?xml version='1.0' encoding='UTF-8'?>\n")
+        f.write(start)
+        for _, pattern_list in rule_patterns:
+            for pattern in pattern_list:
+                holder = _combined_schema_element(query_binding)
+                holder.append(pattern)
+                data = etree.tostring(holder, encoding="UTF-8", pretty_print=True)
+                f.write(data[len(start):-len(end)])
+        f.write(end)
+
+    if sha256_file(tmp_path) == sha256_file(filepath):
+        os.remove(tmp_path)
+    else:
+        os.replace(tmp_path, filepath)
 
 
-def generate_rule(rule_name):
+def generate_rule(rule_name, optimize=False):
     """Generate a Schematron rule from a Vale YAML file.
 
     Args:
         rule_name: Name of the rule (e.g., 'Abbreviations')
+        optimize: If True, merge per-token reports into combined tests
     Returns:
         rule_name on success, None on skip/failure
     """
@@ -689,7 +1516,8 @@ def generate_rule(rule_name):
         # Dispatch to type handler (will be implemented in Tasks 2-4)
         handler = TYPE_HANDLERS.get(extends)
         if handler:
-            handler(rule_name, rule_data)
+            schema = handler(rule_name, rule_data, optimize=optimize)
+            GENERATED_PATTERNS[rule_name] = schema.findall(SCH + "pattern")
             return rule_name
         else:
             print("Warning: No handler for type '%s' (rule: %s)" % (extends, rule_name), file=sys.stderr)
@@ -700,30 +1528,199 @@ def generate_rule(rule_name):
         return None
 
 
-def main():
+def _generate_rule_job(rule_name, optimize, serialize=False, keep=True):
+    """Generate one rule and return its coverage record.
+
+    COVERAGE_DATA, GENERATED_PATTERNS and GENERATED_XSLT1_PATTERNS are
+    per process, so pool workers hand their records back to the parent
+    instead of sharing the module globals. lxml elements cannot be
+    pickled, so workers return their sch:pattern elements serialized.
+    With keep=False, the patterns are released once the rule is written.
+
+    Returns:
+        (rule_name, result, coverage, patterns, xslt1_patterns) where
+        result is the value of generate_rule(), coverage is None on
+        skip/failure, and patterns and xslt1_patterns are lists of
+        serialized sch:pattern elements if serialize is True, otherwise
+        None.
+    """
+    result = generate_rule(rule_name, optimize=optimize)
+    if not result:
+        return rule_name, None, None, None, None
+    patterns = xslt1_patterns = None
+    if not keep:
+        GENERATED_PATTERNS.pop(result)
+        GENERATED_XSLT1_PATTERNS.pop(result, None)
+    elif serialize:
+        patterns = [etree.tostring(p, encoding="unicode")
+                    for p in GENERATED_PATTERNS.pop(result)]
+        xslt1_patterns = [etree.tostring(p, encoding="unicode")
+                          for p in GENERATED_XSLT1_PATTERNS.pop(result, [])]
+    return rule_name, result, COVERAGE_DATA.get(result), patterns, xslt1_patterns
+
+
+def generate_rules(rule_names, optimize=False, jobs=1, keep_patterns=True):
+    """Generate several rules, optionally across a process pool.
+
+    Each rule writes its own .sch file, so workers never share output.
+    Results are returned in the order of rule_names whatever the order
+    in which workers finish, which keeps the merged coverage data and
+    the combined schema identical to a serial run.
+
+    Args:
+        rule_names: Rule names to generate, in output order.
+        optimize: Passed through to generate_rule().
+        jobs: Number of worker processes; 1 runs in this process.
+        keep_patterns: If False, do not keep the sch:pattern elements
+            in GENERATED_PATTERNS and GENERATED_XSLT1_PATTERNS, for a
+            combined schema streamed from the .sch files.
+    Returns:
+        List of (rule_name, result, coverage) tuples.
+    """
+    if jobs <= 1 or len(rule_names) <= 1:
+        jobs_done = [_generate_rule_job(name, optimize, keep=keep_patterns)
+                     for name in rule_names]
+    else:
+        count = len(rule_names)
+        with ProcessPoolExecutor(max_workers=min(jobs, count)) as pool:
+            jobs_done = list(pool.map(
+                _generate_rule_job, rule_names, [optimize] * count,
+                [True] * count, [keep_patterns] * count))
+
+    results = []
+    for rule_name, result, coverage, patterns, xslt1_patterns in jobs_done:
+        if patterns is not None:
+            GENERATED_PATTERNS[result] = [etree.fromstring(p) for p in patterns]
+        if xslt1_patterns:
+            GENERATED_XSLT1_PATTERNS[result] = [
+                etree.fromstring(p) for p in xslt1_patterns]
+        results.append((rule_name, result, coverage))
+    return results
+
+
+def _positive_int(value):
+    """argparse type for an integer of at least 1."""
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError("must be at least 1")
+    return number
+
+
+def parse_args(argv=None):
+    """Parse command-line options."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--optimize", action="store_true",
+        help="merge per-token reports into prefix-factored combined "
+             "regexes, evaluated once per context node",
+    )
+    parser.add_argument(
+        "--force", action="store_true",
+        help="regenerate every rule, ignoring the manifest in the "
+             "output directory",
+    )
+    parser.add_argument(
+        "--stream", action="store_true",
+        help="write RedHat-all.sch incrementally from the per-rule files, "
+             "one rule at a time, to keep memory flat for large swap maps",
+    )
+    parser.add_argument(
+        "--group-contexts", action="store_true",
+        help="merge the reports of RedHat-all.sch that share a context "
+             "into as few patterns as possible",
+    )
+    parser.add_argument(
+        "-j", "--jobs", type=_positive_int, default=1, metavar="N",
+        help="generate rules in N worker processes (default: 1)",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
     """Main entry point: generate all Schematron rules."""
+    args = parse_args(argv)
+    options = {"optimize": args.optimize}
+
     print("Generating Schematron rules from Vale YAML files...")
     print("Vale styles dir: %s" % VALE_STYLES_DIR)
     print("Output dir: %s" % OUTPUT_DIR)
     print()
 
-    generated = []
+    manifest = load_manifest()
+    if args.force:
+        manifest["rules"] = {}
+        manifest["combined"] = {}
+
+    source_hashes = {}
+    stale = []
     for rule_name in RULES_TO_GENERATE:
-        result = generate_rule(rule_name)
-        if result:
-            generated.append(result)
+        source_hashes[rule_name] = rule_source_hash(rule_name)
+        entry = manifest["rules"].get(rule_name)
+        if rule_is_current(entry, source_hashes[rule_name], options):
+            COVERAGE_DATA[rule_name] = entry["coverage"]
+        else:
+            manifest["rules"].pop(rule_name, None)
+            stale.append(rule_name)
+
+    rebuilt = []
+    for rule_name, result, coverage in generate_rules(
+            stale, optimize=args.optimize, jobs=args.jobs,
+            keep_patterns=not args.stream):
+        if not result:
+            continue
+        COVERAGE_DATA[result] = coverage
+        rebuilt.append(result)
+        manifest["rules"][result] = {
+            "name": result,
+            "source": source_hashes[rule_name],
+            "options": options,
+            "artifact": sha256_file(
+                os.path.join(OUTPUT_DIR, "%s.sch" % result)),
+            "xslt1_artifact": sha256_file(
+                os.path.join(XSLT1_OUTPUT_DIR, "%s.sch" % result)),
+            "coverage": coverage,
+        }
+
+    generated = [name for name in RULES_TO_GENERATE
+                 if name in manifest["rules"]]
 
     if generated:
-        print()
-        print("Writing combined schema...")
-        write_combined_schematron(generated)
+        combined_path = os.path.join(OUTPUT_DIR, "RedHat-all.sch")
+        xslt1_combined_path = os.path.join(XSLT1_OUTPUT_DIR, "RedHat-all.sch")
+        xslt1_rules = [name for name in generated
+                       if manifest["rules"][name].get("xslt1_artifact")]
+        combined = manifest["combined"]
+        combined_options = {"group_contexts": args.group_contexts}
+        if (rebuilt or combined.get("rules") != sorted(generated)
+                or combined.get("options") != combined_options
+                or sha256_file(combined_path) != combined.get("artifact")
+                or sha256_file(xslt1_combined_path)
+                != combined.get("xslt1_artifact")):
+            print()
+            print("Writing combined schema...")
+            write_combined_schematron(generated, stream=args.stream,
+                                      group=args.group_contexts)
+            if xslt1_rules:
+                write_combined_schematron(
+                    xslt1_rules, patterns=GENERATED_XSLT1_PATTERNS,
+                    stream=args.stream, output_dir=XSLT1_OUTPUT_DIR,
+                    query_binding="xslt", group=args.group_contexts)
+            manifest["combined"] = {
+                "rules": sorted(generated),
+                "options": combined_options,
+                "artifact": sha256_file(combined_path),
+                "xslt1_artifact": sha256_file(xslt1_combined_path),
+            }
         write_coverage_md()
+        write_manifest(manifest)
         print()
-        print("Generated %d rules:" % len(generated))
+        print("Generated %d rules (%d rebuilt, %d up to date):" % (
+            len(generated), len(rebuilt), len(generated) - len(rebuilt)))
         for name in sorted(generated):
             print("  - %s.sch" % name)
         print()
         print("Combined schema: RedHat-all.sch")
+        print("XSLT 1.0 variants: %d rules in xslt1/" % len(xslt1_rules))
     else:
         print("No rules generated (no type handlers implemented yet)")
 
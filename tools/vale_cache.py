@@ -0,0 +1,491 @@
+#!/usr/bin/env python3
+# Copyright (c) 2024 Red Hat, Inc.
+# This program and the accompanying materials are made
+# available under the terms of the Eclipse Public License 2.0
+# which is available at https://www.eclipse.org/legal/epl-2.0/
+#
+# SPDX-License-Identifier: EPL-2.0
+"""Run Vale with the alerts of unchanged files reused from a cache.
+
+The alerts of each file are stored in an SQLite database, keyed by the
+SHA-256 of the file content, the effective .vale.ini, the styles tree
+that StylesPath points to, the Vale version and the file path relative
+to the configuration, since the sections of .vale.ini match on paths.
+Vale only runs on the files missing from the cache, and the cached and
+new alerts are merged into one report. A CI job that touches a handful
+of files in a large repository therefore only lints those files.
+
+The files to lint are split into shards of roughly equal byte size,
+each short enough for one command line, and linted by --jobs Vale
+processes in parallel. When Vale fails on a shard, the shard is split
+until the failing files are isolated: they are reported, left out of
+the report and the cache, and the exit status is 2. When Vale also
+fails on an empty document, the configuration or the styles are at
+fault: the error is reported once, and the exit status is 2.
+
+The configuration is --config, then $VALE_CONFIG_PATH, then .vale.ini
+or _vale.ini in the current directory or one of its parents. Without
+one, Vale runs without --config to fall back on the user or global
+configuration itself, and the cache is not used.
+
+Usage:
+    tools/vale_cache.py [--config INI] [--cache-dir DIR]
+                        [--output line|JSON] [--minAlertLevel LEVEL]
+                        [--jobs N] [--no-exit] [--file-list LIST]
+                        [FILE...]
+"""
+
+import argparse
+import concurrent.futures
+import configparser
+import functools
+import hashlib
+import heapq
+import json
+import os
+import sqlite3
+import subprocess
+import sys
+import time
+
+DEFAULT_CACHE_DIR = os.path.join(
+    os.path.expanduser("~"), ".cache", "vale-at-red-hat", "vale")
+CONFIG_NAMES = (".vale.ini", "_vale.ini")
+
+# Bump when the cached alerts or the key change.
+CACHE_VERSION = 1
+
+# Bytes of file arguments passed to one Vale process, well below the
+# argument length limit of common systems.
+MAX_ARGS_BYTES = 128 << 10
+
+# Shards per Vale process, when running several.
+SHARDS_PER_JOB = 4
+
+LEVELS = ("suggestion", "warning", "error")
+
+# Configuration that lints AsciiDoc and Markdown files with the RedHat
+# style of a given StylesPath, as the repositories that use it do.
+VALE_CONFIG = """StylesPath = {styles}
+
+MinAlertLevel = suggestion
+
+IgnoredScopes = code, tt, img, url, a, body.id
+
+SkippedScopes = script, style, pre, figure, code, tt, blockquote, listingblock, literalblock
+
+Packages = RedHat
+
+[[!.]*.adoc]
+BasedOnStyles = RedHat
+
+[*.md]
+BasedOnStyles = RedHat
+TokenIgnores = (\\x60[^\\n\\x60]+\\x60), ([^\\n]+=[^\\n]*), (\\+[^\\n]+\\+), (http[^\\n]+\\[)
+"""
+
+
+class ValeError(Exception):
+    """Raised when Vale cannot be run or its output cannot be read."""
+
+
+def find_config(config=None, start="."):
+    """Return the path of the project Vale configuration file.
+
+    Looks at config, $VALE_CONFIG_PATH, then start and its parents, but
+    not at the user or global configuration that Vale falls back on.
+
+    Returns:
+        The absolute path, or None if no configuration is found.
+
+    Raises:
+        ValeError: if config or $VALE_CONFIG_PATH is not a file.
+    """
+    config = config or os.environ.get("VALE_CONFIG_PATH")
+    if config:
+        if not os.path.isfile(config):
+            raise ValeError("Configuration file not found: %s" % config)
+        return os.path.abspath(config)
+    directory = os.path.abspath(start)
+    while True:
+        for name in CONFIG_NAMES:
+            path = os.path.join(directory, name)
+            if os.path.isfile(path):
+                return path
+        parent = os.path.dirname(directory)
+        if parent == directory:
+            return None
+        directory = parent
+
+
+def styles_path(config):
+    """Return the absolute StylesPath of a configuration, or None."""
+    parser = configparser.ConfigParser(interpolation=None, strict=False)
+    with open(config, encoding="utf-8") as f:
+        parser.read_string("[*core*]\n" + f.read())
+    path = parser.get("*core*", "StylesPath", fallback=None)
+    if not path:
+        return None
+    return os.path.join(os.path.dirname(config), os.path.expanduser(path.strip()))
+
+
+def file_hash(path):
+    """Return the SHA-256 of a file."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def tree_hash(path):
+    """Return the SHA-256 of the files below path and their relative paths."""
+    digest = hashlib.sha256()
+    for dirpath, dirnames, filenames in os.walk(path):
+        dirnames.sort()
+        for filename in sorted(filenames):
+            full = os.path.join(dirpath, filename)
+            relative = os.path.relpath(full, path).replace(os.sep, "/")
+            digest.update(relative.encode("utf-8") + b"\0"
+                          + bytes.fromhex(file_hash(full)))
+    return digest.hexdigest()
+
+
+def vale_version(vale="vale"):
+    try:
+        result = subprocess.run([vale, "-v"], stdout=subprocess.PIPE,
+                                stderr=subprocess.PIPE)
+    except OSError as e:
+        raise ValeError("Cannot run %s: %s" % (vale, e))
+    return result.stdout.decode("utf-8", "replace").strip()
+
+
+def settings_digest(config, vale="vale"):
+    """Return the digest of everything but the files that affects alerts."""
+    styles = styles_path(config)
+    return hashlib.sha256(json.dumps([
+        CACHE_VERSION,
+        vale_version(vale),
+        file_hash(config),
+        tree_hash(styles) if styles and os.path.isdir(styles) else None,
+    ]).encode("utf-8")).hexdigest()
+
+
+class ResultCache:
+    """Alerts per file, stored in an SQLite database.
+
+    Several jobs may share the database: writes are short transactions
+    and readers are not blocked, in write-ahead logging mode.
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR):
+        os.makedirs(cache_dir, exist_ok=True)
+        self.db = sqlite3.connect(os.path.join(cache_dir, "alerts.sqlite"),
+                                  timeout=60)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("CREATE TABLE IF NOT EXISTS alerts ("
+                        "key TEXT PRIMARY KEY, alerts TEXT NOT NULL, "
+                        "used REAL NOT NULL)")
+
+    def get(self, keys):
+        """Return a dict of key -> alerts for the keys found in the cache."""
+        found = {}
+        keys = list(keys)
+        # SQLite limits the number of parameters of one statement.
+        for start in range(0, len(keys), 500):
+            chunk = keys[start:start + 500]
+            rows = self.db.execute(
+                "SELECT key, alerts FROM alerts WHERE key IN (%s)"
+                % ",".join("?" * len(chunk)), chunk)
+            for key, alerts in rows:
+                found[key] = json.loads(alerts)
+        with self.db:
+            self.db.executemany("UPDATE alerts SET used = ? WHERE key = ?",
+                                [(time.time(), key) for key in found])
+        return found
+
+    def put(self, items):
+        """Store (key, alerts) pairs."""
+        now = time.time()
+        with self.db:
+            self.db.executemany(
+                "INSERT OR REPLACE INTO alerts VALUES (?, ?, ?)",
+                [(key, json.dumps(alerts), now) for key, alerts in items])
+
+    def prune(self, max_age_days):
+        """Remove entries that were not used in max_age_days."""
+        with self.db:
+            cursor = self.db.execute(
+                "DELETE FROM alerts WHERE used < ?",
+                (time.time() - max_age_days * 86400,))
+        return cursor.rowcount
+
+    def close(self):
+        self.db.close()
+
+
+def argument_batches(files, max_bytes=MAX_ARGS_BYTES):
+    """Split file arguments into lists that fit on one command line."""
+    batch = []
+    size = 0
+    for path in files:
+        length = len(os.fsencode(path)) + 1
+        if batch and size + length > max_bytes:
+            yield batch
+            batch = []
+            size = 0
+        batch.append(path)
+        size += length
+    if batch:
+        yield batch
+
+
+def shards(files, count, max_bytes=MAX_ARGS_BYTES):
+    """Split files into about count lists of roughly equal byte size.
+
+    Files are dealt largest first to the lightest shard. Shards that
+    would not fit on one command line are split further. The shards
+    are returned heaviest first, so the longest runs start first.
+    """
+    sizes = {}
+    for path in files:
+        try:
+            sizes[path] = os.path.getsize(path)
+        except OSError:
+            sizes[path] = 0
+    heap = [(0, index, []) for index in range(max(1, min(count, len(files))))]
+    for path in sorted(files, key=lambda path: (-sizes[path], path)):
+        size, index, shard = heapq.heappop(heap)
+        shard.append(path)
+        heapq.heappush(heap, (size + sizes[path], index, shard))
+    result = []
+    for size, index, shard in sorted(heap, key=lambda item: (-item[0], item[1])):
+        result.extend(argument_batches(shard, max_bytes))
+    return result
+
+
+def _vale_json(files, config, vale, stdin=None):
+    """Run Vale and return its JSON report.
+
+    Returns:
+        (dict of file as Vale reports it -> alerts, or None when Vale
+        wrote no JSON report, error message)
+    """
+    command = [vale, "--output=JSON", "--no-exit"] + files
+    if config:
+        command.insert(1, "--config=%s" % config)
+    try:
+        result = subprocess.run(command, input=stdin, stdout=subprocess.PIPE,
+                                stderr=subprocess.PIPE)
+    except OSError as e:
+        raise ValeError("Cannot run %s: %s" % (vale, e))
+    try:
+        report = json.loads(result.stdout.decode("utf-8"))
+    except ValueError:
+        report = None
+    if isinstance(report, dict):
+        return report, ""
+    error = result.stderr.decode("utf-8", "replace").strip()
+    return None, error or "exit status %d" % result.returncode
+
+
+@functools.lru_cache(maxsize=None)
+def _config_error(config, vale):
+    """Return the error of Vale on an empty document, or None.
+
+    Vale loads the configuration and the styles before it reads any
+    file, so this fails exactly when no file can be linted.
+    """
+    report, error = _vale_json([], config, vale, stdin=b"")
+    return None if report is not None else error
+
+
+def _run_shard(files, config, vale):
+    """Lint one shard, bisecting it to isolate the files Vale fails on.
+
+    Raises:
+        ValeError: if Vale fails whatever the file, for example on a
+            broken configuration, rather than bisect down to every file.
+
+    Returns:
+        (dict of file as Vale reports it -> alerts, dict of file -> error)
+    """
+    report, error = _vale_json(files, config, vale)
+    if report is not None:
+        return report, {}
+    config_error = _config_error(config, vale)
+    if config_error is not None:
+        raise ValeError("Vale failed: %s" % config_error)
+    if len(files) == 1:
+        return {}, {files[0]: error}
+    middle = len(files) // 2
+    report, failures = _run_shard(files[:middle], config, vale)
+    more_report, more_failures = _run_shard(files[middle:], config, vale)
+    report.update(more_report)
+    failures.update(more_failures)
+    return report, failures
+
+
+def run_vale(files, config, vale="vale", jobs=1):
+    """Lint files with parallel Vale processes and merge their reports.
+
+    Every linted file is in the result, with an empty list when it has
+    no alerts, whatever form of its path Vale reports. A shard that Vale
+    fails on is split until the failing files are found, so the other
+    files of the shard are still linted. Without config, Vale finds its
+    configuration itself.
+
+    Returns:
+        (dict of file -> alerts, dict of file -> error)
+    """
+    by_path = {os.path.abspath(path): path for path in files}
+    results = {}
+    failures = {}
+    jobs = max(1, jobs)
+    # More shards than processes, so that a slow shard does not hold
+    # back the others.
+    parts = shards(files, jobs * SHARDS_PER_JOB if jobs > 1 else 1)
+    executor = concurrent.futures.ThreadPoolExecutor(jobs)
+    try:
+        for report, shard_failures in executor.map(
+                lambda shard: _run_shard(shard, config, vale), parts):
+            for path, alerts in report.items():
+                results[by_path.get(os.path.abspath(path), path)] = alerts
+            failures.update(shard_failures)
+    finally:
+        # Do not start the queued shards once one has raised.
+        executor.shutdown(cancel_futures=True)
+    for path in files:
+        if path not in failures:
+            results.setdefault(path, [])
+    return results, failures
+
+
+def lint(files, config, cache, vale="vale", jobs=1):
+    """Return the alerts of files, running Vale only on cache misses.
+
+    Returns:
+        (dict of file -> alerts in the order of files, cache hits,
+        dict of file -> error for the files Vale failed on)
+    """
+    settings = settings_digest(config, vale)
+    base = os.path.dirname(config)
+    keys = {}
+    for path in files:
+        relative = os.path.relpath(os.path.abspath(path), base)
+        keys[path] = hashlib.sha256(json.dumps(
+            [settings, relative, file_hash(path)]).encode("utf-8")).hexdigest()
+    cached = cache.get(set(keys.values()))
+    misses = [path for path in files if keys[path] not in cached]
+    linted, failures = run_vale(misses, config, vale, jobs) if misses else ({}, {})
+    cache.put((keys[path], linted[path]) for path in misses if path not in failures)
+    results = {}
+    for path in files:
+        if path in linted:
+            results[path] = linted[path]
+        elif path not in failures:
+            results[path] = cached[keys[path]]
+    return results, len(files) - len(misses), failures
+
+
+def filter_level(results, level):
+    """Drop the alerts below level from results."""
+    minimum = LEVELS.index(level)
+    return {path: [alert for alert in alerts
+                   if alert.get("Severity") not in LEVELS
+                   or LEVELS.index(alert["Severity"]) >= minimum]
+            for path, alerts in results.items()}
+
+
+def write_line(results, out):
+    """Write alerts as `vale --output=line` does."""
+    for path, alerts in results.items():
+        for alert in alerts:
+            out.write("%s:%s:%s:%s:%s\n" % (
+                path, alert.get("Line", 0), (alert.get("Span") or [0])[0],
+                alert.get("Check", ""), alert.get("Message", "")))
+
+
+def read_file_list(path):
+    """Return the non-blank lines of a file list, or of stdin for "-"."""
+    if path == "-":
+        return [line.strip() for line in sys.stdin if line.strip()]
+    with open(path, encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip()]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("files", nargs="*", metavar="FILE", help="file to lint")
+    parser.add_argument(
+        "--file-list", metavar="LIST",
+        help="also lint the files listed in LIST, one per line, or on "
+             "standard input with -, for lists too long for a command line",
+    )
+    parser.add_argument("--config", metavar="INI",
+                        help="Vale configuration file (default: as Vale finds it)")
+    parser.add_argument(
+        "--cache-dir", default=os.environ.get("VALE_CACHE_DIR") or DEFAULT_CACHE_DIR,
+        help="directory of the cache database (default: $VALE_CACHE_DIR "
+             "or %s)" % DEFAULT_CACHE_DIR,
+    )
+    parser.add_argument("--output", choices=("line", "JSON"), default="line",
+                        help="output format (default: line)")
+    parser.add_argument("--minAlertLevel", choices=LEVELS,
+                        help="only report alerts of at least this level")
+    parser.add_argument("--no-exit", action="store_true",
+                        help="exit with status 0 even if there are errors")
+    parser.add_argument("--prune", type=float, metavar="DAYS",
+                        help="first remove cache entries not used in DAYS days")
+    parser.add_argument(
+        "-j", "--jobs", type=int, default=os.cpu_count() or 1, metavar="N",
+        help="number of Vale processes (default: number of CPUs)",
+    )
+    parser.add_argument("--vale", default="vale", help="Vale executable")
+    args = parser.parse_args(argv)
+
+    cache = ResultCache(args.cache_dir)
+    try:
+        if args.prune is not None:
+            print("Pruned %d cached files" % cache.prune(args.prune), file=sys.stderr)
+        if args.file_list:
+            args.files += read_file_list(args.file_list)
+        if not args.files:
+            return 0
+        config = find_config(args.config)
+        if config:
+            results, hits, failures = lint(args.files, config, cache,
+                                           args.vale, args.jobs)
+        else:
+            print("No %s found, linting without the cache" % CONFIG_NAMES[0],
+                  file=sys.stderr)
+            results, failures = run_vale(args.files, None, args.vale, args.jobs)
+            hits = 0
+    except (ValeError, OSError) as e:
+        print(str(e), file=sys.stderr)
+        return 2
+    finally:
+        cache.close()
+    for path, error in sorted(failures.items()):
+        print("Vale failed on %s: %s" % (path, error), file=sys.stderr)
+    print("Linted %d files, %d from the cache" % (len(results), hits),
+          file=sys.stderr)
+
+    if args.minAlertLevel:
+        results = filter_level(results, args.minAlertLevel)
+    # Sorted by path, as Vale writes its JSON report.
+    results = {path: results[path] for path in sorted(results) if results[path]}
+    if args.output == "JSON":
+        json.dump(results, sys.stdout, indent=2, ensure_ascii=False)
+        sys.stdout.write("\n")
+    else:
+        write_line(results, sys.stdout)
+    errors = any(alert.get("Severity") == "error"
+                 for alerts in results.values() for alert in alerts)
+    if failures:
+        return 2
+    return 1 if errors and not args.no_exit else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
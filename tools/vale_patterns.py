@@ -0,0 +1,191 @@
+# Copyright (c) 2024 Red Hat, Inc.
+# This program and the accompanying materials are made
+# available under the terms of the Eclipse Public License 2.0
+# which is available at https://www.eclipse.org/legal/epl-2.0/
+#
+# SPDX-License-Identifier: EPL-2.0
+"""Load the regexes that Vale compiles for the rules of a style.
+
+Shared by tools/analyze-regex-cost.py and tools/benchmark-rules.py.
+Each rule YAML file is turned into pattern records: one per token or
+swap key, and one combined regex per existence or substitution rule,
+wrapped with the flags and word boundaries Vale adds. python_pattern()
+rewrites the few regexp2 constructs that Python's re rejects.
+"""
+
+import glob
+import os
+import re
+
+import yaml
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STYLES_DIR = os.path.join(REPO_ROOT, ".vale", "styles")
+FIXTURES_DIR = os.path.join(REPO_ROOT, ".vale", "fixtures")
+STYLES = ["RedHat", "AsciiDoc", "OpenShiftAsciiDoc"]
+
+
+def _word_bounded(body):
+    return r"\b(?:%s)\b" % body
+
+
+def _vale_regex(body, data, word_bounded, prefix=""):
+    """Wrap a token the way Vale does before compiling it."""
+    regex = _word_bounded(body) if word_bounded else "(?:%s)" % body
+    flags = "(?im)" if data.get("ignorecase", False) else "(?m)"
+    return flags + prefix + regex
+
+
+def rule_patterns(data):
+    """Yield (kind, source, regex) for the regexes Vale compiles for a rule.
+
+    The source is the pattern as written in the YAML file; the regex is
+    the full expression Vale runs, with flags and word boundaries.
+    """
+    extends = data.get("extends")
+    bounded = not data.get("nonword", False)
+
+    if extends == "existence":
+        tokens = [str(t) for t in data.get("tokens") or []]
+        raw = data.get("raw") or []
+        prefix = "".join(str(r) for r in raw) if isinstance(raw, list) else str(raw)
+        if not tokens:
+            if prefix:
+                flags = "(?im)" if data.get("ignorecase", False) else "(?m)"
+                yield "raw", prefix, flags + prefix
+            return
+        for token in tokens:
+            yield "token", token, _vale_regex(token, data, bounded, prefix)
+        if len(tokens) > 1:
+            yield "rule", "|".join(tokens), _vale_regex(
+                "|".join(tokens), data, bounded, prefix)
+
+    elif extends == "substitution":
+        keys = [str(k) for k in (data.get("swap") or {})]
+        for key in keys:
+            yield "swap", key, _vale_regex(key, data, bounded)
+        if len(keys) > 1:
+            body = "|".join("(%s)" % k for k in keys)
+            yield "rule", body, _vale_regex(body, data, bounded)
+
+    elif extends in ("occurrence", "repetition"):
+        tokens = data.get("tokens") or []
+        if data.get("token"):
+            tokens = [data["token"]]
+        for token in tokens:
+            yield "token", str(token), _vale_regex(str(token), data, False)
+
+    elif extends == "conditional":
+        for field in ("first", "second"):
+            if data.get(field):
+                yield field, str(data[field]), _vale_regex(
+                    str(data[field]), data, False)
+
+    elif extends == "capitalization":
+        match = str(data.get("match", ""))
+        if match and not match.startswith("$"):
+            yield "match", match, _vale_regex(match, data, False)
+
+    elif extends == "sequence":
+        for token in data.get("tokens") or []:
+            if isinstance(token, dict) and token.get("pattern"):
+                yield "pattern", str(token["pattern"]), _vale_regex(
+                    str(token["pattern"]), data, False)
+
+
+def load_patterns(styles):
+    """Return pattern records for every rule of the given styles."""
+    records = []
+    for style in styles:
+        for path in sorted(glob.glob(os.path.join(STYLES_DIR, style, "*.yml"))):
+            rule = os.path.splitext(os.path.basename(path))[0]
+            with open(path, "r", encoding="utf-8") as f:
+                data = yaml.safe_load(f) or {}
+            scope = data.get("scope") or ["text"]
+            if isinstance(scope, str):
+                scope = [scope]
+            for kind, source, regex in rule_patterns(data):
+                key = "%s.%s:%s" % (style, rule, kind)
+                if kind != "rule":
+                    key += ":" + source
+                records.append({
+                    "key": key,
+                    "style": style,
+                    "rule": rule,
+                    "extends": data.get("extends"),
+                    "scope": scope,
+                    "kind": kind,
+                    "source": source,
+                    "pattern": regex,
+                })
+    return records
+
+
+def fixture_lines():
+    """Return the lines of every .adoc fixture file, in path order."""
+    lines = []
+    for path in sorted(glob.glob(os.path.join(FIXTURES_DIR, "**", "*.adoc"),
+                                 recursive=True)):
+        with open(path, "r", encoding="utf-8") as f:
+            lines.extend(f.read().splitlines())
+    return lines
+
+
+def _group_end(pattern, start):
+    """Return the index just past the group opening at pattern[start]."""
+    depth = 0
+    i = start
+    while i < len(pattern):
+        ch = pattern[i]
+        if ch == "\\":
+            i += 2
+            continue
+        if ch == "[":
+            close = pattern.find("]", i + 2)
+            i = close + 1 if close > 0 else len(pattern)
+            continue
+        if ch == "(":
+            depth += 1
+        elif ch == ")":
+            depth -= 1
+            if depth == 0:
+                return i + 1
+        i += 1
+    return len(pattern)
+
+
+def python_pattern(pattern):
+    """Return a Python re equivalent of a Vale regex, and its caveats.
+
+    Mid-pattern inline flags are hoisted to the start, and lookbehinds
+    that re rejects (variable width, backreferences) are dropped.
+
+    Returns:
+        (pattern, notes) where notes lists the approximations made, or
+        (None, [error]) if no compilable equivalent was found.
+    """
+    notes = []
+    candidate = pattern
+    for _ in range(32):
+        try:
+            re.compile(candidate)
+            return candidate, notes
+        except re.error as e:
+            message = str(e)
+        if "global flags not at the start" in message:
+            flags = set()
+            for m in re.finditer(r"\(\?([aiLmsux]+)\)", candidate):
+                flags.update(m.group(1))
+            candidate = re.sub(r"\(\?[aiLmsux]+\)", "", candidate)
+            candidate = "(?%s)%s" % ("".join(sorted(flags)), candidate)
+            notes.append("inline flags moved to the start")
+            continue
+        m = re.search(r"\(\?<[=!]", candidate)
+        if m and ("look-behind" in message or "lookbehind" in message
+                  or "group reference" in message):
+            end = _group_end(candidate, m.start())
+            notes.append("dropped lookbehind %s" % candidate[m.start():end])
+            candidate = candidate[:m.start()] + candidate[end:]
+            continue
+        return None, [message]
+    return None, ["too many incompatible constructs"]
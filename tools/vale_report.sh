@@ -17,22 +17,12 @@ do
     REPORT_BASENAME=vale-report-$(basename "${directory}" | sed 's#^\.##')
     # Create file list
     echo "$FILE_LIST" > "${REPORT_BASENAME}-list.log"
-    # Count words in the corpus
-    # shellcheck disable=SC2002,SC2086
-    cat $FILE_LIST | wc -w  > "${REPORT_BASENAME}-wordcount.log"
-    # Create Vale report
-    # shellcheck disable=SC2086
-    vale --output=JSON --no-exit $FILE_LIST > "$REPORT_BASENAME.json"
-    # A minimal analyze
-    jq .[][].Severity "$REPORT_BASENAME.json" | sort | uniq -c | sort -nr > "$REPORT_BASENAME.severity"
-    jq .[][].Check "$REPORT_BASENAME.json" | sort | uniq -c | sort -nr > "$REPORT_BASENAME.rules"
-    # Report all words generating a Spelling error
-    # Interesting fields:
-    # Filter on: "Check": "RedHat.Spelling"
-    # Display the values of: "Match"
-    RULES="$(jq .[][].Check "$REPORT_BASENAME.json" | sort | uniq | sed s/\"//g)"
-    for RULE in $RULES
-    do
-        jq -r ".[][] | select(.Check==\"$RULE\") | .Match" "$REPORT_BASENAME.json" | sort | uniq -c | sort -nr > "$REPORT_BASENAME-rule-$RULE.txt"
-    done
-done
\ No newline at end of file
+    # Create Vale report with one Vale process per CPU, reusing the alerts
+    # of files unchanged since an earlier report from the cache of
+    # tools/vale_cache.py. The files are read from the list, as they may
+    # not fit on one command line.
+    python3 "$(dirname "$0")/vale_cache.py" --output=JSON --no-exit --file-list "${REPORT_BASENAME}-list.log" > "$REPORT_BASENAME.json"
+    # Count words in the corpus, and break alerts down by severity, rule,
+    # match and file, in one pass over the report
+    python3 "$(dirname "$0")/summarize-vale-report.py" --file-list "${REPORT_BASENAME}-list.log" --prefix "$REPORT_BASENAME" "$REPORT_BASENAME.json"
+done
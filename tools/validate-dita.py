@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+# Copyright (c) 2024 Red Hat, Inc.
+# This program and the accompanying materials are made
+# available under the terms of the Eclipse Public License 2.0
+# which is available at https://www.eclipse.org/legal/epl-2.0/
+#
+# SPDX-License-Identifier: EPL-2.0
+"""Validate a DITA corpus against the generated Schematron rules.
+
+Takes directories, DITA maps or individual topics, and spreads parsing
+and validation across a pool of worker processes. Each worker compiles
+the schema once, and each topic is parsed once with all rules applied
+to it by tools/schematron_engine.py. Results stream out as topics
+complete, as JSON lines or as one SVRL file per topic.
+
+Usage:
+    tools/validate-dita.py [--sch FILE ...] [--jobs N] [--format jsonl|text]
+                           [--output FILE] [--svrl-dir DIR] PATH...
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import time
+from urllib.parse import unquote
+
+from lxml import etree
+
+import schematron_engine
+
+TOPIC_EXTENSIONS = (".dita", ".xml")
+MAP_EXTENSIONS = (".ditamap", ".bookmap")
+
+# Compiled schema of the current worker process, set by _init_worker().
+_SCHEMA = None
+
+
+def _is_map(path):
+    return path.lower().endswith(MAP_EXTENSIONS)
+
+
+def collect_map_topics(map_path, seen_maps=None):
+    """Yield the local topic files referenced by a DITA map.
+
+    Follows topicref/@href recursively into submaps, and skips external,
+    peer and non-DITA references.
+    """
+    if seen_maps is None:
+        seen_maps = set()
+    map_path = os.path.abspath(map_path)
+    if map_path in seen_maps:
+        return
+    seen_maps.add(map_path)
+
+    try:
+        doc = etree.parse(map_path)
+    except (OSError, etree.XMLSyntaxError) as e:
+        print("Error parsing map %s: %s" % (map_path, e), file=sys.stderr)
+        return
+
+    base = os.path.dirname(map_path)
+    for el in doc.iter():
+        href = el.get("href") if isinstance(el.tag, str) else None
+        if not href or el.get("scope") in ("external", "peer"):
+            continue
+        fmt = el.get("format", "")
+        if fmt and fmt not in ("dita", "ditamap"):
+            continue
+        target = unquote(href.split("#", 1)[0])
+        if not target or "://" in target:
+            continue
+        target = os.path.normpath(os.path.join(base, target))
+        if fmt == "ditamap" or _is_map(target):
+            yield from collect_map_topics(target, seen_maps)
+        elif target.lower().endswith(TOPIC_EXTENSIONS):
+            yield target
+
+
+def collect_topics(paths):
+    """Expand directories, maps and topic files into unique topic paths.
+
+    Directory contents are walked in sorted order so the input order,
+    and therefore --ordered output, is deterministic.
+    """
+    seen = set()
+    for path in paths:
+        if os.path.isdir(path):
+            candidates = []
+            for dirpath, dirnames, filenames in os.walk(path):
+                dirnames.sort()
+                for filename in sorted(filenames):
+                    if filename.lower().endswith(TOPIC_EXTENSIONS):
+                        candidates.append(os.path.join(dirpath, filename))
+        elif _is_map(path):
+            candidates = collect_map_topics(path)
+        else:
+            candidates = [path]
+
+        for candidate in candidates:
+            key = os.path.abspath(candidate)
+            if key not in seen:
+                seen.add(key)
+                yield candidate
+
+
+def _init_worker(sch_paths):
+    """Compile the schema once per worker process."""
+    global _SCHEMA
+    _SCHEMA = schematron_engine.load_schema(sch_paths)
+
+
+def _validate_topic(job):
+    """Parse and validate one topic in a worker.
+
+    Returns:
+        (path, list of finding dicts, error string or None, SVRL bytes
+        or None)
+    """
+    path, want_svrl = job
+    parser = etree.XMLParser(no_network=True, resolve_entities=False)
+    try:
+        doc = etree.parse(path, parser)
+    except (OSError, etree.XMLSyntaxError) as e:
+        return path, [], str(e), None
+
+    try:
+        findings = _SCHEMA.validate(doc)
+    except schematron_engine.UnsupportedExpression as e:
+        return path, [], str(e), None
+
+    svrl = None
+    if want_svrl:
+        svrl = etree.tostring(
+            schematron_engine.findings_to_svrl(findings, _SCHEMA, document=path),
+            xml_declaration=True, encoding="UTF-8", pretty_print=True,
+        )
+    return path, [schematron_engine.finding_to_dict(f, document=path)
+                  for f in findings], None, svrl
+
+
+def _svrl_path(svrl_dir, topic_path):
+    """Map a topic path to its SVRL output path below svrl_dir.
+
+    The source extension is kept, so that a.dita and a.xml in the same
+    directory get a.dita.svrl and a.xml.svrl.
+    """
+    relative = os.path.relpath(os.path.abspath(topic_path))
+    if relative.startswith(os.pardir):
+        relative = os.path.abspath(topic_path).lstrip(os.sep)
+    return os.path.join(svrl_dir, relative + ".svrl")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "paths", nargs="+", metavar="PATH",
+        help="directory, DITA map or topic file",
+    )
+    parser.add_argument(
+        "--sch", action="append", metavar="FILE",
+        help="Schematron file to load (repeatable, default: RedHat-all.sch)",
+    )
+    parser.add_argument(
+        "-j", "--jobs", type=int, default=os.cpu_count() or 1, metavar="N",
+        help="number of worker processes (default: number of CPUs)",
+    )
+    parser.add_argument(
+        "--format", choices=("jsonl", "text"), default="jsonl",
+        help="format of the findings stream (default: jsonl)",
+    )
+    parser.add_argument(
+        "-o", "--output", metavar="FILE",
+        help="write the findings stream to FILE instead of standard output",
+    )
+    parser.add_argument(
+        "--svrl-dir", metavar="DIR",
+        help="also write one SVRL report per topic below DIR",
+    )
+    parser.add_argument(
+        "--ordered", action="store_true",
+        help="emit results in input order instead of completion order",
+    )
+    parser.add_argument(
+        "--chunksize", type=int, default=16, metavar="N",
+        help="topics handed to a worker at a time (default: 16)",
+    )
+    args = parser.parse_args(argv)
+
+    sch_paths = args.sch or [schematron_engine.DEFAULT_SCHEMA]
+    schema = schematron_engine.load_schema(sch_paths)
+    for pattern_id, _, reason in schema.unsupported:
+        print("Skipping check in %s: %s" % (pattern_id, reason), file=sys.stderr)
+
+    jobs = ((path, args.svrl_dir is not None)
+            for path in collect_topics(args.paths))
+    out = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+
+    topics = 0
+    findings_total = 0
+    errors = 0
+    start = time.monotonic()
+
+    try:
+        with multiprocessing.Pool(
+                max(1, args.jobs), initializer=_init_worker,
+                initargs=(sch_paths,)) as pool:
+            imap = pool.imap if args.ordered else pool.imap_unordered
+            for path, findings, error, svrl in imap(
+                    _validate_topic, jobs, chunksize=max(1, args.chunksize)):
+                topics += 1
+                if error:
+                    errors += 1
+                    if args.format == "jsonl":
+                        out.write(json.dumps({"document": path, "error": error}) + "\n")
+                    else:
+                        out.write("%s: error: %s\n" % (path, error))
+                    continue
+
+                findings_total += len(findings)
+                for finding in findings:
+                    if args.format == "jsonl":
+                        out.write(json.dumps(finding) + "\n")
+                    else:
+                        out.write("%s:%s: [%s] %s\n" % (
+                            path, finding["location"],
+                            finding["role"] or "report", finding["message"]))
+
+                if svrl is not None:
+                    svrl_path = _svrl_path(args.svrl_dir, path)
+                    os.makedirs(os.path.dirname(svrl_path), exist_ok=True)
+                    with open(svrl_path, "wb") as f:
+                        f.write(svrl)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+    elapsed = time.monotonic() - start
+    print("Validated %d topics in %.1fs: %d findings, %d errors" % (
+        topics, elapsed, findings_total, errors), file=sys.stderr)
+
+    if errors:
+        return 2
+    return 1 if findings_total else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
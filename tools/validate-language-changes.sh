@@ -15,13 +15,32 @@ if [ -z "${GITHUB_BASE_REF}" ]
     else
         MAINBRANCH="origin/$GITHUB_BASE_REF"
 fi
+# With VALE_CHANGED_HUNKS set, lint only the blocks added or modified in
+# comparison to $MAINBRANCH, with tools/lint-changed-hunks.py and
+# tools/vale_cache.py from vale-at-red-hat, next to this script.
+if [ -n "${VALE_CHANGED_HUNKS}" ]
+    then
+        echo "Validating languages on blocks added or modified in comparison to $MAINBRANCH with $(vale -v)"
+        set -x
+        exec python3 "$(dirname "$0")/lint-changed-hunks.py" --base "$MAINBRANCH"
+fi
+# With VALE_CACHE_DIR set, lint through tools/vale_cache.py from
+# vale-at-red-hat, next to this script, to reuse the alerts of files
+# that an earlier run already linted. The command is kept in the
+# positional parameters, which keep the script path whole.
+if [ -n "${VALE_CACHE_DIR}" ]
+    then
+        set -- python3 "$(dirname "$0")/vale_cache.py"
+    else
+        set -- vale
+fi
 FILES=$(git diff --name-only --diff-filter=AM "$MAINBRANCH" "*.adoc")
 if [ -n "${FILES}" ]
     then
         echo "Validating languages on file added or modified in comparison to $MAINBRANCH with $(vale -v)"
         set -x
         # shellcheck disable=SC2086 # We want to split on spaces
-        vale ${FILES}
+        "$@" ${FILES}
     else
         echo "No files added or modified in comparison to $MAINBRANCH"
 fi
\ No newline at end of file
@@ -7,26 +7,40 @@
 # SPDX-License-Identifier: EPL-2.0
 """Validate generated Schematron files for well-formedness and structure."""
 
+import copy
 import glob
+import importlib.util
 import os
+import re
 import sys
 
 from lxml import etree
 
 REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 OUTPUT_DIR = os.path.join(REPO_ROOT, "schematron", "output")
+XSLT1_OUTPUT_DIR = os.path.join(OUTPUT_DIR, "xslt1")
 
 SCH_NS = "http://purl.oclc.org/dsdl/schematron"
 
+# XPath string literals, whose regexes may contain a literal "$".
+STRING_RE = re.compile(r"'[^']*'|\"[^\"]*\"")
+# $name references, and the variables an XPath expression binds itself
+# with some/every/for ... in and let ... :=.
+VARIABLE_RE = re.compile(r"\$([\w.-]+)")
+BOUND_VARIABLE_RE = re.compile(r"\$([\w.-]+)\s*(?:in\b|:=)")
 
-def validate_schematron(filepath):
+
+def validate_schematron(filepath, query_binding="xslt2"):
     """Validate a single .sch file.
 
     Checks:
     1. XML well-formedness
     2. Root element is sch:schema with correct namespace
-    3. queryBinding is xslt2
+    3. queryBinding is query_binding (xslt2, or xslt for the XSLT 1.0
+       variants in schematron/output/xslt1/)
     4. Contains at least one sch:pattern
+    5. Every variable a report or assert tests is bound by an sch:let
+       of its rule, pattern or schema, or by the test itself
 
     Note: lxml.isoschematron only supports XSLT 1.0, so it cannot compile
     our xslt2/XPath 2.0 rules. We validate structure instead.
@@ -47,10 +61,12 @@ def validate_schematron(filepath):
         return False, "%s: root element is not sch:schema" % filename
 
     qb = root.get("queryBinding", "")
-    if qb != "xslt2":
-        return False, "%s: queryBinding is '%s', expected 'xslt2'" % (filename, qb)
+    if qb != query_binding:
+        return False, "%s: queryBinding is '%s', expected '%s'" % (
+            filename, qb, query_binding)
 
     patterns = root.findall("{%s}pattern" % SCH_NS)
+    schema_lets = {let.get("name") for let in root.findall("{%s}let" % SCH_NS)}
     includes = root.findall("{%s}include" % SCH_NS)
 
     if not patterns and not includes:
@@ -71,6 +87,72 @@ def validate_schematron(filepath):
             if not reports and not asserts:
                 return False, "%s: sch:rule has no report or assert children" % filename
 
+            unbound = unbound_variables(rule_el, schema_lets | {
+                let.get("name") for let in pat.findall("{%s}let" % SCH_NS)})
+            if unbound:
+                return False, "%s: pattern '%s' tests unbound $%s" % (
+                    filename, pat.get("id", "?"), unbound[0])
+
+    return True, ""
+
+
+def unbound_variables(rule_el, lets=()):
+    """Return the variables the checks of an sch:rule use but no let binds.
+
+    Args:
+        rule_el: The sch:rule element.
+        lets: Names bound outside the rule, by its pattern or schema.
+
+    Returns:
+        Sorted list of variable names.
+    """
+    bound = set(lets) | {
+        let.get("name") for let in rule_el.findall("{%s}let" % SCH_NS)}
+    unbound = set()
+    for check in rule_el:
+        if not isinstance(check.tag, str) or check.tag == "{%s}let" % SCH_NS:
+            continue
+        test = STRING_RE.sub("''", check.get("test", ""))
+        unbound |= (set(VARIABLE_RE.findall(test))
+                    - set(BOUND_VARIABLE_RE.findall(test)))
+    return sorted(unbound - bound)
+
+
+def load_generator():
+    """Import tools/vale-to-schematron.py, whose name is not a module name."""
+    spec = importlib.util.spec_from_file_location(
+        "vale_to_schematron",
+        os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                     "vale-to-schematron.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def validate_grouping(filepath, generator):
+    """Check that regrouping each pattern of a .sch file on its own keeps it.
+
+    A pattern that --group-contexts leaves alone in its context must come
+    out of group_patterns_by_context() with all its sch:let variables,
+    and with every variable its checks test still bound.
+
+    Returns:
+        (valid, error_message) tuple.
+    """
+    filename = os.path.basename(filepath)
+    let_path = ".//{%s}let" % SCH_NS
+    for pat in etree.parse(filepath).getroot().findall("{%s}pattern" % SCH_NS):
+        lets = len(pat.findall(let_path))
+        grouped = generator.group_patterns_by_context([copy.deepcopy(pat)])
+        kept = sum(len(p.findall(let_path)) for p in grouped)
+        if kept != lets:
+            return False, "%s: pattern '%s' keeps %d of its %d lets when grouped" % (
+                filename, pat.get("id", "?"), kept, lets)
+        for rule_el in grouped[0].findall("{%s}rule" % SCH_NS):
+            unbound = unbound_variables(rule_el)
+            if unbound:
+                return False, "%s: grouped pattern '%s' tests unbound $%s" % (
+                    filename, pat.get("id", "?"), unbound[0])
     return True, ""
 
 
@@ -81,18 +163,32 @@ def main():
         print("ERROR: No .sch files found in %s" % OUTPUT_DIR, file=sys.stderr)
         return 1
 
+    jobs = [(f, "xslt2") for f in sch_files]
+    jobs += [(f, "xslt") for f in
+             sorted(glob.glob(os.path.join(XSLT1_OUTPUT_DIR, "*.sch")))]
+    sch_files = [f for f, _ in jobs]
+
     print("Validating %d Schematron files..." % len(sch_files))
 
     errors = []
-    for filepath in sch_files:
-        valid, error_msg = validate_schematron(filepath)
-        name = os.path.basename(filepath)
+    for filepath, query_binding in jobs:
+        valid, error_msg = validate_schematron(filepath, query_binding)
+        name = os.path.relpath(filepath, OUTPUT_DIR)
         if valid:
             print("  OK: %s" % name)
         else:
             print("  FAIL: %s" % name)
             errors.append(error_msg)
 
+    generator = load_generator()
+    rule_files = [f for f, _ in jobs if not f.endswith("RedHat-all.sch")]
+    print("\nRegrouping the patterns of %d per-rule files..." % len(rule_files))
+    for filepath in rule_files:
+        valid, error_msg = validate_grouping(filepath, generator)
+        if not valid:
+            print("  FAIL: %s" % os.path.relpath(filepath, OUTPUT_DIR))
+            errors.append(error_msg)
+
     if errors:
         print("\n%d validation errors:" % len(errors))
         for err in errors: